@@ -0,0 +1,164 @@
+"""
+Analytics event ingestion for the Fashion Hub project.
+"""
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import json
+import logging
+import time
+
+from common.streams import StreamQueue
+from .models import AnalyticsEvent
+
+logger = logging.getLogger(__name__)
+
+
+class EventBuffer(StreamQueue):
+    """
+    Buffer of analytics events between the API and the database.
+    
+    Requests append events to a Redis stream and return; flushers write
+    them in batches with bulk_create. Once the backlog reaches
+    ANALYTICS_BUFFER_MAX_LENGTH new events are refused and counted as
+    dropped until the flushers catch up.
+    
+    Events are written at least once: a flusher that dies after inserting
+    a batch but before acknowledging it leaves the batch to be written
+    again by another flusher. created_at is the time the event was
+    appended, however long it waits in the buffer.
+    """
+    stream = "analytics:events"
+    group = "analytics-flushers"
+    stats_key = "analytics:ingest:stats"
+    
+    def append(self, event):
+        """
+        Append a validated event to the buffer.
+        
+        Args:
+            event: AnalyticsEvent field values, keyed by attribute name
+        
+        Returns:
+            True if the event was buffered, False if it was dropped
+        """
+        event = {**event, 'created_at': timezone.now()}
+        
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        pipe.xadd(self.stream, {'event': json.dumps(event, cls=DjangoJSONEncoder)})
+        pipe.xlen(self.stream)
+        pipe.hincrby(self.stats_key, 'accepted', 1)
+        entry_id, length, _ = pipe.execute()
+        
+        if length <= settings.ANALYTICS_BUFFER_MAX_LENGTH:
+            return True
+        
+        # Over the limit: take the event back out and count it as dropped
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        pipe.xdel(self.stream, entry_id)
+        pipe.hincrby(self.stats_key, 'accepted', -1)
+        pipe.hincrby(self.stats_key, 'dropped', 1)
+        pipe.execute()
+        return False
+    
+    def collect(self, consumer, batch_size, max_wait_ms):
+        """
+        Gather up to batch_size events, waiting at most max_wait_ms.
+        
+        Events left pending by a flusher that stopped are taken first.
+        
+        Returns:
+            List of (entry_id, fields) tuples
+        """
+        entries = self.claim_entries(consumer, settings.ANALYTICS_CLAIM_IDLE * 1000, batch_size)
+        deadline = time.monotonic() + max_wait_ms / 1000
+        
+        while len(entries) < batch_size:
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0:
+                break
+            entries += self.read_entries(consumer, batch_size - len(entries), block_ms=remaining_ms)
+        
+        return entries
+    
+    def flush(self, consumer, batch_size=None, max_wait_ms=None):
+        """
+        Write one batch of buffered events to the database.
+        
+        A batch is written once it has batch_size events or max_wait_ms
+        has passed, whichever comes first.
+        
+        Args:
+            consumer: Consumer name, unique per flusher
+            batch_size: Events per batch (default: ANALYTICS_FLUSH_BATCH_SIZE)
+            max_wait_ms: Longest wait for a full batch (default: ANALYTICS_FLUSH_INTERVAL_MS)
+        
+        Returns:
+            Number of events written
+        """
+        entries = self.collect(
+            consumer,
+            batch_size or settings.ANALYTICS_FLUSH_BATCH_SIZE,
+            max_wait_ms or settings.ANALYTICS_FLUSH_INTERVAL_MS
+        )
+        
+        if not entries:
+            return 0
+        
+        events = [json.loads(fields['event']) for _, fields in entries]
+        written = self.write(events)
+        
+        self.ack(*[entry_id for entry_id, _ in entries])
+        with self.redis_client.pipeline() as pipe:
+            pipe.hincrby(self.stats_key, 'flushed', written)
+            pipe.hincrby(self.stats_key, 'invalid', len(events) - written)
+        
+        return written
+    
+    @staticmethod
+    def write(events):
+        """
+        Insert events with bulk_create, skipping unknown stores and users.
+        
+        Returns:
+            Number of events inserted
+        """
+        from stores.models import Store
+        from users.models import User
+        
+        store_ids = {event['store_id'] for event in events}
+        user_ids = {event['user_id'] for event in events if event.get('user_id')}
+        known_stores = set(Store.objects.filter(pk__in=store_ids).values_list('pk', flat=True))
+        known_users = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True)) if user_ids else set()
+        
+        objects = []
+        for event in events:
+            if event['store_id'] not in known_stores:
+                continue
+            if isinstance(event.get('created_at'), str):
+                event['created_at'] = parse_datetime(event['created_at'])
+            if event.get('user_id') not in known_users:
+                event['user_id'] = None
+            objects.append(AnalyticsEvent(**event))
+        
+        AnalyticsEvent.objects.bulk_create(objects, batch_size=settings.ANALYTICS_FLUSH_BATCH_SIZE)
+        
+        if len(objects) < len(events):
+            logger.warning(f"Dropped {len(events) - len(objects)} analytics events for unknown stores")
+        
+        return len(objects)
+    
+    def get_stats(self):
+        """
+        Get ingestion counters and the current backlog.
+        """
+        stats = {field: int(value) for field, value in self.redis_client.get_hash(self.stats_key).items()}
+        for field in ('accepted', 'dropped', 'flushed', 'invalid'):
+            stats.setdefault(field, 0)
+        stats['backlog'] = self.length()
+        return stats
+
+
+event_buffer = EventBuffer()
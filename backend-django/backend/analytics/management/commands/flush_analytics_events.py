@@ -0,0 +1,36 @@
+"""
+Management command to write buffered analytics events to the database.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import os
+import socket
+
+from analytics.ingest import EventBuffer
+
+
+class Command(BaseCommand):
+    help = "Write analytics events buffered in Redis to the database in batches. Run several to flush in parallel."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', default=None, help="Unique flusher name (default: host and PID)")
+        parser.add_argument('--batch-size', type=int, default=None, help="Events per bulk insert")
+        parser.add_argument('--interval', type=int, default=None, help="Longest wait in milliseconds for a full batch")
+        parser.add_argument('--once', action='store_true', help="Write one batch and exit")
+    
+    def handle(self, *args, **options):
+        buffer = EventBuffer()
+        consumer = options['consumer'] or f"{socket.gethostname()}-{os.getpid()}"
+        
+        while True:
+            written = buffer.flush(consumer, batch_size=options['batch_size'], max_wait_ms=options['interval'])
+            close_old_connections()
+            
+            if written:
+                self.stdout.write(f"Wrote {written} analytics events.")
+            
+            if options['once']:
+                break
+        
+        self.stdout.write(self.style.SUCCESS("Analytics flusher stopped."))
@@ -0,0 +1,36 @@
+"""
+Management command to roll up analytics events and orders.
+"""
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollup import AnalyticsRollup
+
+
+class Command(BaseCommand):
+    help = "Update daily analytics and product performance from new events and orders. Safe to run every minute, or several at once."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--shards', type=int, default=None, help="Number of store shards")
+        parser.add_argument('--lag', type=int, default=None, help="Seconds before a new row is rolled up")
+        parser.add_argument('--max-rows', type=int, default=None, help="Most new events, and orders, read per run")
+        parser.add_argument('--catch-up', action='store_true', help="Repeat until no new rows are left")
+    
+    def handle(self, *args, **options):
+        rollup = AnalyticsRollup(shards=options['shards'], lag_seconds=options['lag'], max_rows=options['max_rows'])
+        
+        while True:
+            stats = rollup.run()
+            
+            self.stdout.write(
+                f"Rolled up {stats['events']} events and {stats['orders']} changed orders into "
+                f"{stats['daily_rows']} daily and {stats['product_rows']} product rows."
+            )
+            
+            if stats['skipped']:
+                self.stdout.write(f"Skipped {stats['skipped']} shards held by another rollup.")
+            
+            if not options['catch_up'] or not (stats['events'] or stats['orders']):
+                break
+        
+        self.stdout.write(self.style.SUCCESS("Analytics rollup complete."))
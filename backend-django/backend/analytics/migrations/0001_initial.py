@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Name')),
+                ('last_event_id', models.BigIntegerField(default=0, verbose_name='Last event ID')),
+                ('seen_event_id', models.BigIntegerField(default=0, verbose_name='Seen event ID')),
+                ('seen_at', models.DateTimeField(blank=True, null=True, verbose_name='Seen at')),
+                ('last_order_update', models.DateTimeField(blank=True, null=True, verbose_name='Last order update')),
+            ],
+            options={
+                'verbose_name': 'Rollup checkpoint',
+                'verbose_name_plural': 'Rollup checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalyticsEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Created at')),
+                ('event_type', models.CharField(choices=[('page_view', 'Page View'), ('product_view', 'Product View'), ('add_to_cart', 'Add to Cart'), ('remove_from_cart', 'Remove from Cart'), ('checkout_start', 'Checkout Start'), ('checkout_complete', 'Checkout Complete'), ('search', 'Search'), ('filter', 'Filter'), ('sort', 'Sort'), ('login', 'Login'), ('signup', 'Signup'), ('wishlist_add', 'Wishlist Add'), ('wishlist_remove', 'Wishlist Remove')], max_length=50, verbose_name='Event type')),
+                ('event_data', models.JSONField(default=dict, verbose_name='Event data')),
+                ('session_id', models.CharField(blank=True, max_length=100, verbose_name='Session ID')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP address')),
+                ('user_agent', models.TextField(blank=True, verbose_name='User agent')),
+                ('referrer', models.URLField(blank=True, verbose_name='Referrer')),
+                ('device_type', models.CharField(choices=[('desktop', 'Desktop'), ('tablet', 'Tablet'), ('mobile', 'Mobile'), ('other', 'Other')], default='other', max_length=20, verbose_name='Device type')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analytics_events', to='stores.store')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='analytics_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Analytics event',
+                'verbose_name_plural': 'Analytics events',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user'], name='analytics_a_user_id_3326ea_idx'), models.Index(fields=['event_type'], name='analytics_a_event_t_a460ec_idx'), models.Index(fields=['created_at', 'id'], name='analytics_a_created_412771_idx'), models.Index(fields=['store', 'created_at', 'id'], name='analytics_a_store_i_83dd8d_idx'), models.Index(fields=['device_type'], name='analytics_a_device__015d51_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('page_views', models.PositiveIntegerField(default=0, verbose_name='Page views')),
+                ('unique_visitors', models.PositiveIntegerField(default=0, verbose_name='Unique visitors')),
+                ('product_views', models.PositiveIntegerField(default=0, verbose_name='Product views')),
+                ('add_to_cart_count', models.PositiveIntegerField(default=0, verbose_name='Add to cart count')),
+                ('orders_count', models.PositiveIntegerField(default=0, verbose_name='Orders count')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Revenue')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='New users')),
+                ('search_count', models.PositiveIntegerField(default=0, verbose_name='Search count')),
+                ('desktop_users', models.PositiveIntegerField(default=0, verbose_name='Desktop users')),
+                ('tablet_users', models.PositiveIntegerField(default=0, verbose_name='Tablet users')),
+                ('mobile_users', models.PositiveIntegerField(default=0, verbose_name='Mobile users')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_analytics', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Daily analytics',
+                'verbose_name_plural': 'Daily analytics',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['store'], name='analytics_d_store_i_68ff0e_idx'), models.Index(fields=['date'], name='analytics_d_date_bf58fd_idx')],
+                'unique_together': {('store', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='Views')),
+                ('add_to_cart_count', models.PositiveIntegerField(default=0, verbose_name='Add to cart count')),
+                ('purchase_count', models.PositiveIntegerField(default=0, verbose_name='Purchase count')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Revenue')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance', to='products.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_performance', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Product performance',
+                'verbose_name_plural': 'Product performance',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['store'], name='analytics_p_store_i_9c102c_idx'), models.Index(fields=['product'], name='analytics_p_product_6224c9_idx'), models.Index(fields=['date'], name='analytics_p_date_5c3608_idx')],
+                'unique_together': {('store', 'product', 'date')},
+            },
+        ),
+    ]
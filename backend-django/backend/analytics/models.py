@@ -13,6 +13,9 @@ class AnalyticsEvent(TimeStampedModel):
     """
     Analytics event model for tracking user interactions.
     """
+    # Time of capture; buffered events are written later but keep this time
+    created_at = models.DateTimeField(_("Created at"), default=timezone.now)
+    
     store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, related_name='analytics_events')
     user = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='analytics_events')
     
@@ -66,10 +69,10 @@ class AnalyticsEvent(TimeStampedModel):
         verbose_name_plural = _("Analytics events")
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['store']),
             models.Index(fields=['user']),
             models.Index(fields=['event_type']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['store', 'created_at', 'id']),
             models.Index(fields=['device_type']),
         ]
     
@@ -165,3 +168,30 @@ class ProductPerformance(TimeStampedModel):
         if self.views == 0:
             return 0
         return (self.purchase_count / self.views) * 100
+
+
+class RollupCheckpoint(TimeStampedModel):
+    """
+    High-water marks of the source rows already rolled up into analytics.
+    
+    There is one checkpoint per store shard, so rollups of different
+    shards can run at the same time.
+    """
+    name = models.CharField(_("Name"), max_length=50, unique=True)
+    
+    # Events up to last_event_id are counted. The highest ID seen by the
+    # previous run becomes the next bound once its transaction had time to
+    # commit, since IDs are allocated before commit.
+    last_event_id = models.BigIntegerField(_("Last event ID"), default=0)
+    seen_event_id = models.BigIntegerField(_("Seen event ID"), default=0)
+    seen_at = models.DateTimeField(_("Seen at"), null=True, blank=True)
+    
+    # Orders changed up to this time are counted
+    last_order_update = models.DateTimeField(_("Last order update"), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("Rollup checkpoint")
+        verbose_name_plural = _("Rollup checkpoints")
+    
+    def __str__(self):
+        return f"{self.name} (event {self.last_event_id}, order update {self.last_order_update})"
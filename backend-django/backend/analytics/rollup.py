@@ -0,0 +1,414 @@
+"""
+Analytics rollups for the Fashion Hub project.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Mod, TruncDate
+from django.utils import timezone
+import logging
+
+from .models import AnalyticsEvent, DailyAnalytics, ProductPerformance, RollupCheckpoint
+
+logger = logging.getLogger(__name__)
+
+# Orders in these states don't count towards orders or revenue
+EXCLUDED_ORDER_STATUSES = ('cancelled', 'refunded')
+
+# Counters added to as events arrive
+DAILY_EVENT_FIELDS = ['page_views', 'product_views', 'add_to_cart_count', 'new_users', 'search_count']
+PRODUCT_EVENT_FIELDS = ['views', 'add_to_cart_count']
+
+# Distinct session counts, recomputed for every store-day with new events
+DAILY_VISITOR_FIELDS = ['unique_visitors', 'desktop_users', 'tablet_users', 'mobile_users']
+
+# Order totals, recomputed for every store-day with changed orders
+DAILY_ORDER_FIELDS = ['orders_count', 'revenue']
+PRODUCT_ORDER_FIELDS = ['purchase_count', 'revenue']
+
+DAILY_FIELDS = DAILY_EVENT_FIELDS + DAILY_VISITOR_FIELDS + DAILY_ORDER_FIELDS
+PRODUCT_FIELDS = PRODUCT_EVENT_FIELDS + PRODUCT_ORDER_FIELDS
+
+
+def day_bounds(days):
+    """
+    Get the datetime range covering a set of dates in the current time zone.
+    
+    Returns:
+        (start, end) tuple, end exclusive
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(min(days), time.min), tz)
+    end = timezone.make_aware(datetime.combine(max(days) + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+class AnalyticsRollup:
+    """
+    Incremental aggregation of events and orders into DailyAnalytics and
+    ProductPerformance.
+    
+    Stores are split into shards by store ID modulo the shard count, each
+    with its own checkpoint. A run goes through every shard, locking its
+    checkpoint row until the shard's rows are written, and skips shards
+    another run holds. Overlapping runs therefore share the work instead
+    of waiting or counting anything twice.
+    
+    Events are append-only, so their counters are added to the stored
+    rows as deltas of the new events alone. Only the distinct visitor
+    counts of the store-days they touch are recomputed. The event
+    high-water mark only moves up to the highest ID seen at least the lag
+    ago, so events whose transactions were still in flight aren't skipped.
+    
+    Orders change status after they are placed, which changes what they
+    count towards. Orders updated since the last run re-dirty the
+    store-day they were placed on, and that store-day's order totals are
+    recomputed.
+    
+    Product events are attributed through a numeric product_id key in
+    event_data.
+    """
+    
+    def __init__(self, shards=None, lag_seconds=None, max_rows=None):
+        """
+        Initialize the rollup.
+        
+        Args:
+            shards: Number of store shards (default: ANALYTICS_ROLLUP_SHARDS)
+            lag_seconds: Age before a row is rolled up (default: ANALYTICS_ROLLUP_LAG)
+            max_rows: Most new events, and orders, read per shard and run (default: ANALYTICS_ROLLUP_MAX_ROWS)
+        """
+        self.shards = shards or settings.ANALYTICS_ROLLUP_SHARDS
+        self.lag = timedelta(seconds=settings.ANALYTICS_ROLLUP_LAG if lag_seconds is None else lag_seconds)
+        self.max_rows = max_rows or settings.ANALYTICS_ROLLUP_MAX_ROWS
+    
+    def checkpoint_name(self, shard):
+        """
+        Get the checkpoint name of a shard.
+        """
+        return f"shard-{shard}-of-{self.shards}"
+    
+    def run(self):
+        """
+        Roll up the events and orders added or changed since the last run.
+        
+        Returns:
+            Dictionary of counts summed over the shards processed, with the
+            number of shards held by other runs under 'skipped'
+        """
+        stats = defaultdict(int)
+        
+        for shard in range(self.shards):
+            shard_stats = self.run_shard(shard)
+            if shard_stats is None:
+                stats['skipped'] += 1
+                continue
+            for key, value in shard_stats.items():
+                stats[key] += value
+        
+        return {
+            'events': stats['events'],
+            'orders': stats['orders'],
+            'daily_rows': stats['daily_rows'],
+            'product_rows': stats['product_rows'],
+            'skipped': stats['skipped'],
+        }
+    
+    def run_shard(self, shard):
+        """
+        Roll up the new events and changed orders of one store shard.
+        
+        Args:
+            shard: Shard number, below the shard count
+        
+        Returns:
+            Dictionary of counts, or None if another run holds the shard
+        """
+        from orders.models import Order
+        
+        name = self.checkpoint_name(shard)
+        RollupCheckpoint.objects.get_or_create(name=name)
+        now = timezone.now()
+        cutoff = now - self.lag
+        
+        with transaction.atomic():
+            checkpoint = RollupCheckpoint.objects.select_for_update(skip_locked=True).filter(name=name).first()
+            if checkpoint is None:
+                logger.info(f"Analytics rollup of {name} is already running")
+                return None
+            
+            # Without a lag there is nothing to wait for, so look again now
+            caught_up = checkpoint.last_event_id >= checkpoint.seen_event_id
+            if checkpoint.seen_at is None or (caught_up and not self.lag):
+                self.observe_events(checkpoint, now)
+            
+            events = AnalyticsEvent.objects.annotate(shard=Mod('store_id', self.shards)).filter(shard=shard)
+            orders = Order.objects.annotate(shard=Mod('warehouse__store_id', self.shards)).filter(shard=shard)
+            
+            # Events up to the seen mark once it is older than the lag
+            last_event_id = checkpoint.last_event_id
+            if checkpoint.seen_at <= cutoff and checkpoint.seen_event_id > last_event_id:
+                new_events = events.filter(id__gt=last_event_id, id__lte=checkpoint.seen_event_id)
+                nth = list(new_events.order_by('id').values_list('id', flat=True)[self.max_rows - 1:self.max_rows])
+                last_event_id = nth[0] if nth else checkpoint.seen_event_id
+            new_events = events.filter(id__gt=checkpoint.last_event_id, id__lte=last_event_id)
+            
+            # Orders changed up to the cutoff, all orders sharing the last
+            # update time included
+            changed_orders = orders.filter(updated_at__lte=cutoff)
+            if checkpoint.last_order_update is not None:
+                changed_orders = changed_orders.filter(updated_at__gt=checkpoint.last_order_update)
+            nth = list(
+                changed_orders.order_by('updated_at')
+                .values_list('updated_at', flat=True)[self.max_rows - 1:self.max_rows]
+            )
+            last_order_update = nth[0] if nth else changed_orders.aggregate(last=Max('updated_at'))['last']
+            if last_order_update is not None:
+                changed_orders = changed_orders.filter(updated_at__lte=last_order_update)
+            
+            order_days = set(
+                changed_orders
+                .annotate(day=TruncDate('created_at'))
+                .values_list('warehouse__store_id', 'day')
+                .order_by()
+                .distinct()
+            ) if last_order_update is not None else set()
+            
+            stats = {
+                'events': new_events.count() if last_event_id > checkpoint.last_event_id else 0,
+                'orders': changed_orders.count() if last_order_update is not None else 0,
+                'daily_rows': 0,
+                'product_rows': 0,
+            }
+            
+            if stats['events'] or order_days:
+                stats['daily_rows'] = self.rollup_daily(new_events if stats['events'] else None, order_days)
+                stats['product_rows'] = self.rollup_products(new_events if stats['events'] else None, order_days)
+            
+            checkpoint.last_event_id = last_event_id
+            if last_order_update is not None:
+                checkpoint.last_order_update = last_order_update
+            if checkpoint.last_event_id >= checkpoint.seen_event_id:
+                self.observe_events(checkpoint, now)
+            checkpoint.save(
+                update_fields=['last_event_id', 'seen_event_id', 'seen_at', 'last_order_update', 'updated_at']
+            )
+        
+        return stats
+    
+    def observe_events(self, checkpoint, now):
+        """
+        Record the highest event ID so far as the checkpoint's next bound.
+        """
+        checkpoint.seen_event_id = AnalyticsEvent.objects.aggregate(last=Max('id'))['last'] or 0
+        checkpoint.seen_at = now
+    
+    def rollup_daily(self, new_events, order_days):
+        """
+        Apply new events and recompute order totals in DailyAnalytics.
+        
+        Args:
+            new_events: Queryset of events not rolled up yet, or None
+            order_days: Set of (store_id, date) tuples with changed orders
+        
+        Returns:
+            Number of rows upserted
+        """
+        from orders.models import Order
+        
+        deltas = {}
+        if new_events is not None:
+            deltas = {
+                (values.pop('store_id'), values.pop('day')): values
+                for values in (
+                    new_events
+                    .annotate(day=TruncDate('created_at'))
+                    .values('store_id', 'day')
+                    .order_by()
+                    .annotate(
+                        page_views=Count('id', filter=Q(event_type='page_view')),
+                        product_views=Count('id', filter=Q(event_type='product_view')),
+                        add_to_cart_count=Count('id', filter=Q(event_type='add_to_cart')),
+                        new_users=Count('id', filter=Q(event_type='signup')),
+                        search_count=Count('id', filter=Q(event_type='search')),
+                    )
+                )
+            }
+        
+        rows = self.existing_rows(DailyAnalytics, set(deltas) | order_days, ('store_id', 'date'), DAILY_FIELDS)
+        
+        for key, values in deltas.items():
+            for field, value in values.items():
+                setattr(rows[key], field, getattr(rows[key], field) + value)
+        
+        if deltas:
+            stores = {store_id for store_id, _ in deltas}
+            start, end = day_bounds({day for _, day in deltas})
+            session = ~Q(session_id='')
+            visitors = (
+                AnalyticsEvent.objects
+                .filter(store_id__in=stores, created_at__gte=start, created_at__lt=end)
+                .annotate(day=TruncDate('created_at'))
+                .values('store_id', 'day')
+                .order_by()
+                .annotate(
+                    unique_visitors=Count('session_id', filter=session, distinct=True),
+                    desktop_users=Count('session_id', filter=session & Q(device_type='desktop'), distinct=True),
+                    tablet_users=Count('session_id', filter=session & Q(device_type='tablet'), distinct=True),
+                    mobile_users=Count('session_id', filter=session & Q(device_type='mobile'), distinct=True),
+                )
+            )
+            for values in visitors:
+                row = rows.get((values.pop('store_id'), values.pop('day')))
+                if row is not None and (row.store_id, row.date) in deltas:
+                    for field, value in values.items():
+                        setattr(row, field, value)
+        
+        if order_days:
+            # Store-days whose orders were all cancelled go back to zero
+            for key in order_days:
+                rows[key].orders_count = 0
+                rows[key].revenue = 0
+            
+            stores = {store_id for store_id, _ in order_days}
+            start, end = day_bounds({day for _, day in order_days})
+            totals = (
+                Order.objects
+                .filter(warehouse__store_id__in=stores, created_at__gte=start, created_at__lt=end)
+                .exclude(status__in=EXCLUDED_ORDER_STATUSES)
+                .annotate(day=TruncDate('created_at'))
+                .values('day', store=F('warehouse__store_id'))
+                .order_by()
+                .annotate(orders_count=Count('id'), revenue=Sum('total'))
+            )
+            for values in totals:
+                key = (values['store'], values['day'])
+                if key in order_days:
+                    rows[key].orders_count = values['orders_count']
+                    rows[key].revenue = values['revenue'] or 0
+        
+        DailyAnalytics.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['store', 'date'],
+            update_fields=DAILY_FIELDS + ['updated_at']
+        )
+        return len(rows)
+    
+    def rollup_products(self, new_events, order_days):
+        """
+        Apply new events and recompute order totals in ProductPerformance.
+        
+        Args:
+            new_events: Queryset of events not rolled up yet, or None
+            order_days: Set of (store_id, date) tuples with changed orders
+        
+        Returns:
+            Number of rows upserted
+        """
+        from orders.models import OrderItem
+        from products.models import Product
+        
+        deltas = {}
+        if new_events is not None:
+            events = list(
+                new_events
+                .filter(event_type__in=['product_view', 'add_to_cart'])
+                .annotate(day=TruncDate('created_at'), product=KeyTextTransform('product_id', 'event_data'))
+                .filter(product__regex=r'^[0-9]+$')
+                .values('store_id', 'day', 'product')
+                .order_by()
+                .annotate(
+                    views=Count('id', filter=Q(event_type='product_view')),
+                    add_to_cart_count=Count('id', filter=Q(event_type='add_to_cart')),
+                )
+            )
+            known_products = set(
+                Product.objects.filter(pk__in={int(values['product']) for values in events}).values_list('pk', flat=True)
+            )
+            for values in events:
+                product_id = int(values.pop('product'))
+                if product_id in known_products:
+                    deltas[(values.pop('store_id'), values.pop('day'), product_id)] = values
+        
+        purchases = {}
+        if order_days:
+            stores = {store_id for store_id, _ in order_days}
+            start, end = day_bounds({day for _, day in order_days})
+            items = (
+                OrderItem.objects
+                .filter(order__warehouse__store_id__in=stores, order__created_at__gte=start, order__created_at__lt=end)
+                .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+                .annotate(day=TruncDate('order__created_at'))
+                .values('day', 'product_id', store=F('order__warehouse__store_id'))
+                .order_by()
+                .annotate(purchase_count=Sum('quantity'), revenue=Sum('subtotal'))
+            )
+            for values in items:
+                if (values['store'], values['day']) in order_days:
+                    purchases[(values['store'], values['day'], values['product_id'])] = values
+        
+        keys = set(deltas) | set(purchases)
+        if order_days:
+            # Products no longer bought on a re-dirtied store-day are reset too
+            stores = {store_id for store_id, _ in order_days}
+            keys |= {
+                key for key in ProductPerformance.objects
+                .filter(store_id__in=stores, date__in={day for _, day in order_days}, purchase_count__gt=0)
+                .values_list('store_id', 'date', 'product_id')
+                if key[:2] in order_days
+            }
+        
+        rows = self.existing_rows(ProductPerformance, keys, ('store_id', 'date', 'product_id'), PRODUCT_FIELDS)
+        
+        for key, values in deltas.items():
+            for field, value in values.items():
+                setattr(rows[key], field, getattr(rows[key], field) + value)
+        
+        for key, row in rows.items():
+            if key[:2] in order_days:
+                values = purchases.get(key, {})
+                row.purchase_count = values.get('purchase_count') or 0
+                row.revenue = values.get('revenue') or 0
+        
+        ProductPerformance.objects.bulk_create(
+            rows.values(),
+            update_conflicts=True,
+            unique_fields=['store', 'product', 'date'],
+            update_fields=PRODUCT_FIELDS + ['updated_at']
+        )
+        return len(rows)
+    
+    def existing_rows(self, model, keys, key_fields, fields):
+        """
+        Build unsaved rows for the given keys, starting from the stored values.
+        
+        Args:
+            model: DailyAnalytics or ProductPerformance
+            keys: Set of key tuples, in key_fields order
+            key_fields: Attribute names making up a row's key
+            fields: Counter fields to copy from stored rows
+        
+        Returns:
+            Dictionary mapping each key to an unsaved instance
+        """
+        rows = {key: model(**dict(zip(key_fields, key))) for key in keys}
+        if not keys:
+            return rows
+        
+        stored = model.objects.filter(
+            store_id__in={key[0] for key in keys},
+            date__in={key[1] for key in keys}
+        ).values(*key_fields, *fields)
+        
+        for values in stored:
+            row = rows.get(tuple(values.pop(field) for field in key_fields))
+            if row is not None:
+                for field, value in values.items():
+                    setattr(row, field, value)
+        
+        return rows
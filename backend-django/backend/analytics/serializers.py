@@ -25,7 +25,11 @@ class AnalyticsEventSerializer(serializers.ModelSerializer):
 class AnalyticsEventCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a new analytics event.
+    
+    The store is taken as a plain ID so validation needs no query; events
+    for unknown stores are discarded when the ingest buffer is flushed.
     """
+    store = serializers.IntegerField(source='store_id', min_value=1)
     
     class Meta:
         model = AnalyticsEvent
@@ -45,6 +49,15 @@ class AnalyticsEventCreateSerializer(serializers.ModelSerializer):
             validated_data['user'] = request.user
         
         return super().create(validated_data)
+    
+    def get_event(self):
+        """
+        Get the validated event for the ingest buffer.
+        """
+        request = self.context.get('request')
+        event = dict(self.validated_data)
+        event['user_id'] = request.user.pk if request and request.user.is_authenticated else None
+        return event
 
 
 class DailyAnalyticsSerializer(serializers.ModelSerializer):
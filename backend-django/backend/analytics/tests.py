@@ -0,0 +1,178 @@
+from datetime import timedelta
+import threading
+
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from stores.models import Store
+from users.models import Address, User
+from warehouses.models import Warehouse
+from .ingest import EventBuffer
+from .models import AnalyticsEvent, DailyAnalytics, ProductPerformance, RollupCheckpoint
+from .rollup import AnalyticsRollup
+
+
+class EventBufferTests(TestCase):
+    """
+    Test cases for writing buffered analytics events.
+    """
+    
+    def setUp(self):
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+    
+    def test_write_keeps_capture_time(self):
+        """
+        Test that a flushed event keeps the time it was captured.
+        """
+        captured = timezone.now() - timedelta(minutes=10)
+        
+        written = EventBuffer.write([
+            {'store_id': self.store.id, 'user_id': None, 'event_type': 'page_view', 'created_at': captured.isoformat()},
+            {'store_id': self.store.id + 1, 'user_id': None, 'event_type': 'page_view', 'created_at': captured.isoformat()},
+        ])
+        
+        self.assertEqual(written, 1)
+        self.assertEqual(AnalyticsEvent.objects.get().created_at, captured)
+
+
+class RollupMixin:
+    """
+    Builds a store with a product, a warehouse and a customer to place orders.
+    """
+    
+    def create_store(self):
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        category = Category.objects.create(name_en='Shirts', name_ar='Shirts', slug='shirts', store=self.store)
+        self.product = Product.objects.create(
+            category=category, name_en='P1', name_ar='P1', description_en='D1', description_ar='D1',
+            sku='SKU1', price=100, store=self.store
+        )
+        address = {'address_line1': 'Street', 'city': 'Cairo', 'state': 'Cairo', 'postal_code': '11511', 'country': 'EG'}
+        self.warehouse = Warehouse.objects.create(store=self.store, name_en='Main', name_ar='Main', **address)
+        self.user = User.objects.create(username='buyer', email='buyer@example.com')
+        self.address = Address.objects.create(
+            user=self.user, name='Home', recipient_name='Buyer', phone_number='0100', **address
+        )
+        self.rollup = AnalyticsRollup(shards=2, lag_seconds=0)
+    
+    def track(self, event_type, session_id='s1', **event_data):
+        return AnalyticsEvent.objects.create(
+            store=self.store, event_type=event_type, session_id=session_id, event_data=event_data
+        )
+    
+    def place_order(self, number, quantity=1):
+        order = Order.objects.create(
+            order_number=number, user=self.user, shipping_address=self.address, shipping_method='standard',
+            shipping_cost=0, payment_method='card', subtotal=100 * quantity, tax=0, total=100 * quantity,
+            warehouse=self.warehouse
+        )
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, unit_price=100, product_name_en='P1', product_name_ar='P1'
+        )
+        return order
+    
+    def daily(self):
+        return DailyAnalytics.objects.get(store=self.store)
+
+
+class AnalyticsRollupTests(RollupMixin, TestCase):
+    """
+    Test cases for incremental analytics rollups.
+    """
+    
+    def setUp(self):
+        self.create_store()
+    
+    def test_event_counters_accumulate_across_runs(self):
+        """
+        Test that each run adds only the new events to the stored counters.
+        """
+        self.track('page_view')
+        self.track('product_view', product_id=self.product.id)
+        self.rollup.run()
+        
+        self.track('page_view', session_id='s2')
+        self.track('product_view', session_id='s2', product_id=self.product.id)
+        stats = self.rollup.run()
+        self.rollup.run()
+        
+        self.assertEqual(stats['events'], 2)
+        daily = self.daily()
+        self.assertEqual((daily.page_views, daily.product_views, daily.unique_visitors), (2, 2, 2))
+        self.assertEqual(ProductPerformance.objects.get(product=self.product).views, 2)
+    
+    def test_cancelled_order_leaves_revenue(self):
+        """
+        Test that cancelling an order already rolled up takes it out of the totals.
+        """
+        self.place_order('O-1')
+        order = self.place_order('O-2', quantity=2)
+        self.rollup.run()
+        self.assertEqual((self.daily().orders_count, self.daily().revenue), (2, 300))
+        
+        order.status = 'cancelled'
+        order.save()
+        self.rollup.run()
+        
+        self.assertEqual((self.daily().orders_count, self.daily().revenue), (1, 100))
+        performance = ProductPerformance.objects.get(product=self.product)
+        self.assertEqual((performance.purchase_count, performance.revenue), (1, 100))
+    
+    def test_events_past_the_seen_mark_wait_for_the_lag(self):
+        """
+        Test that events newer than the last observed ID wait until the lag has passed.
+        """
+        rollup = AnalyticsRollup(shards=2, lag_seconds=3600)
+        self.track('page_view')
+        
+        self.assertEqual(rollup.run()['events'], 0)
+        
+        RollupCheckpoint.objects.update(seen_at=timezone.now() - timedelta(hours=2))
+        self.track('page_view')
+        
+        self.assertEqual(rollup.run()['events'], 1)
+        self.assertEqual(self.daily().page_views, 1)
+
+
+class AnalyticsRollupConcurrencyTests(RollupMixin, TransactionTestCase):
+    """
+    Test cases for overlapping analytics rollups.
+    """
+    
+    def test_held_shard_is_skipped(self):
+        """
+        Test that a run skips the shard another run holds and rolls up the rest.
+        """
+        self.create_store()
+        self.track('page_view')
+        busy = self.rollup.checkpoint_name(self.store.id % 2)
+        RollupCheckpoint.objects.create(name=busy)
+        locked = threading.Event()
+        release = threading.Event()
+        
+        def hold():
+            try:
+                with transaction.atomic():
+                    RollupCheckpoint.objects.select_for_update().get(name=busy)
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+        
+        thread = threading.Thread(target=hold)
+        thread.start()
+        locked.wait(10)
+        try:
+            stats = self.rollup.run()
+        finally:
+            release.set()
+            thread.join()
+        
+        self.assertEqual(stats['skipped'], 1)
+        self.assertFalse(DailyAnalytics.objects.exists())
+        
+        self.assertEqual(self.rollup.run()['events'], 1)
+        self.assertEqual(self.daily().page_views, 1)
@@ -5,19 +5,25 @@ Analytics views for the Fashion Hub project.
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Sum, Count, Avg
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
+import logging
 
 from common.permissions import IsStoreOwnerOrManager
+from stores.models import Store
+from .ingest import event_buffer
 from .models import AnalyticsEvent, DailyAnalytics, ProductPerformance
 from .serializers import (
     AnalyticsEventSerializer, AnalyticsEventCreateSerializer,
     DailyAnalyticsSerializer, ProductPerformanceSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 
 class AnalyticsEventViewSet(viewsets.ModelViewSet):
     """
@@ -55,7 +61,42 @@ class AnalyticsEventViewSet(viewsets.ModelViewSet):
         """
         if self.action == 'create':
             return []  # No permissions required for creating events
+        if self.action == 'ingest_stats':
+            return [IsAuthenticated(), IsAdminUser()]
         return [IsAuthenticated(), IsStoreOwnerOrManager()]
+    
+    def create(self, request, *args, **kwargs):
+        """
+        Buffer an analytics event for a batched database write.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            accepted = event_buffer.append(serializer.get_event())
+        except Exception as e:
+            # Without the buffer, write the event directly
+            logger.warning(f"Redis unavailable, saving analytics event directly: {e}")
+            if not Store.objects.filter(pk=serializer.validated_data['store_id']).exists():
+                return Response({'store': [_('Store not found.')]}, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        
+        if not accepted:
+            return Response(
+                {'detail': _('Too many analytics events, please retry later.')},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.ANALYTICS_RETRY_AFTER)}
+            )
+        
+        return Response(status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path='ingest-stats')
+    def ingest_stats(self, request):
+        """
+        Get analytics ingestion counters and the unflushed backlog.
+        """
+        return Response(event_buffer.get_stats())
 
 
 class DailyAnalyticsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -3,18 +3,40 @@ Elasticsearch integration for the Fashion Hub project.
 """
 
 from django.conf import settings
-from elasticsearch import Elasticsearch
-from elasticsearch.exceptions import NotFoundError
+from elasticsearch import Elasticsearch, helpers
+from elasticsearch.exceptions import BadRequestError, NotFoundError
+import base64
+import json
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 
+class ReindexError(Exception):
+    """
+    Raised when a reindex had too many failures to go live.
+    """
+    
+    def __init__(self, message, stats):
+        super().__init__(message)
+        self.stats = stats
+
+
+class CursorExpiredError(ValueError):
+    """
+    Raised when the point in time behind a search cursor is gone.
+    """
+
+
 class ElasticsearchClient:
     """
     Elasticsearch client for product search and indexing.
     """
     
+    # Source fields needed to render a product listing
+    LISTING_FIELDS = ["id", "name_en", "name_ar", "price", "sale_price", "is_on_sale", "thumbnail"]
+    
     def __init__(self):
         """
         Initialize the Elasticsearch client.
@@ -28,66 +50,177 @@ class ElasticsearchClient:
         )
         self.index_name = settings.ELASTICSEARCH_INDEX
     
-    def create_index(self):
+    def get_index_body(self):
         """
-        Create the product index if it doesn't exist.
+        Get the mapping and settings used for product indices.
         """
-        if not self.es.indices.exists(index=self.index_name):
-            # Define index mapping
-            mapping = {
-                "mappings": {
-                    "properties": {
-                        "id": {"type": "integer"},
-                        "name_en": {"type": "text", "analyzer": "english"},
-                        "name_ar": {"type": "text", "analyzer": "arabic"},
-                        "description_en": {"type": "text", "analyzer": "english"},
-                        "description_ar": {"type": "text", "analyzer": "arabic"},
-                        "price": {"type": "float"},
-                        "sale_price": {"type": "float"},
-                        "is_on_sale": {"type": "boolean"},
-                        "is_active": {"type": "boolean"},
-                        "is_featured": {"type": "boolean"},
-                        "is_new": {"type": "boolean"},
-                        "category_id": {"type": "integer"},
-                        "category_name_en": {"type": "text", "analyzer": "english"},
-                        "category_name_ar": {"type": "text", "analyzer": "arabic"},
-                        "store_id": {"type": "integer"},
-                        "store_name_en": {"type": "text", "analyzer": "english"},
-                        "store_name_ar": {"type": "text", "analyzer": "arabic"},
-                        "search_tags": {"type": "text", "analyzer": "standard"},
-                        "created_at": {"type": "date"},
-                        "updated_at": {"type": "date"}
-                    }
-                },
-                "settings": {
-                    "analysis": {
-                        "analyzer": {
-                            "arabic": {
-                                "type": "custom",
-                                "tokenizer": "standard",
-                                "filter": ["lowercase", "arabic_normalization", "arabic_stemmer"]
-                            }
+        return {
+            "mappings": {
+                "properties": {
+                    "id": {"type": "integer"},
+                    "name_en": {
+                        "type": "text",
+                        "analyzer": "english",
+                        "fields": {"keyword": {"type": "keyword"}}
+                    },
+                    "name_ar": {"type": "text", "analyzer": "arabic"},
+                    "description_en": {"type": "text", "analyzer": "english"},
+                    "description_ar": {"type": "text", "analyzer": "arabic"},
+                    "price": {"type": "float"},
+                    "sale_price": {"type": "float"},
+                    "is_on_sale": {"type": "boolean"},
+                    "is_active": {"type": "boolean"},
+                    "is_featured": {"type": "boolean"},
+                    "is_new": {"type": "boolean"},
+                    "category_id": {"type": "integer"},
+                    "category_name_en": {"type": "text", "analyzer": "english"},
+                    "category_name_ar": {"type": "text", "analyzer": "arabic"},
+                    "store_id": {"type": "integer"},
+                    "store_name_en": {"type": "text", "analyzer": "english"},
+                    "store_name_ar": {"type": "text", "analyzer": "arabic"},
+                    "search_tags": {"type": "text", "analyzer": "standard"},
+                    "thumbnail": {"type": "keyword", "index": False},
+                    "suggest": {
+                        "type": "completion",
+                        "analyzer": "autocomplete",
+                        "contexts": [{"name": "store_id", "type": "category"}]
+                    },
+                    "created_at": {"type": "date"},
+                    "updated_at": {"type": "date"}
+                }
+            },
+            "settings": {
+                "analysis": {
+                    "analyzer": {
+                        "arabic": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "arabic_normalization", "arabic_stemmer"]
                         },
-                        "filter": {
-                            "arabic_stemmer": {
-                                "type": "stemmer",
-                                "language": "arabic"
-                            }
+                        # Unstemmed analyzer shared by English and Arabic suggestions
+                        "autocomplete": {
+                            "type": "custom",
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding", "arabic_normalization"]
+                        }
+                    },
+                    "filter": {
+                        "arabic_stemmer": {
+                            "type": "stemmer",
+                            "language": "arabic"
                         }
                     }
                 }
             }
-            
-            # Create the index
-            self.es.indices.create(index=self.index_name, body=mapping)
-            logger.info(f"Created Elasticsearch index: {self.index_name}")
+        }
     
-    def index_product(self, product):
+    def create_index(self):
         """
-        Index a product in Elasticsearch.
+        Create the product index if it doesn't exist.
+        
+        The configured index name is used as a read alias pointing to a
+        versioned physical index, so it can later be swapped without downtime.
         """
-        # Prepare product data for indexing
-        product_data = {
+        if not self.es.indices.exists(index=self.index_name):
+            index = self.create_versioned_index()
+            self.es.indices.put_alias(index=index, name=self.index_name)
+            logger.info(f"Created Elasticsearch index {index} with alias {self.index_name}")
+    
+    def create_versioned_index(self, bulk_load=False):
+        """
+        Create a new physical product index named after the alias and a timestamp.
+        
+        Args:
+            bulk_load: Disable refresh and replicas for a fast initial load
+        
+        Returns:
+            Name of the new index
+        """
+        index = f"{self.index_name}_v{int(time.time() * 1000)}"
+        body = self.get_index_body()
+        
+        if bulk_load:
+            body["settings"]["index"] = {
+                "refresh_interval": "-1",
+                "number_of_replicas": 0,
+            }
+        else:
+            body["settings"]["index"] = {
+                "number_of_replicas": settings.ELASTICSEARCH_INDEX_REPLICAS,
+            }
+        
+        self.es.indices.create(index=index, body=body)
+        logger.info(f"Created Elasticsearch index: {index}")
+        return index
+    
+    def get_alias_indices(self):
+        """
+        Get the physical indices currently behind the read alias.
+        """
+        if not self.es.indices.exists_alias(name=self.index_name):
+            return []
+        return list(self.es.indices.get_alias(name=self.index_name).keys())
+    
+    def get_versioned_indices(self):
+        """
+        Get all versioned physical indices for the alias, oldest first.
+        """
+        indices = self.es.indices.get(index=f"{self.index_name}_v*")
+        return sorted(indices.keys())
+    
+    def swap_alias(self, new_index):
+        """
+        Atomically point the read alias at a new physical index.
+        """
+        actions = [{"add": {"index": new_index, "alias": self.index_name}}]
+        
+        old_indices = self.get_alias_indices()
+        for index in old_indices:
+            actions.insert(0, {"remove": {"index": index, "alias": self.index_name}})
+        
+        # A legacy concrete index with the alias name has to go in the same call
+        if not old_indices and self.es.indices.exists(index=self.index_name):
+            actions.insert(0, {"remove_index": {"index": self.index_name}})
+        
+        self.es.indices.update_aliases(body={"actions": actions})
+        logger.info(f"Swapped alias {self.index_name} to {new_index}")
+    
+    def cleanup_old_indices(self, keep=None):
+        """
+        Delete old versioned indices that are no longer behind the alias.
+        
+        Args:
+            keep: Number of previous versions to keep for rollback
+        
+        Returns:
+            List of deleted index names
+        """
+        keep = settings.ELASTICSEARCH_KEEP_INDEX_VERSIONS if keep is None else keep
+        live = set(self.get_alias_indices())
+        stale = [index for index in self.get_versioned_indices() if index not in live]
+        
+        to_delete = stale[:-keep] if keep else stale
+        for index in to_delete:
+            self.es.indices.delete(index=index)
+            logger.info(f"Deleted old Elasticsearch index: {index}")
+        
+        return to_delete
+    
+    def prepare_product(self, product):
+        """
+        Build the search document for a product.
+        
+        Args:
+            product: Product instance (ideally with category and store selected
+                and images prefetched)
+        
+        Returns:
+            Document dictionary
+        """
+        images = list(product.images.all())
+        thumbnail = next((image for image in images if image.is_primary), images[0] if images else None)
+        
+        return {
             "id": product.id,
             "name_en": product.name_en,
             "name_ar": product.name_ar,
@@ -106,9 +239,21 @@ class ElasticsearchClient:
             "store_name_en": product.store.name_en,
             "store_name_ar": product.store.name_ar,
             "search_tags": product.search_tags,
+            "thumbnail": thumbnail.image.url if thumbnail and thumbnail.image else None,
+            "suggest": {
+                "input": [value for value in [product.name_en, product.name_ar, *(product.search_tags or [])] if value],
+                "contexts": {"store_id": [str(product.store.id)]}
+            },
             "created_at": product.created_at.isoformat(),
             "updated_at": product.updated_at.isoformat()
         }
+    
+    def index_product(self, product):
+        """
+        Index a product in Elasticsearch.
+        """
+        # Prepare product data for indexing
+        product_data = self.prepare_product(product)
         
         # Index the product
         self.es.index(index=self.index_name, id=product.id, body=product_data)
@@ -117,15 +262,55 @@ class ElasticsearchClient:
     def update_product(self, product):
         """
         Update a product in Elasticsearch.
+        
+        Indexing a document replaces any existing version, so no lookup
+        is needed first.
         """
-        # Check if product exists
-        try:
-            self.es.get(index=self.index_name, id=product.id)
-            # Product exists, update it
-            self.index_product(product)
-        except NotFoundError:
-            # Product doesn't exist, index it
-            self.index_product(product)
+        self.index_product(product)
+    
+    def sync_products(self, product_ids):
+        """
+        Bring the index in line with the database for a set of products
+        using a single bulk request.
+        
+        Active products are (re)indexed; products that are inactive or no
+        longer exist are removed from the index.
+        
+        Args:
+            product_ids: Iterable of product IDs
+        
+        Returns:
+            Tuple of (number of successful actions, list of errors)
+        """
+        from products.models import Product
+        
+        product_ids = set(product_ids)
+        if not product_ids:
+            return 0, []
+        
+        products = list(
+            Product.objects.filter(id__in=product_ids, is_active=True)
+            .select_related('category', 'store')
+            .prefetch_related('images')
+        )
+        actions = list(self.generate_product_actions(products))
+        
+        indexed_ids = {product.id for product in products}
+        for product_id in product_ids - indexed_ids:
+            actions.append({"_op_type": "delete", "_index": self.index_name, "_id": product_id})
+        
+        success, errors = helpers.bulk(self.es, actions, raise_on_error=False, raise_on_exception=False)
+        
+        # Deleting a document that was never indexed is not an error
+        errors = [
+            error for error in errors
+            if error.get("delete", {}).get("status") != 404
+        ]
+        for error in errors:
+            logger.error(f"Failed to sync product in Elasticsearch: {error}")
+        
+        logger.info(f"Synced {len(product_ids)} products in Elasticsearch")
+        return success, errors
     
     def delete_product(self, product_id):
         """
@@ -137,11 +322,14 @@ class ElasticsearchClient:
         except NotFoundError:
             logger.warning(f"Product {product_id} not found in Elasticsearch")
     
-    def search_products(self, query, store_id=None, category_id=None, filters=None, sort=None, page=1, size=20):
+    def build_search_query(self, query, store_id=None, category_id=None, filters=None, include_facet_filters=True):
         """
-        Search for products in Elasticsearch.
+        Build the bool query used for product search.
+        
+        Args:
+            include_facet_filters: Apply category, flag and price filters in
+                the query itself. Faceted searches apply them as a post filter.
         """
-        # Build search query
         search_query = {
             "bool": {
                 "must": [
@@ -166,24 +354,112 @@ class ElasticsearchClient:
         if store_id:
             search_query["bool"]["filter"].append({"term": {"store_id": store_id}})
         
+        if include_facet_filters:
+            for clauses in self.build_facet_filters(category_id, filters).values():
+                search_query["bool"]["filter"].extend(clauses)
+        
+        return search_query
+    
+    def build_facet_filters(self, category_id=None, filters=None):
+        """
+        Build the filter clauses that double as facets, keyed by facet name.
+        """
+        facet_filters = {"category": [], "is_featured": [], "is_new": [], "is_on_sale": [], "price": []}
+        
         # Add category filter
         if category_id:
-            search_query["bool"]["filter"].append({"term": {"category_id": category_id}})
+            facet_filters["category"].append({"term": {"category_id": category_id}})
         
         # Add additional filters
         if filters:
-            if "is_featured" in filters:
-                search_query["bool"]["filter"].append({"term": {"is_featured": filters["is_featured"]}})
-            if "is_new" in filters:
-                search_query["bool"]["filter"].append({"term": {"is_new": filters["is_new"]}})
-            if "is_on_sale" in filters:
-                search_query["bool"]["filter"].append({"term": {"is_on_sale": filters["is_on_sale"]}})
+            for flag in ["is_featured", "is_new", "is_on_sale"]:
+                if flag in filters:
+                    facet_filters[flag].append({"term": {flag: filters[flag]}})
             if "price_min" in filters:
-                search_query["bool"]["filter"].append({"range": {"price": {"gte": filters["price_min"]}}})
+                facet_filters["price"].append({"range": {"price": {"gte": filters["price_min"]}}})
             if "price_max" in filters:
-                search_query["bool"]["filter"].append({"range": {"price": {"lte": filters["price_max"]}}})
+                facet_filters["price"].append({"range": {"price": {"lte": filters["price_max"]}}})
+        
+        return facet_filters
+    
+    def build_facet_aggregations(self, facet_filters, include_stores=False, price_interval=None):
+        """
+        Build post-filtered facet aggregations.
         
-        # Build sort options
+        Each facet is computed with every active filter except its own, so
+        selecting a category still shows counts for the other categories.
+        """
+        price_interval = price_interval or settings.SEARCH_FACET_PRICE_INTERVAL
+        
+        def other_filters(*exclude):
+            clauses = []
+            for name, facet_clauses in facet_filters.items():
+                if name not in exclude:
+                    clauses.extend(facet_clauses)
+            return {"bool": {"filter": clauses}}
+        
+        aggregations = {
+            "categories": {
+                "filter": other_filters("category"),
+                "aggs": {"values": {"terms": {"field": "category_id", "size": settings.SEARCH_FACET_SIZE}}}
+            },
+            "price": {
+                "filter": other_filters("price"),
+                "aggs": {
+                    "stats": {"stats": {"field": "price"}},
+                    "histogram": {"histogram": {"field": "price", "interval": price_interval, "min_doc_count": 1}}
+                }
+            },
+        }
+        
+        for flag in ["is_on_sale", "is_new", "is_featured"]:
+            aggregations[flag] = {
+                "filter": other_filters(flag),
+                "aggs": {"values": {"filter": {"term": {flag: True}}}}
+            }
+        
+        if include_stores:
+            aggregations["stores"] = {
+                "filter": other_filters(),
+                "aggs": {"values": {"terms": {"field": "store_id", "size": settings.SEARCH_FACET_SIZE}}}
+            }
+        
+        return aggregations
+    
+    def _process_facets(self, aggregations):
+        """
+        Convert facet aggregation results into a compact dictionary.
+        """
+        facets = {
+            "categories": [
+                {"id": bucket["key"], "count": bucket["doc_count"]}
+                for bucket in aggregations["categories"]["values"]["buckets"]
+            ],
+            "price": {
+                "stats": aggregations["price"]["stats"],
+                "histogram": [
+                    {"from": bucket["key"], "count": bucket["doc_count"]}
+                    for bucket in aggregations["price"]["histogram"]["buckets"]
+                ]
+            },
+            "flags": {
+                flag: aggregations[flag]["values"]["doc_count"]
+                for flag in ["is_on_sale", "is_new", "is_featured"]
+            },
+        }
+        
+        if "stores" in aggregations:
+            facets["stores"] = [
+                {"id": bucket["key"], "count": bucket["doc_count"]}
+                for bucket in aggregations["stores"]["values"]["buckets"]
+            ]
+        
+        return facets
+    
+    def build_sort(self, sort=None):
+        """
+        Build the sort options for a sort key.
+        """
         sort_options = []
         if sort:
             if sort == "price_asc":
@@ -198,10 +474,53 @@ class ElasticsearchClient:
                 sort_options.append({"name_en.keyword": {"order": "asc"}})
             elif sort == "name_desc":
                 sort_options.append({"name_en.keyword": {"order": "desc"}})
-        else:
+        
+        if not sort_options:
             # Default sort by relevance
             sort_options.append("_score")
         
+        return sort_options
+    
+    def search_products(self, query, store_id=None, category_id=None, filters=None, sort=None, page=1, size=20,
+                        fields=None, cursor=None, use_cursor=False, facets=False):
+        """
+        Search for products in Elasticsearch.
+        
+        Args:
+            query: Search text
+            store_id: Restrict results to a store (optional)
+            category_id: Restrict results to a category (optional)
+            filters: Dictionary of additional filters (optional)
+            sort: Sort key (optional, defaults to relevance)
+            page: Page number for offset pagination
+            size: Number of results per page
+            fields: List of source fields to return (optional, e.g. LISTING_FIELDS)
+            cursor: Cursor returned by a previous cursor-mode search
+            use_cursor: Start a cursor-mode search when no cursor is given
+            facets: Also return category, price, flag and (for cross-store
+                searches) store facets in the same request
+        
+        Returns:
+            Dictionary with products and pagination details. Cursor-mode
+            results include a next_cursor instead of page numbers.
+        """
+        sort_options = self.build_sort(sort)
+        extra_body = {}
+        
+        if facets:
+            # Facet filters go in a post filter so aggregations see all matches
+            search_query = self.build_search_query(query, store_id, include_facet_filters=False)
+            facet_filters = self.build_facet_filters(category_id, filters)
+            extra_body["post_filter"] = {
+                "bool": {"filter": [clause for clauses in facet_filters.values() for clause in clauses]}
+            }
+            extra_body["aggs"] = self.build_facet_aggregations(facet_filters, include_stores=not store_id)
+        else:
+            search_query = self.build_search_query(query, store_id, category_id, filters)
+        
+        if cursor or use_cursor:
+            return self._search_with_cursor(search_query, sort_options, size, fields, cursor, extra_body)
+        
         # Calculate pagination
         from_value = (page - 1) * size
         
@@ -210,48 +529,371 @@ class ElasticsearchClient:
             "query": search_query,
             "sort": sort_options,
             "from": from_value,
-            "size": size
+            "size": size,
+            **extra_body
         }
+        if fields:
+            search_body["_source"] = list(fields)
         
         result = self.es.search(index=self.index_name, body=search_body)
         
         # Process results
-        hits = result["hits"]["hits"]
         total = result["hits"]["total"]["value"]
+        products = self._process_hits(result["hits"]["hits"])
         
-        products = []
-        for hit in hits:
-            product_data = hit["_source"]
-            product_data["score"] = hit["_score"]
-            products.append(product_data)
-        
-        return {
+        response = {
             "products": products,
             "total": total,
             "page": page,
             "size": size,
             "pages": (total + size - 1) // size
         }
+        if "aggregations" in result:
+            response["facets"] = self._process_facets(result["aggregations"])
+        
+        return response
     
-    def reindex_all_products(self):
+    def _search_with_cursor(self, search_query, sort_options, size, fields, cursor, extra_body=None):
         """
-        Reindex all products in Elasticsearch.
+        Run a search_after query inside a point in time.
+        
+        Raises:
+            CursorExpiredError: If the cursor's point in time no longer exists
         """
-        from products.models import Product
+        keep_alive = settings.ELASTICSEARCH_PIT_KEEP_ALIVE
+        
+        if cursor:
+            state = self.decode_cursor(cursor)
+            pit_id = state["pit"]
+            search_after = state["after"]
+        else:
+            pit_id = self.es.open_point_in_time(index=self.index_name, keep_alive=keep_alive)["id"]
+            search_after = None
+        
+        search_body = {
+            "query": search_query,
+            # The shard doc tiebreaker keeps the ordering total within the PIT
+            "sort": sort_options + [{"_shard_doc": "asc"}],
+            "size": size,
+            "pit": {"id": pit_id, "keep_alive": keep_alive},
+            # Only count hits for the first page
+            "track_total_hits": search_after is None,
+        }
+        if search_after:
+            search_body["search_after"] = search_after
+            # Facets only change with the query, so skip them after the first page
+            search_body.update({key: value for key, value in (extra_body or {}).items() if key != "aggs"})
+        else:
+            search_body.update(extra_body or {})
+        if fields:
+            search_body["_source"] = list(fields)
+        
+        try:
+            result = self.es.search(body=search_body)
+        except (NotFoundError, BadRequestError) as e:
+            if not cursor:
+                raise
+            # The point in time expired or was closed; the client must restart
+            raise CursorExpiredError("Search cursor expired") from e
+        
+        hits = result["hits"]["hits"]
+        pit_id = result.get("pit_id", pit_id)
+        total = result["hits"]["total"]["value"] if search_after is None else None
+        
+        if len(hits) < size:
+            # Last page, release the point in time
+            self.es.close_point_in_time(body={"id": pit_id})
+            next_cursor = None
+        else:
+            next_cursor = self.encode_cursor({"pit": pit_id, "after": hits[-1]["sort"]})
+        
+        response = {
+            "products": self._process_hits(hits),
+            "total": total,
+            "size": size,
+            "next_cursor": next_cursor
+        }
+        if "aggregations" in result:
+            response["facets"] = self._process_facets(result["aggregations"])
+        
+        return response
+    
+    def suggest_products(self, prefix, store_id=None, size=None):
+        """
+        Get type-ahead suggestions for a search prefix.
         
-        # Delete the index if it exists
-        if self.es.indices.exists(index=self.index_name):
-            self.es.indices.delete(index=self.index_name)
-            logger.info(f"Deleted Elasticsearch index: {self.index_name}")
+        Suggestions come from the completion suggester and are cached in
+        Redis for a short time, since hot prefixes repeat across visitors.
         
-        # Create the index
-        self.create_index()
+        Args:
+            prefix: Text typed so far
+            store_id: Restrict suggestions to a store (optional)
+            size: Maximum number of suggestions
         
-        # Get all active products
-        products = Product.objects.filter(is_active=True)
+        Returns:
+            List of suggestion dictionaries
+        """
+        from .redis_client import get_redis_client
+        
+        size = size or settings.SEARCH_SUGGEST_SIZE
+        prefix = " ".join(prefix.lower().split())[:50]
+        if not prefix:
+            return []
+        
+        cache_key = f"search:suggest:{store_id or 'all'}:{size}:{prefix}"
+        try:
+            redis_client = get_redis_client()
+            cached = redis_client.get_cache(cache_key)
+            if cached is not None:
+                return cached
+        except Exception:
+            # Suggestions still work without the cache
+            redis_client = None
+            logger.warning("Redis unavailable, serving suggestions without cache")
+        
+        completion = {"field": "suggest", "size": size, "skip_duplicates": True}
+        if store_id:
+            completion["contexts"] = {"store_id": [str(store_id)]}
+        
+        result = self.es.search(index=self.index_name, body={
+            "_source": ["id", "name_en", "name_ar", "thumbnail"],
+            "suggest": {"products": {"prefix": prefix, "completion": completion}}
+        })
+        
+        suggestions = []
+        for option in result["suggest"]["products"][0]["options"]:
+            suggestions.append({
+                "text": option["text"],
+                "id": option["_source"]["id"],
+                "name_en": option["_source"]["name_en"],
+                "name_ar": option["_source"]["name_ar"],
+                "thumbnail": option["_source"].get("thumbnail"),
+            })
         
-        # Index each product
+        if redis_client:
+            try:
+                redis_client.set_cache(cache_key, suggestions, timeout=settings.SEARCH_SUGGEST_CACHE_TIMEOUT)
+            except Exception:
+                logger.warning("Redis unavailable, suggestions not cached")
+        
+        return suggestions
+    
+    def close_cursor(self, cursor):
+        """
+        Release the point in time behind a cursor the client stopped paging.
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        state = self.decode_cursor(cursor)
+        try:
+            self.es.close_point_in_time(body={"id": state["pit"]})
+        except NotFoundError:
+            # Already expired
+            pass
+    
+    def _process_hits(self, hits):
+        """
+        Convert search hits into product dictionaries.
+        """
+        products = []
+        for hit in hits:
+            product_data = hit["_source"]
+            product_data["score"] = hit["_score"]
+            products.append(product_data)
+        return products
+    
+    @staticmethod
+    def encode_cursor(state):
+        """
+        Encode cursor state into an opaque URL-safe string.
+        """
+        return base64.urlsafe_b64encode(json.dumps(state).encode('utf-8')).decode('ascii')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Decode a cursor string produced by encode_cursor.
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return {"pit": state["pit"], "after": state["after"]}
+        except (ValueError, TypeError, KeyError) as e:
+            raise ValueError("Invalid search cursor") from e
+    
+    def generate_product_actions(self, products, index=None):
+        """
+        Yield bulk index actions for an iterable of products.
+        
+        Args:
+            products: Iterable of Product instances
+            index: Target index name (default: the configured index)
+        """
+        index = index or self.index_name
         for product in products:
-            self.index_product(product)
+            yield {
+                "_op_type": "index",
+                "_index": index,
+                "_id": product.id,
+                "_source": self.prepare_product(product),
+            }
+    
+    def bulk_index(self, products, index=None, chunk_size=None, parallel=False,
+                   thread_count=None, progress_callback=None, progress_every=None):
+        """
+        Stream products into Elasticsearch through the bulk API.
         
-        logger.info(f"Reindexed {products.count()} products in Elasticsearch")
+        Args:
+            products: Iterable of Product instances
+            index: Target index name (default: the configured index)
+            chunk_size: Number of documents per bulk request
+            parallel: Use parallel_bulk instead of streaming_bulk
+            thread_count: Number of threads for parallel_bulk
+            progress_callback: Callable receiving a stats dict while indexing
+            progress_every: Report progress every N documents
+        
+        Returns:
+            Stats dictionary with indexed/failed counts, elapsed time and rate
+        """
+        chunk_size = chunk_size or settings.ELASTICSEARCH_BULK_CHUNK_SIZE
+        progress_every = progress_every or chunk_size * 10
+        actions = self.generate_product_actions(products, index=index)
+        
+        if parallel:
+            results = helpers.parallel_bulk(
+                self.es,
+                actions,
+                thread_count=thread_count or settings.ELASTICSEARCH_BULK_THREADS,
+                chunk_size=chunk_size,
+                raise_on_error=False,
+                raise_on_exception=False,
+            )
+        else:
+            results = helpers.streaming_bulk(
+                self.es,
+                actions,
+                chunk_size=chunk_size,
+                max_retries=settings.ELASTICSEARCH_BULK_MAX_RETRIES,
+                raise_on_error=False,
+                raise_on_exception=False,
+            )
+        
+        stats = {"indexed": 0, "failed": 0, "errors": [], "elapsed": 0.0, "rate": 0.0}
+        started = time.monotonic()
+        
+        for ok, item in results:
+            if ok:
+                stats["indexed"] += 1
+            else:
+                stats["failed"] += 1
+                # Keep a bounded sample of errors for reporting
+                if len(stats["errors"]) < 100:
+                    stats["errors"].append(item)
+                logger.error(f"Failed to index document: {item}")
+            
+            processed = stats["indexed"] + stats["failed"]
+            if processed % progress_every == 0:
+                self._update_bulk_stats(stats, started)
+                logger.info(
+                    f"Bulk indexed {processed} products "
+                    f"({stats['rate']:.0f} docs/s, {stats['failed']} failed)"
+                )
+                if progress_callback:
+                    progress_callback(stats)
+        
+        self._update_bulk_stats(stats, started)
+        if progress_callback:
+            progress_callback(stats)
+        
+        return stats
+    
+    def _update_bulk_stats(self, stats, started):
+        """
+        Refresh the elapsed time and throughput of a bulk stats dictionary.
+        """
+        stats["elapsed"] = time.monotonic() - started
+        processed = stats["indexed"] + stats["failed"]
+        stats["rate"] = processed / stats["elapsed"] if stats["elapsed"] else 0.0
+    
+    def get_reindex_queryset(self):
+        """
+        Get the queryset of products to include in a full reindex.
+        """
+        from products.models import Product
+        
+        return (
+            Product.objects.filter(is_active=True)
+            .select_related('category', 'store')
+            .prefetch_related('images')
+            .order_by('id')
+        )
+    
+    def reindex_all_products(self, chunk_size=None, parallel=False, thread_count=None, progress_callback=None):
+        """
+        Reindex all products in Elasticsearch.
+        
+        Products are streamed from the database into a new versioned index
+        through the bulk API. The read alias is swapped to the new index
+        only once it is fully built, and old versions are cleaned up. If
+        more than ELASTICSEARCH_REINDEX_MAX_FAILURES documents fail, the new
+        index is deleted and the alias keeps pointing at the old one.
+        
+        Returns:
+            Stats dictionary (see bulk_index)
+        
+        Raises:
+            ReindexError: If too many documents failed to index
+        """
+        chunk_size = chunk_size or settings.ELASTICSEARCH_BULK_CHUNK_SIZE
+        
+        # Build a new physical index while the alias keeps serving searches
+        new_index = self.create_versioned_index(bulk_load=True)
+        
+        # Stream active products without caching the whole queryset
+        products = self.get_reindex_queryset().iterator(chunk_size=chunk_size)
+        
+        try:
+            stats = self.bulk_index(
+                products,
+                index=new_index,
+                chunk_size=chunk_size,
+                parallel=parallel,
+                thread_count=thread_count,
+                progress_callback=progress_callback,
+            )
+        except Exception:
+            self.es.indices.delete(index=new_index)
+            logger.exception(f"Reindex into {new_index} failed, index deleted")
+            raise
+        
+        stats["index"] = new_index
+        
+        # A partial index must never replace the live one
+        if stats["failed"] > settings.ELASTICSEARCH_REINDEX_MAX_FAILURES:
+            self.es.indices.delete(index=new_index)
+            logger.error(
+                f"Reindex into {new_index} had {stats['failed']} failures, "
+                f"index deleted and alias left unchanged"
+            )
+            raise ReindexError(f"Reindex failed for {stats['failed']} products", stats)
+        
+        # Restore search settings before the index goes live
+        self.es.indices.put_settings(index=new_index, body={
+            "index": {
+                "refresh_interval": settings.ELASTICSEARCH_REFRESH_INTERVAL,
+                "number_of_replicas": settings.ELASTICSEARCH_INDEX_REPLICAS,
+            }
+        })
+        self.es.indices.refresh(index=new_index)
+        
+        self.swap_alias(new_index)
+        self.cleanup_old_indices()
+        
+        logger.info(
+            f"Reindexed {stats['indexed']} products into {new_index} "
+            f"in {stats['elapsed']:.1f}s ({stats['rate']:.0f} docs/s, {stats['failed']} failed)"
+        )
+        return stats
@@ -0,0 +1,45 @@
+"""
+Management command to rebuild the product search index.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.elasticsearch import ElasticsearchClient, ReindexError
+
+
+class Command(BaseCommand):
+    help = "Reindex all active products in Elasticsearch using the bulk API."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=None, help="Documents per bulk request")
+        parser.add_argument('--parallel', action='store_true', help="Use parallel bulk indexing")
+        parser.add_argument('--threads', type=int, default=None, help="Threads for parallel bulk indexing")
+    
+    def handle(self, *args, **options):
+        client = ElasticsearchClient()
+        
+        def report(stats):
+            self.stdout.write(
+                f"Indexed {stats['indexed']} products, {stats['failed']} failed "
+                f"({stats['rate']:.0f} docs/s, {stats['elapsed']:.1f}s)"
+            )
+        
+        try:
+            stats = client.reindex_all_products(
+                chunk_size=options['chunk_size'],
+                parallel=options['parallel'],
+                thread_count=options['threads'],
+                progress_callback=report,
+            )
+        except ReindexError as e:
+            for error in e.stats['errors']:
+                self.stderr.write(str(error))
+            raise CommandError(f"{e}; the live index was left unchanged.")
+        
+        for error in stats['errors']:
+            self.stderr.write(str(error))
+        
+        if stats['failed']:
+            self.stdout.write(self.style.WARNING(f"Reindex finished with {stats['failed']} failures."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Reindexed {stats['indexed']} products."))
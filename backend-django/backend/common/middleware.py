@@ -1,7 +1,8 @@
 from django.utils.deprecation import MiddlewareMixin
-from stores.models import Store
 from django.contrib.auth import get_user_model
 
+from .tenant_cache import tenant_cache
+
 User = get_user_model()
 
 class TenantMiddleware(MiddlewareMixin):
@@ -9,14 +10,11 @@ class TenantMiddleware(MiddlewareMixin):
     Middleware to set request.tenant based on the domain or authenticated user's store.
     """
     def process_request(self, request):
-        # Try to get tenant by domain (Host header)
-        host = request.get_host().split(':')[0]
-        try:
-            store = Store.objects.get(domains__domain=host)
+        # Try to get tenant by domain (Host header), cached per process and in Redis
+        store = tenant_cache.get_store(request.get_host())
+        if store is not None:
             request.tenant = store
             return
-        except Store.DoesNotExist:
-            pass
         # Fallback: if user is authenticated, use their store
         user = getattr(request, 'user', None)
         if user and user.is_authenticated and hasattr(user, 'store'):
@@ -0,0 +1,51 @@
+"""
+Pagination classes for the Fashion Hub project.
+"""
+
+from django.conf import settings
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    """
+    Default keyset pagination ordered on (created_at, id).
+    
+    Pages are fetched with an indexed range scan instead of an OFFSET, so
+    deep pages cost the same as the first one and rows inserted while a
+    client pages through a list are neither skipped nor repeated.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+    
+    def get_ordering(self, request, queryset, view):
+        """
+        Get the ordering, ending in a unique key.
+        
+        The cursor stores the first ordering value and an offset into the
+        rows sharing it. Client orderings such as ?ordering=-price are
+        given an id tiebreaker, so rows with equal values keep the same
+        order between requests and are neither skipped nor repeated.
+        """
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            direction = '-' if ordering[-1].startswith('-') else ''
+            ordering += (f'{direction}id',)
+        return ordering
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """
+    Offset pagination for endpoints that need page numbers and a total count.
+    
+    Opt in per viewset with pagination_class; deep pages get slower as the
+    table grows.
+    """
+    page_size_query_param = 'page_size'
+    
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
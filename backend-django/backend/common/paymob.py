@@ -3,96 +3,170 @@ Paymob integration for the Fashion Hub project.
 """
 
 from django.conf import settings
-import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import asyncio
+import hashlib
+import hmac
+import httpx
 import json
 import logging
+import requests
+import threading
 import uuid
 
+from .redis_client import get_redis_client
+
 logger = logging.getLogger(__name__)
 
+# Gateway responses worth retrying. POSTs are only retried when the
+# connection failed before the request was sent, so a retry can never
+# register the same Paymob order twice.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Process-wide keep-alive session, created on first use
+_session = None
+_session_lock = threading.Lock()
 
-class PaymobClient:
+
+class PaymobError(Exception):
     """
-    Paymob client for payment processing.
+    Raised when a Paymob request fails or returns an unusable response.
+    """
+    
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_session():
+    """
+    Get the HTTP session shared by every PaymobClient in this process.
+    """
+    global _session
+    
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.PAYMOB_MAX_RETRIES,
+                    backoff_factor=settings.PAYMOB_RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.PAYMOB_POOL_SIZE,
+                    max_retries=retry
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+class BasePaymobClient:
+    """
+    Request payloads and auth token caching shared by the Paymob clients.
+    
+    Auth tokens are cached in Redis so every worker reuses one token until
+    shortly before Paymob expires it, instead of authenticating on each
+    payment.
     """
     
-    def __init__(self):
+    def __init__(self, redis_client=None):
         """
         Initialize the Paymob client.
+        
+        Args:
+            redis_client: Redis client (default: the shared client)
         """
         self.api_key = settings.PAYMOB_API_KEY
         self.integration_id = settings.PAYMOB_INTEGRATION_ID
         self.iframe_id = settings.PAYMOB_IFRAME_ID
         self.hmac_secret = settings.PAYMOB_HMAC_SECRET
-        self.base_url = "https://accept.paymob.com/api"
+        self.base_url = settings.PAYMOB_BASE_URL.rstrip('/')
+        self.connect_timeout = settings.PAYMOB_CONNECT_TIMEOUT
+        self.read_timeout = settings.PAYMOB_READ_TIMEOUT
         self.auth_token = None
+        self._redis_client = redis_client
     
-    def authenticate(self):
-        """
-        Authenticate with Paymob API and get auth token.
-        """
-        url = f"{self.base_url}/auth/tokens"
-        payload = {"api_key": self.api_key}
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
-        self.auth_token = data.get("token")
-        
-        return self.auth_token
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = get_redis_client()
+        return self._redis_client
     
-    def register_order(self, amount_cents, currency="EGP", items=None):
+    @property
+    def token_cache_key(self):
+        # Keyed by API key so a rotated key never reuses an old token
+        digest = hashlib.sha256(str(self.api_key).encode('utf-8')).hexdigest()[:16]
+        return f"paymob:auth_token:{digest}"
+    
+    def _get_cached_token(self):
+        try:
+            return self.redis_client.redis.get(self.token_cache_key)
+        except Exception as e:
+            logger.warning(f"Redis unavailable, authenticating with Paymob: {e}")
+            return None
+    
+    def _cache_token(self, token):
+        self.auth_token = token
+        try:
+            self.redis_client.redis.set(self.token_cache_key, token, ex=settings.PAYMOB_AUTH_TOKEN_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Redis unavailable, Paymob auth token not cached: {e}")
+    
+    def forget_token(self):
         """
-        Register an order with Paymob.
-        
-        Args:
-            amount_cents: Amount in cents
-            currency: Currency code (default: EGP)
-            items: List of order items (optional)
-            
-        Returns:
-            Order ID from Paymob
+        Drop the cached auth token, e.g. after Paymob rejected it.
         """
-        if not self.auth_token:
-            self.authenticate()
-        
-        url = f"{self.base_url}/ecommerce/orders"
-        
-        payload = {
-            "auth_token": self.auth_token,
+        self.auth_token = None
+        try:
+            self.redis_client.redis.delete(self.token_cache_key)
+        except Exception as e:
+            logger.warning(f"Redis unavailable, Paymob auth token not cleared: {e}")
+    
+    def _url(self, path):
+        return f"{self.base_url}/{path}"
+    
+    @staticmethod
+    def _json(response, path):
+        # An HTML error page or an empty body is a failed request too
+        try:
+            data = response.json()
+        except ValueError as e:
+            raise PaymobError(
+                f"Paymob request to {path} returned an invalid response",
+                status_code=response.status_code
+            ) from e
+        
+        if not isinstance(data, dict):
+            raise PaymobError(
+                f"Paymob request to {path} returned an invalid response",
+                status_code=response.status_code
+            )
+        
+        return data
+    
+    @staticmethod
+    def _require(data, field, message):
+        value = data.get(field)
+        if not value:
+            raise PaymobError(message)
+        return value
+    
+    @staticmethod
+    def _order_payload(amount_cents, currency, items):
+        return {
             "delivery_needed": "false",
             "amount_cents": amount_cents,
             "currency": currency,
             "items": items or []
         }
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
-        order_id = data.get("id")
-        
-        return order_id
     
-    def get_payment_key(self, order_id, amount_cents, currency="EGP", billing_data=None):
-        """
-        Get a payment key for processing a payment.
-        
-        Args:
-            order_id: Paymob order ID
-            amount_cents: Amount in cents
-            currency: Currency code (default: EGP)
-            billing_data: Customer billing data
-            
-        Returns:
-            Payment key
-        """
-        if not self.auth_token:
-            self.authenticate()
-        
-        url = f"{self.base_url}/acceptance/payment_keys"
-        
+    def _payment_key_payload(self, order_id, amount_cents, currency, billing_data):
         # Default billing data if not provided
         if not billing_data:
             billing_data = {
@@ -111,8 +185,7 @@ class PaymobClient:
                 "state": "NA"
             }
         
-        payload = {
-            "auth_token": self.auth_token,
+        return {
             "amount_cents": amount_cents,
             "expiration": 3600,
             "order_id": order_id,
@@ -120,14 +193,18 @@ class PaymobClient:
             "currency": currency,
             "integration_id": self.integration_id
         }
+    
+    @staticmethod
+    def _refund_payload(transaction_id, amount_cents, reason=None):
+        payload = {
+            "transaction_id": transaction_id,
+            "amount_cents": amount_cents
+        }
         
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
-        payment_key = data.get("token")
+        if reason:
+            payload["reason"] = reason
         
-        return payment_key
+        return payload
     
     def get_payment_url(self, payment_key):
         """
@@ -135,11 +212,149 @@ class PaymobClient:
         
         Args:
             payment_key: Payment key
-            
+        
         Returns:
             Payment URL
         """
-        return f"https://accept.paymob.com/api/acceptance/iframes/{self.iframe_id}?payment_token={payment_key}"
+        return f"{self.base_url}/acceptance/iframes/{self.iframe_id}?payment_token={payment_key}"
+    
+    def verify_webhook_signature(self, request_data, hmac_header):
+        """
+        Verify the HMAC signature of a webhook request.
+        
+        Args:
+            request_data: Request data as a dictionary
+            hmac_header: HMAC header from the request
+        
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        if not self.hmac_secret:
+            logger.warning("HMAC secret not configured, skipping signature verification")
+            return True
+        
+        if not hmac_header:
+            return False
+        
+        # Convert request data to string and sort keys
+        data_string = json.dumps(request_data, sort_keys=True).encode('utf-8')
+        
+        # Calculate HMAC
+        calculated_hmac = hmac.new(
+            self.hmac_secret.encode('utf-8'),
+            data_string,
+            hashlib.sha512
+        ).hexdigest()
+        
+        return hmac.compare_digest(calculated_hmac, hmac_header)
+
+
+class PaymobClient(BasePaymobClient):
+    """
+    Paymob client for payment processing.
+    
+    Requests go through a pooled keep-alive session with connect and read
+    timeouts, and are retried with backoff when it is safe to do so.
+    """
+    
+    def __init__(self, redis_client=None, session=None):
+        """
+        Initialize the Paymob client.
+        
+        Args:
+            redis_client: Redis client (default: the shared client)
+            session: requests session (default: the shared session)
+        """
+        super().__init__(redis_client)
+        self.session = session or get_session()
+    
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(
+                method,
+                self._url(path),
+                timeout=(self.connect_timeout, self.read_timeout),
+                **kwargs
+            )
+        except requests.RequestException as e:
+            raise PaymobError(f"Paymob request to {path} failed: {e}") from e
+        
+        if response.status_code >= 400:
+            raise PaymobError(
+                f"Paymob request to {path} returned {response.status_code}",
+                status_code=response.status_code
+            )
+        
+        return self._json(response, path)
+    
+    def _authorized(self, method, path, payload=None):
+        # POST bodies carry the token as auth_token, GETs as a token param
+        def send(token):
+            if method == 'GET':
+                return self._request(method, path, params={"token": token})
+            return self._request(method, path, json={**payload, "auth_token": token})
+        
+        try:
+            return send(self.get_auth_token())
+        except PaymobError as e:
+            if e.status_code != 401:
+                raise
+            # The cached token expired early; authenticate once more
+            self.forget_token()
+            return send(self.get_auth_token())
+    
+    def authenticate(self):
+        """
+        Authenticate with Paymob API and get auth token.
+        """
+        data = self._request('POST', 'auth/tokens', json={"api_key": self.api_key})
+        token = self._require(data, "token", "Failed to authenticate with Paymob")
+        self._cache_token(token)
+        
+        return token
+    
+    def get_auth_token(self):
+        """
+        Get an auth token, reusing the cached one while it is valid.
+        """
+        if not self.auth_token:
+            self.auth_token = self._get_cached_token()
+        
+        return self.auth_token or self.authenticate()
+    
+    def register_order(self, amount_cents, currency="EGP", items=None):
+        """
+        Register an order with Paymob.
+        
+        Args:
+            amount_cents: Amount in cents
+            currency: Currency code (default: EGP)
+            items: List of order items (optional)
+        
+        Returns:
+            Order ID from Paymob
+        """
+        data = self._authorized('POST', 'ecommerce/orders', self._order_payload(amount_cents, currency, items))
+        
+        return self._require(data, "id", "Failed to register order with Paymob")
+    
+    def get_payment_key(self, order_id, amount_cents, currency="EGP", billing_data=None):
+        """
+        Get a payment key for processing a payment.
+        
+        Args:
+            order_id: Paymob order ID
+            amount_cents: Amount in cents
+            currency: Currency code (default: EGP)
+            billing_data: Customer billing data
+        
+        Returns:
+            Payment key
+        """
+        payload = self._payment_key_payload(order_id, amount_cents, currency, billing_data)
+        data = self._authorized('POST', 'acceptance/payment_keys', payload)
+        
+        return self._require(data, "token", "Failed to generate payment key with Paymob")
     
     def process_payment(self, amount_cents, order_items, customer_data, currency="EGP"):
         """
@@ -150,30 +365,21 @@ class PaymobClient:
             order_items: List of order items
             customer_data: Customer billing data
             currency: Currency code (default: EGP)
-            
+        
         Returns:
             Payment URL and payment reference
         """
         # Generate a unique payment reference
         payment_reference = f"PAY-{uuid.uuid4().hex[:8].upper()}"
         
-        # Step 1: Authenticate
-        self.authenticate()
-        
-        # Step 2: Register order
         order_id = self.register_order(amount_cents, currency, order_items)
-        
-        # Step 3: Get payment key
         payment_key = self.get_payment_key(order_id, amount_cents, currency, customer_data)
         
-        # Step 4: Get payment URL
-        payment_url = self.get_payment_url(payment_key)
-        
         return {
             "payment_reference": payment_reference,
             "order_id": order_id,
             "payment_key": payment_key,
-            "payment_url": payment_url
+            "payment_url": self.get_payment_url(payment_key)
         }
     
     def verify_transaction(self, transaction_id):
@@ -182,19 +388,11 @@ class PaymobClient:
         
         Args:
             transaction_id: Transaction ID
-            
+        
         Returns:
             Transaction data
         """
-        if not self.auth_token:
-            self.authenticate()
-        
-        url = f"{self.base_url}/acceptance/transactions/{transaction_id}"
-        
-        response = requests.get(url, params={"token": self.auth_token})
-        response.raise_for_status()
-        
-        return response.json()
+        return self._authorized('GET', f"acceptance/transactions/{transaction_id}")
     
     def refund_transaction(self, transaction_id, amount_cents, reason=None):
         """
@@ -204,55 +402,158 @@ class PaymobClient:
             transaction_id: Transaction ID
             amount_cents: Amount to refund in cents
             reason: Reason for refund (optional)
-            
+        
         Returns:
             Refund data
         """
-        if not self.auth_token:
-            self.authenticate()
+        payload = self._refund_payload(transaction_id, amount_cents, reason)
         
-        url = f"{self.base_url}/acceptance/void_refund/refund"
+        return self._authorized('POST', 'acceptance/void_refund/refund', payload)
+
+
+class AsyncPaymobClient(BasePaymobClient):
+    """
+    Asyncio Paymob client on a pooled httpx connection.
+    
+    The Redis token cache is read and written from a worker thread, so a
+    slow Redis never blocks the event loop.
+    
+    Usage:
+        async with AsyncPaymobClient() as client:
+            result = await client.process_payment(...)
+    """
+    
+    def __init__(self, redis_client=None, http_client=None):
+        """
+        Initialize the Paymob client.
         
-        payload = {
-            "auth_token": self.auth_token,
-            "transaction_id": transaction_id,
-            "amount_cents": amount_cents
-        }
+        Args:
+            redis_client: Redis client (default: the shared client)
+            http_client: httpx.AsyncClient (default: one owned by this client)
+        """
+        super().__init__(redis_client)
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=settings.PAYMOB_POOL_SIZE,
+                max_keepalive_connections=settings.PAYMOB_POOL_SIZE
+            ),
+            # httpx only retries failed connects, which is safe for POSTs
+            transport=httpx.AsyncHTTPTransport(retries=settings.PAYMOB_MAX_RETRIES)
+        )
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    async def aclose(self):
+        """
+        Close the HTTP connection pool if this client created it.
+        """
+        if self._owns_http_client:
+            await self.http_client.aclose()
+    
+    async def _request(self, method, path, **kwargs):
+        # Status retries are limited to GETs, matching the sync session
+        attempts = settings.PAYMOB_MAX_RETRIES + 1 if method == 'GET' else 1
+        
+        for attempt in range(attempts):
+            try:
+                response = await self.http_client.request(method, self._url(path), **kwargs)
+            except httpx.HTTPError as e:
+                raise PaymobError(f"Paymob request to {path} failed: {e}") from e
+            
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                break
+            await asyncio.sleep(settings.PAYMOB_RETRY_BACKOFF * (2 ** attempt))
         
-        if reason:
-            payload["reason"] = reason
+        if response.status_code >= 400:
+            raise PaymobError(
+                f"Paymob request to {path} returned {response.status_code}",
+                status_code=response.status_code
+            )
         
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+        return self._json(response, path)
+    
+    async def _authorized(self, method, path, payload=None):
+        async def send(token):
+            if method == 'GET':
+                return await self._request(method, path, params={"token": token})
+            return await self._request(method, path, json={**payload, "auth_token": token})
+        
+        try:
+            return await send(await self.get_auth_token())
+        except PaymobError as e:
+            if e.status_code != 401:
+                raise
+            await asyncio.to_thread(self.forget_token)
+            return await send(await self.get_auth_token())
+    
+    async def authenticate(self):
+        """
+        Authenticate with Paymob API and get auth token.
+        """
+        data = await self._request('POST', 'auth/tokens', json={"api_key": self.api_key})
+        token = self._require(data, "token", "Failed to authenticate with Paymob")
+        await asyncio.to_thread(self._cache_token, token)
         
-        return response.json()
+        return token
     
-    def verify_webhook_signature(self, request_data, hmac_header):
+    async def get_auth_token(self):
         """
-        Verify the HMAC signature of a webhook request.
+        Get an auth token, reusing the cached one while it is valid.
+        """
+        if not self.auth_token:
+            self.auth_token = await asyncio.to_thread(self._get_cached_token)
         
-        Args:
-            request_data: Request data as a dictionary
-            hmac_header: HMAC header from the request
-            
-        Returns:
-            True if signature is valid, False otherwise
+        return self.auth_token or await self.authenticate()
+    
+    async def register_order(self, amount_cents, currency="EGP", items=None):
+        """
+        Register an order with Paymob and return its ID.
         """
-        import hmac
-        import hashlib
+        data = await self._authorized('POST', 'ecommerce/orders', self._order_payload(amount_cents, currency, items))
         
-        if not self.hmac_secret:
-            logger.warning("HMAC secret not configured, skipping signature verification")
-            return True
+        return self._require(data, "id", "Failed to register order with Paymob")
+    
+    async def get_payment_key(self, order_id, amount_cents, currency="EGP", billing_data=None):
+        """
+        Get a payment key for processing a payment.
+        """
+        payload = self._payment_key_payload(order_id, amount_cents, currency, billing_data)
+        data = await self._authorized('POST', 'acceptance/payment_keys', payload)
         
-        # Convert request data to string and sort keys
-        data_string = json.dumps(request_data, sort_keys=True).encode('utf-8')
+        return self._require(data, "token", "Failed to generate payment key with Paymob")
+    
+    async def process_payment(self, amount_cents, order_items, customer_data, currency="EGP"):
+        """
+        Process a payment from start to finish.
+        """
+        payment_reference = f"PAY-{uuid.uuid4().hex[:8].upper()}"
         
-        # Calculate HMAC
-        calculated_hmac = hmac.new(
-            self.hmac_secret.encode('utf-8'),
-            data_string,
-            hashlib.sha512
-        ).hexdigest()
+        order_id = await self.register_order(amount_cents, currency, order_items)
+        payment_key = await self.get_payment_key(order_id, amount_cents, currency, customer_data)
+        
+        return {
+            "payment_reference": payment_reference,
+            "order_id": order_id,
+            "payment_key": payment_key,
+            "payment_url": self.get_payment_url(payment_key)
+        }
+    
+    async def verify_transaction(self, transaction_id):
+        """
+        Verify a transaction with Paymob.
+        """
+        return await self._authorized('GET', f"acceptance/transactions/{transaction_id}")
+    
+    async def refund_transaction(self, transaction_id, amount_cents, reason=None):
+        """
+        Refund a transaction.
+        """
+        payload = self._refund_payload(transaction_id, amount_cents, reason)
         
-        return calculated_hmac == hmac_header
+        return await self._authorized('POST', 'acceptance/void_refund/refund', payload)
@@ -2,14 +2,65 @@
 Redis integration for the Fashion Hub project.
 """
 
+from contextlib import contextmanager
 from django.conf import settings
-from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from redis.exceptions import LockError
 import redis
+import functools
+import hashlib
 import json
 import logging
+import math
+import random
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Process-wide connection pool and client, created on first use
+_connection_pool = None
+_redis_client = None
+# Reentrant: get_redis_client() creates the pool while holding it
+_lock = threading.RLock()
+
+
+def get_connection_pool():
+    """
+    Get the connection pool shared by every RedisClient in this process.
+    """
+    global _connection_pool
+    
+    if _connection_pool is None:
+        with _lock:
+            if _connection_pool is None:
+                _connection_pool = redis.ConnectionPool(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                    password=settings.REDIS_PASSWORD,
+                    connection_class=redis.SSLConnection if settings.REDIS_USE_SSL else redis.Connection,
+                    max_connections=settings.REDIS_MAX_CONNECTIONS,
+                    health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+                    decode_responses=True
+                )
+    return _connection_pool
+
+
+def get_redis_client():
+    """
+    Get the process-wide RedisClient.
+    """
+    global _redis_client
+    
+    if _redis_client is None:
+        with _lock:
+            if _redis_client is None:
+                _redis_client = RedisClient()
+    return _redis_client
+
 
 class RedisClient:
     """
@@ -18,20 +69,42 @@ class RedisClient:
     
     def __init__(self):
         """
-        Initialize the Redis client.
+        Initialize the Redis client on the shared connection pool.
         """
-        self.redis = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            password=settings.REDIS_PASSWORD,
-            ssl=settings.REDIS_USE_SSL,
-            decode_responses=True
-        )
+        self.redis = redis.Redis(connection_pool=get_connection_pool())
+    
+    @contextmanager
+    def pipeline(self, transaction=False):
+        """
+        Context manager that queues commands and executes them on exit.
+        
+        Usage:
+            with redis_client.pipeline() as pipe:
+                pipe.incr('a')
+                pipe.incr('b')
+        """
+        pipe = self.redis.pipeline(transaction=transaction)
+        try:
+            yield pipe
+            pipe.execute()
+        finally:
+            pipe.reset()
+    
+    def transaction(self):
+        """
+        Context manager that runs the queued commands in a MULTI/EXEC block.
+        """
+        return self.pipeline(transaction=True)
     
-    def set_cache(self, key, value, timeout=None):
+    def set_cache(self, key, value, timeout=None, tags=None):
         """
         Set a value in the cache.
+        
+        Args:
+            key: Cache key
+            value: Value to cache (dicts and lists are stored as JSON)
+            timeout: Expiry in seconds (default: CACHE_TIMEOUT)
+            tags: Optional tags the key can later be invalidated by
         """
         if timeout is None:
             timeout = settings.CACHE_TIMEOUT
@@ -39,15 +112,61 @@ class RedisClient:
         if isinstance(value, (dict, list)):
             value = json.dumps(value)
         
-        self.redis.set(key, value, ex=timeout)
+        if tags:
+            with self.pipeline() as pipe:
+                pipe.set(key, value, ex=timeout)
+                for tag in tags:
+                    tag_key = self.get_tag_key(tag)
+                    pipe.sadd(tag_key, key)
+                    # Tag sets outlive their members, but not forever
+                    pipe.expire(tag_key, max(timeout, settings.CACHE_TAG_TIMEOUT))
+        else:
+            self.redis.set(key, value, ex=timeout)
         logger.debug(f"Set cache key: {key}")
     
     def get_cache(self, key, default=None):
         """
         Get a value from the cache.
         """
-        value = self.redis.get(key)
+        return self._deserialize(self.redis.get(key), default)
+    
+    def set_cache_many(self, mapping, timeout=None):
+        """
+        Set several values in the cache in one round trip.
         
+        Args:
+            mapping: Dictionary of key to value
+            timeout: Expiry in seconds (default: CACHE_TIMEOUT)
+        """
+        if timeout is None:
+            timeout = settings.CACHE_TIMEOUT
+        
+        # MSET can't set expiries, so pipeline individual SETs instead
+        with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                if isinstance(value, (dict, list)):
+                    value = json.dumps(value)
+                pipe.set(key, value, ex=timeout)
+        logger.debug(f"Set {len(mapping)} cache keys")
+    
+    def get_cache_many(self, keys, default=None):
+        """
+        Get several values from the cache in one round trip.
+        
+        Returns:
+            Dictionary of key to value, with default for missing keys
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        
+        values = self.redis.mget(keys)
+        return {key: self._deserialize(value, default) for key, value in zip(keys, values)}
+    
+    def _deserialize(self, value, default=None):
+        """
+        Decode a cached value, parsing JSON where possible.
+        """
         if value is None:
             return default
         
@@ -65,14 +184,79 @@ class RedisClient:
         self.redis.delete(key)
         logger.debug(f"Deleted cache key: {key}")
     
-    def clear_cache(self, pattern="*"):
+    def clear_cache(self, pattern="*", batch_size=None):
         """
         Clear all cache keys matching a pattern.
+        
+        Keys are found with an incremental SCAN and removed with UNLINK in
+        pipelined batches, so Redis is never blocked for the whole keyspace.
+        Prefer invalidate_tags when the keys to clear are known up front.
+        """
+        batch_size = batch_size or settings.CACHE_INVALIDATION_BATCH_SIZE
+        deleted = 0
+        batch = []
+        
+        for key in self.redis.scan_iter(match=pattern, count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += self._unlink_batches(batch, batch_size)
+                batch = []
+        
+        if batch:
+            deleted += self._unlink_batches(batch, batch_size)
+        
+        if deleted:
+            logger.info(f"Cleared {deleted} cache keys matching pattern: {pattern}")
+        return deleted
+    
+    def get_tag_key(self, tag):
+        """
+        Get the Redis key of the set tracking keys for a tag.
+        """
+        return f"tag:{tag}"
+    
+    def invalidate_tags(self, *tags, batch_size=None):
+        """
+        Delete all cache keys registered under any of the given tags.
+        
+        Tag sets are read with SSCAN and their keys removed with UNLINK in
+        pipelined batches, so large tags don't block Redis.
+        """
+        batch_size = batch_size or settings.CACHE_INVALIDATION_BATCH_SIZE
+        deleted = 0
+        
+        for tag in tags:
+            tag_key = self.get_tag_key(tag)
+            batch = []
+            
+            for key in self.redis.sscan_iter(tag_key, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += self._unlink_batches(batch, batch_size)
+                    batch = []
+            
+            if batch:
+                deleted += self._unlink_batches(batch, batch_size)
+        
+        # Tag sets go last and aren't counted, whether or not they existed
+        if tags:
+            self._unlink_batches([self.get_tag_key(tag) for tag in tags], batch_size)
+        
+        if deleted:
+            logger.info(f"Invalidated {deleted} cache keys for tags: {', '.join(tags)}")
+        return deleted
+    
+    def _unlink_batches(self, keys, batch_size):
         """
-        keys = self.redis.keys(pattern)
-        if keys:
-            self.redis.delete(*keys)
-            logger.info(f"Cleared {len(keys)} cache keys matching pattern: {pattern}")
+        UNLINK keys in pipelined batches and return how many existed.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        try:
+            for start in range(0, len(keys), batch_size):
+                pipe.unlink(*keys[start:start + batch_size])
+            return sum(pipe.execute())
+        finally:
+            pipe.reset()
     
     def increment(self, key, amount=1):
         """
@@ -86,6 +270,18 @@ class RedisClient:
         """
         return self.redis.decr(key, amount)
     
+    def increment_field(self, key, field, amount=1):
+        """
+        Increment a counter field of a Redis hash.
+        """
+        return self.redis.hincrby(key, field, amount)
+    
+    def get_hash(self, key):
+        """
+        Get all fields of a Redis hash.
+        """
+        return self.redis.hgetall(key)
+    
     def add_to_set(self, key, *values):
         """
         Add values to a Redis set.
@@ -151,32 +347,232 @@ class RedisClient:
 
 
 # Cache decorators
-def cache_result(timeout=None, key_prefix=''):
+def _canonicalize(value):
+    """
+    Convert a function argument into a JSON-stable form for cache keys.
+    """
+    if isinstance(value, dict):
+        return {str(key): _canonicalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonicalize(item) for item in value), key=repr)
+    if hasattr(value, '_meta') and hasattr(value, 'pk'):
+        # Model instances are identified by their primary key, not their repr
+        return f"{value._meta.label}:{value.pk}"
+    return value
+
+
+def make_cache_key(func, args=(), kwargs=None, key_prefix='', version=1):
     """
-    Decorator to cache function results.
+    Build a cache key that is stable across processes and restarts.
+    
+    Args:
+        func: Cached function
+        args: Positional arguments of the call
+        kwargs: Keyword arguments of the call
+        key_prefix: Optional key namespace
+        version: Function version, bump it when the cached result format changes
+    
+    Returns:
+        Cache key string
+    """
+    payload = json.dumps(
+        [_canonicalize(list(args)), _canonicalize(kwargs or {})],
+        sort_keys=True,
+        default=str,
+    )
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    name = f"{func.__module__}.{func.__qualname__}"
+    return f"{key_prefix or 'cache'}:{name}:v{version}:{digest}"
+
+
+def cache_result(timeout=None, key_prefix='', version=1, stale_timeout=None,
+                 negative_timeout=None, beta=1.0, lock_timeout=None, tags=None):
+    """
+    Decorator to cache function results in Redis.
+    
+    Concurrent misses on the same key are collapsed so only one caller
+    recomputes the value. Entries are refreshed probabilistically before
+    they expire, and an expired entry keeps being served for
+    stale_timeout seconds while another caller refreshes it.
+    
+    Results must be JSON serializable.
+    
+    Args:
+        timeout: Seconds a result is fresh (default: CACHE_TIMEOUT)
+        key_prefix: Optional key namespace
+        version: Function version, bump it to drop entries cached by older code
+        stale_timeout: Seconds an expired result may still be served
+            (default: CACHE_STALE_TIMEOUT)
+        negative_timeout: Seconds to cache a None result (None results aren't cached by default)
+        beta: Early refresh aggressiveness, 0 disables early refresh
+        lock_timeout: Seconds the recompute lock is held at most
+            (default: CACHE_LOCK_TIMEOUT)
+        tags: Cache tags the entries can be invalidated by
     """
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            # Generate cache key
-            key = f"{key_prefix}:{func.__name__}:{hash(str(args) + str(kwargs))}"
+        name = f"{func.__module__}.{func.__qualname__}"
+        stats_key = f"cache:stats:{name}"
+        
+        def fresh_timeout():
+            return timeout if timeout is not None else settings.CACHE_TIMEOUT
+        
+        def grace_timeout():
+            return stale_timeout if stale_timeout is not None else settings.CACHE_STALE_TIMEOUT
+        
+        def count(redis_client, field):
+            try:
+                redis_client.increment_field(stats_key, field)
+            except redis.RedisError:
+                pass
+        
+        def compute(redis_client, key, args, kwargs):
+            start = time.monotonic()
+            result = func(*args, **kwargs)
+            delta = time.monotonic() - start
             
-            # Try to get from cache
-            result = cache.get(key)
-            if result is not None:
+            if result is None and negative_timeout is None:
                 return result
             
-            # Call function and cache result
-            result = func(*args, **kwargs)
-            cache.set(key, result, timeout)
-            
+            ttl = negative_timeout if result is None else fresh_timeout()
+            entry = {
+                'value': result,
+                'expires_at': time.time() + ttl,
+                'delta': delta,
+            }
+            try:
+                # Keep the entry around past its expiry so it can be served stale
+                redis_client.set_cache(
+                    key,
+                    json.dumps(entry, cls=DjangoJSONEncoder),
+                    timeout=max(int(math.ceil(ttl + grace_timeout())), 1),
+                    tags=tags,
+                )
+            except redis.RedisError:
+                logger.warning(f"Redis unavailable, result of {name} not cached")
             return result
+        
+        def should_refresh_early(entry, now):
+            # XFetch: refresh with increasing probability as expiry approaches,
+            # earlier for values that are slow to compute
+            if beta <= 0:
+                return False
+            return now - entry['delta'] * beta * math.log(1.0 - random.random()) >= entry['expires_at']
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_cache_key(func, args, kwargs, key_prefix, version)
+            redis_client = get_redis_client()
+            
+            try:
+                entry = redis_client.get_cache(key)
+            except redis.RedisError:
+                logger.warning(f"Redis unavailable, calling {name} without cache")
+                return func(*args, **kwargs)
+            
+            if not isinstance(entry, dict) or 'expires_at' not in entry:
+                entry = None
+            
+            lock = redis_client.get_lock(
+                f"lock:{key}",
+                timeout=lock_timeout or settings.CACHE_LOCK_TIMEOUT,
+                blocking=False,
+            )
+            
+            if entry is not None:
+                now = time.time()
+                expired = now >= entry['expires_at']
+                if not expired and not should_refresh_early(entry, now):
+                    count(redis_client, 'hits')
+                    return entry['value']
+                
+                # Only one caller refreshes, everyone else keeps the current value
+                try:
+                    acquired = lock.acquire(blocking=False)
+                except redis.RedisError:
+                    logger.warning(f"Redis unavailable, calling {name} without cache")
+                    return func(*args, **kwargs) if expired else entry['value']
+                if not acquired:
+                    count(redis_client, 'stale' if expired else 'hits')
+                    return entry['value']
+                try:
+                    count(redis_client, 'refreshes')
+                    return compute(redis_client, key, args, kwargs)
+                finally:
+                    _release_lock(lock)
+            
+            count(redis_client, 'misses')
+            
+            # Single flight: wait for whoever is already computing the value
+            try:
+                acquired = lock.acquire(blocking=True, blocking_timeout=lock_timeout or settings.CACHE_LOCK_TIMEOUT)
+            except redis.RedisError:
+                logger.warning(f"Redis unavailable, calling {name} without cache")
+                return func(*args, **kwargs)
+            
+            if acquired:
+                try:
+                    try:
+                        entry = redis_client.get_cache(key)
+                    except redis.RedisError:
+                        entry = None
+                    if isinstance(entry, dict) and time.time() < entry.get('expires_at', 0):
+                        return entry['value']
+                    return compute(redis_client, key, args, kwargs)
+                finally:
+                    _release_lock(lock)
+            
+            logger.warning(f"Timed out waiting for {name} to be cached, computing it")
+            return func(*args, **kwargs)
+        
+        def invalidate(*args, **kwargs):
+            """
+            Remove the cached result for the given arguments.
+            """
+            return get_redis_client().delete_cache(make_cache_key(func, args, kwargs, key_prefix, version))
+        
+        def cache_stats():
+            """
+            Get hit/miss counters of the cached function.
+            """
+            counters = {field: int(value) for field, value in get_redis_client().get_hash(stats_key).items()}
+            served = counters.get('hits', 0) + counters.get('stale', 0)
+            total = served + counters.get('misses', 0) + counters.get('refreshes', 0)
+            return {
+                'hits': counters.get('hits', 0),
+                'stale': counters.get('stale', 0),
+                'misses': counters.get('misses', 0),
+                'refreshes': counters.get('refreshes', 0),
+                'hit_rate': served / total if total else 0.0,
+            }
+        
+        wrapper.invalidate = invalidate
+        wrapper.cache_stats = cache_stats
         return wrapper
     return decorator
 
 
-def invalidate_cache(key_pattern):
+def _release_lock(lock):
+    """
+    Release a recompute lock, ignoring locks that already expired.
+    
+    A lock that can't be released because Redis is unavailable expires
+    on its own.
+    """
+    try:
+        lock.release()
+    except (LockError, redis.RedisError):
+        pass
+
+
+def invalidate_cache(key_pattern=None, tags=None):
     """
     Decorator to invalidate cache after function execution.
+    
+    Args:
+        key_pattern: Glob pattern of keys to clear (scanned incrementally)
+        tags: Cache tags to invalidate (preferred, no keyspace scan)
     """
     def decorator(func):
         def wrapper(*args, **kwargs):
@@ -184,8 +580,11 @@ def invalidate_cache(key_pattern):
             result = func(*args, **kwargs)
             
             # Invalidate cache
-            redis_client = RedisClient()
-            redis_client.clear_cache(key_pattern)
+            redis_client = get_redis_client()
+            if tags:
+                redis_client.invalidate_tags(*tags)
+            if key_pattern:
+                redis_client.clear_cache(key_pattern)
             
             return result
         return wrapper
@@ -0,0 +1,170 @@
+"""
+Search result caching for the Fashion Hub project.
+"""
+
+from django.conf import settings
+import hashlib
+import json
+import logging
+
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class SearchCache:
+    """
+    Redis cache in front of product searches.
+    
+    Entries are keyed on a hash of the normalized search parameters and
+    tagged by store, category and the products they list. Changes that
+    can add or remove matches invalidate the store and category tags,
+    while changes that only alter how a product is shown (its thumbnail)
+    invalidate just the searches listing it.
+    """
+    key_prefix = "search:results"
+    hits_key = "search:cache:hits"
+    misses_key = "search:cache:misses"
+    
+    def __init__(self, redis_client=None, timeout=None):
+        """
+        Initialize the search cache.
+        """
+        self.redis_client = redis_client or get_redis_client()
+        self.timeout = timeout or settings.SEARCH_CACHE_TIMEOUT
+    
+    def make_key(self, **params):
+        """
+        Build a cache key from normalized search parameters.
+        """
+        normalized = dict(params)
+        query = normalized.get("query") or ""
+        normalized["query"] = " ".join(query.lower().split())
+        if normalized.get("fields"):
+            normalized["fields"] = sorted(normalized["fields"])
+        
+        # Query strings carry everything as text, so normalize value types too
+        payload = json.dumps(normalized, sort_keys=True, default=str)
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return f"{self.key_prefix}:{digest}"
+    
+    @staticmethod
+    def store_tag(store_id):
+        """
+        Get the tag for searches scoped to a store (or all stores).
+        """
+        return f"search:store:{store_id or 'all'}"
+    
+    @staticmethod
+    def category_tag(category_id):
+        """
+        Get the tag for searches filtered by a category.
+        """
+        return f"search:category:{category_id}"
+    
+    @staticmethod
+    def product_tag(product_id):
+        """
+        Get the tag for searches listing a product.
+        """
+        return f"search:product:{product_id}"
+    
+    def make_tags(self, store_id=None, category_id=None, product_ids=()):
+        """
+        Get the tags for a search entry.
+        """
+        tags = [self.store_tag(store_id)]
+        if category_id:
+            tags.append(self.category_tag(category_id))
+        tags.extend(self.product_tag(product_id) for product_id in product_ids)
+        return tags
+    
+    def search(self, client, query, **params):
+        """
+        Run ElasticsearchClient.search_products through the cache.
+        
+        Cursor searches are tied to a point in time and are never cached.
+        """
+        if not settings.SEARCH_CACHE_ENABLED or params.get("cursor") or params.get("use_cursor"):
+            return client.search_products(query, **params)
+        
+        key = self.make_key(query=query, **params)
+        
+        try:
+            cached = self.redis_client.get_cache(key)
+        except Exception:
+            logger.warning("Redis unavailable, searching without cache")
+            return client.search_products(query, **params)
+        
+        if cached is not None:
+            self._count(self.hits_key)
+            return cached
+        
+        self._count(self.misses_key)
+        result = client.search_products(query, **params)
+        
+        # Listings projected without ids can't be tagged by product
+        product_ids = [product["id"] for product in result.get("products", []) if product.get("id")]
+        try:
+            self.redis_client.set_cache(
+                key,
+                result,
+                timeout=self.timeout,
+                tags=self.make_tags(params.get("store_id"), params.get("category_id"), product_ids),
+            )
+        except Exception:
+            logger.warning("Redis unavailable, search result not cached")
+        
+        return result
+    
+    def invalidate_stores(self, store_ids):
+        """
+        Invalidate cached searches that can include products of the given stores.
+        """
+        store_ids = {store_id for store_id in store_ids if store_id}
+        if not store_ids:
+            return 0
+        
+        # Cross-store searches can include any store's products
+        tags = [self.store_tag(store_id) for store_id in store_ids] + [self.store_tag(None)]
+        return self.redis_client.invalidate_tags(*tags)
+    
+    def invalidate_categories(self, category_ids):
+        """
+        Invalidate cached searches filtered by the given categories.
+        """
+        tags = [self.category_tag(category_id) for category_id in category_ids if category_id]
+        if not tags:
+            return 0
+        return self.redis_client.invalidate_tags(*tags)
+    
+    def invalidate_products(self, product_ids):
+        """
+        Invalidate cached searches listing the given products.
+        """
+        tags = [self.product_tag(product_id) for product_id in product_ids if product_id]
+        if not tags:
+            return 0
+        return self.redis_client.invalidate_tags(*tags)
+    
+    def get_stats(self):
+        """
+        Get cache hit/miss counters.
+        """
+        hits = int(self.redis_client.get_cache(self.hits_key, 0) or 0)
+        misses = int(self.redis_client.get_cache(self.misses_key, 0) or 0)
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+        }
+    
+    def _count(self, key):
+        """
+        Increment a hit/miss counter, ignoring Redis errors.
+        """
+        try:
+            self.redis_client.increment(key)
+        except Exception:
+            pass
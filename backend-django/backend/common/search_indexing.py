@@ -0,0 +1,150 @@
+"""
+Incremental search indexing for the Fashion Hub project.
+"""
+
+from django.conf import settings
+from django.db import connections, transaction
+import atexit
+import itertools
+import logging
+import threading
+
+from .elasticsearch import ElasticsearchClient
+from .search_cache import SearchCache
+
+logger = logging.getLogger(__name__)
+
+
+class ProductIndexQueue:
+    """
+    Debounced queue of products whose search documents need refreshing.
+    
+    Repeated changes to the same product within the debounce window are
+    coalesced and flushed from a timer thread in bulk requests of at most
+    max_batch_size products. Cached searches for the affected stores,
+    categories and products are invalidated once the index is updated.
+    
+    Enqueueing never talks to Elasticsearch, so renaming a large store
+    doesn't block the request that did it.
+    """
+    
+    def __init__(self, delay=None, max_batch_size=None):
+        """
+        Initialize the queue.
+        
+        Args:
+            delay: Seconds to wait for more changes before flushing
+            max_batch_size: Products per bulk request; reaching it starts a flush without waiting
+        """
+        self.delay = delay if delay is not None else settings.SEARCH_INDEX_DEBOUNCE_SECONDS
+        self.max_batch_size = max_batch_size or settings.SEARCH_INDEX_MAX_BATCH_SIZE
+        self._pending = set()
+        self._stale_stores = set()
+        self._stale_categories = set()
+        self._stale_products = set()
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    def enqueue(self, product_ids, store_ids=(), category_ids=(), stale_product_ids=()):
+        """
+        Schedule products to be synced with the search index.
+        
+        Args:
+            product_ids: IDs of products to sync
+            store_ids: Stores whose cached searches become stale
+            category_ids: Categories whose cached searches become stale
+            stale_product_ids: Products whose cached search listings become stale
+        """
+        with self._lock:
+            self._pending.update(product_ids)
+            self._stale_stores.update(store_ids)
+            self._stale_categories.update(category_ids)
+            self._stale_products.update(stale_product_ids)
+            
+            if len(self._pending) >= self.max_batch_size:
+                # Don't wait out the debounce, but still flush off this thread
+                if self._timer is not None:
+                    self._timer.cancel()
+                self._start_timer(0)
+            elif self._timer is None and (
+                self._pending or self._stale_stores or self._stale_categories or self._stale_products
+            ):
+                self._start_timer(self.delay)
+    
+    def _start_timer(self, delay):
+        """
+        Schedule a background flush. Must be called with the lock held.
+        """
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _flush_in_background(self):
+        """
+        Flush from the timer thread and close the database connections it opened.
+        """
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+    
+    def enqueue_on_commit(self, product_ids, store_ids=(), category_ids=(), stale_product_ids=()):
+        """
+        Schedule products to be synced once the current transaction commits.
+        """
+        product_ids = list(product_ids)
+        store_ids = list(store_ids)
+        category_ids = list(category_ids)
+        stale_product_ids = list(stale_product_ids)
+        if product_ids or store_ids or category_ids or stale_product_ids:
+            transaction.on_commit(
+                lambda: self.enqueue(product_ids, store_ids, category_ids, stale_product_ids)
+            )
+    
+    def flush(self):
+        """
+        Send all pending products to Elasticsearch in chunks of max_batch_size.
+        """
+        with self._lock:
+            stale_stores, self._stale_stores = self._stale_stores, set()
+            stale_categories, self._stale_categories = self._stale_categories, set()
+            stale_products, self._stale_products = self._stale_products, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        
+        client = None
+        while True:
+            with self._lock:
+                chunk = set(itertools.islice(self._pending, self.max_batch_size))
+                self._pending -= chunk
+            
+            if not chunk:
+                break
+            
+            try:
+                client = client or ElasticsearchClient()
+                client.sync_products(chunk)
+            except Exception:
+                logger.exception(f"Failed to sync {len(chunk)} products with Elasticsearch")
+        
+        # Invalidate after the index is updated so stale results aren't re-cached
+        if stale_stores or stale_categories or stale_products:
+            try:
+                search_cache = SearchCache()
+                search_cache.invalidate_stores(stale_stores)
+                search_cache.invalidate_categories(stale_categories)
+                search_cache.invalidate_products(stale_products)
+            except Exception:
+                logger.exception("Failed to invalidate cached searches")
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+
+# Process-wide queue used by the product signals
+product_index_queue = ProductIndexQueue()
+
+# Don't lose pending changes when a worker shuts down
+atexit.register(product_index_queue.flush)
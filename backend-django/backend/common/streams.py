@@ -0,0 +1,159 @@
+"""
+Redis stream work queues for the Fashion Hub project.
+"""
+
+from .redis_client import get_redis_client
+
+
+class StreamQueue:
+    """
+    Work queue on a Redis stream, consumed through a consumer group.
+    
+    Each entry goes to one consumer and stays pending until acknowledged.
+    Entries from a consumer that died are claimed by another once they
+    have been idle long enough. Acknowledged entries are deleted, so the
+    stream only holds work left to do. Entries that keep failing can be
+    moved to a dead-letter stream for inspection.
+    
+    Subclasses set stream and group, and encode and decode their entries.
+    """
+    stream = None
+    group = None
+    
+    @property
+    def dead_letter_stream(self):
+        return f"{self.stream}:dead"
+    
+    def __init__(self, redis_client=None):
+        """
+        Initialize the queue.
+        
+        Args:
+            redis_client: Redis client (default: the shared client)
+        """
+        self._redis_client = redis_client
+        self._group_ready = False
+    
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = get_redis_client()
+        return self._redis_client
+    
+    def add(self, fields):
+        """
+        Append an entry to the stream.
+        
+        Args:
+            fields: Dictionary of string fields
+        
+        Returns:
+            Stream entry ID
+        """
+        return self.redis_client.redis.xadd(self.stream, fields)
+    
+    def length(self):
+        """
+        Get the number of entries not yet acknowledged.
+        """
+        return self.redis_client.redis.xlen(self.stream)
+    
+    def ensure_group(self):
+        """
+        Create the consumer group if it doesn't exist yet.
+        """
+        if self._group_ready:
+            return
+        
+        try:
+            self.redis_client.redis.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+    
+    def read_entries(self, consumer, count, block_ms=None):
+        """
+        Read new entries for a consumer.
+        
+        Args:
+            consumer: Consumer name, unique per worker
+            count: Maximum number of entries
+            block_ms: Milliseconds to wait for entries (default: don't wait)
+        
+        Returns:
+            List of (entry_id, fields) tuples
+        """
+        self.ensure_group()
+        response = self.redis_client.redis.xreadgroup(
+            self.group,
+            consumer,
+            {self.stream: '>'},
+            count=count,
+            block=block_ms
+        )
+        
+        return [(entry_id, fields) for entry_id, fields in response[0][1] if fields] if response else []
+    
+    def claim_entries(self, consumer, min_idle_ms, count):
+        """
+        Take over entries left pending by a consumer that stopped.
+        
+        Args:
+            consumer: Consumer name, unique per worker
+            min_idle_ms: Idle time before an entry is claimed
+            count: Maximum number of entries
+        
+        Returns:
+            List of (entry_id, fields) tuples
+        """
+        self.ensure_group()
+        response = self.redis_client.redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=min_idle_ms,
+            count=count
+        )
+        
+        return [(entry_id, fields) for entry_id, fields in response[1] if fields]
+    
+    def ack(self, *entry_ids):
+        """
+        Acknowledge processed entries and remove them from the stream.
+        """
+        if not entry_ids:
+            return
+        
+        with self.redis_client.pipeline() as pipe:
+            pipe.xack(self.stream, self.group, *entry_ids)
+            pipe.xdel(self.stream, *entry_ids)
+    
+    def delivery_counts(self, *entry_ids):
+        """
+        Get how many times pending entries have been delivered.
+        
+        Returns:
+            Dictionary of delivery counts keyed by entry ID
+        """
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        for entry_id in entry_ids:
+            pipe.xpending_range(self.stream, self.group, min=entry_id, max=entry_id, count=1)
+        
+        return {
+            entry_id: pending[0]['times_delivered'] if pending else 0
+            for entry_id, pending in zip(entry_ids, pipe.execute())
+        }
+    
+    def dead_letter(self, entry_id, fields):
+        """
+        Move an entry to the dead-letter stream and acknowledge it.
+        
+        Args:
+            entry_id: Pending entry ID
+            fields: Dictionary of string fields to keep, e.g. the entry and its last error
+        """
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_letter_stream, {'entry_id': entry_id, **fields})
+            pipe.xack(self.stream, self.group, entry_id)
+            pipe.xdel(self.stream, entry_id)
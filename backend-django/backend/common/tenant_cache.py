@@ -0,0 +1,219 @@
+"""
+Tenant resolution caching for the Fashion Hub project.
+"""
+
+from collections import OrderedDict
+from django.conf import settings
+from django.core import serializers
+import copy
+import logging
+import threading
+import time
+
+from stores.models import Store
+from .redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TenantCache:
+    """
+    Two-level cache of host to store lookups.
+    
+    A small per-process LRU answers most requests without any network
+    round trip. Misses fall through to Redis, shared by all workers, and
+    then to the database. Hosts that don't belong to any store are cached
+    too, for a shorter time. Invalidation clears Redis and this process;
+    other processes pick up the change once their local entry expires.
+    """
+    key_prefix = "tenant:host"
+    
+    def __init__(self, redis_client=None, max_size=None, local_timeout=None,
+                 timeout=None, negative_timeout=None):
+        """
+        Initialize the tenant cache.
+        
+        Args:
+            redis_client: Redis client (default: the shared client)
+            max_size: Maximum number of hosts kept in the local LRU
+            local_timeout: Seconds a host is kept in the local LRU
+            timeout: Seconds a host is kept in Redis
+            negative_timeout: Seconds an unknown host is kept in Redis
+        """
+        self._redis_client = redis_client
+        self.max_size = max_size or settings.TENANT_CACHE_LOCAL_SIZE
+        self.local_timeout = local_timeout if local_timeout is not None else settings.TENANT_CACHE_LOCAL_TIMEOUT
+        self.timeout = timeout or settings.TENANT_CACHE_TIMEOUT
+        self.negative_timeout = negative_timeout or settings.TENANT_CACHE_NEGATIVE_TIMEOUT
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'local_hits': 0, 'redis_hits': 0, 'misses': 0, 'negative_hits': 0}
+    
+    @property
+    def redis_client(self):
+        # Resolved lazily so importing the middleware doesn't touch Redis
+        if self._redis_client is None:
+            self._redis_client = get_redis_client()
+        return self._redis_client
+    
+    @staticmethod
+    def normalize_host(host):
+        """
+        Normalize a host name for lookups.
+        """
+        return (host or '').split(':')[0].strip().lower().rstrip('.')
+    
+    def make_key(self, host):
+        """
+        Get the Redis key for a host.
+        """
+        return f"{self.key_prefix}:{host}"
+    
+    def get_store(self, host):
+        """
+        Get the store serving a host.
+        
+        Args:
+            host: Host name, with or without a port
+        
+        Returns:
+            Store instance, or None if no store uses the host
+        """
+        host = self.normalize_host(host)
+        if not host:
+            return None
+        
+        found, store = self._get_local(host)
+        if found:
+            self._count('local_hits', store)
+            return copy.copy(store) if store else None
+        
+        found, store = self._get_redis(host)
+        if found:
+            self._count('redis_hits', store)
+        else:
+            self._count('misses', None)
+            store = Store.objects.filter(domains__domain=host).first()
+            self._set_redis(host, store)
+        
+        self._set_local(host, store)
+        return copy.copy(store) if store else None
+    
+    def invalidate(self, *hosts):
+        """
+        Forget the cached stores of the given hosts.
+        """
+        hosts = {self.normalize_host(host) for host in hosts if host}
+        if not hosts:
+            return
+        
+        with self._lock:
+            for host in hosts:
+                self._local.pop(host, None)
+        
+        try:
+            with self.redis_client.pipeline() as pipe:
+                for host in hosts:
+                    pipe.delete(self.make_key(host))
+        except Exception:
+            logger.exception(f"Failed to invalidate cached tenants for {', '.join(sorted(hosts))}")
+    
+    def clear(self):
+        """
+        Empty the local LRU.
+        """
+        with self._lock:
+            self._local.clear()
+    
+    def get_stats(self):
+        """
+        Get this process's lookup counters.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_size'] = len(self._local)
+        
+        lookups = stats['local_hits'] + stats['redis_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['local_hits'] + stats['redis_hits']) / lookups if lookups else 0.0
+        return stats
+    
+    def _get_local(self, host):
+        """
+        Look a host up in the local LRU.
+        
+        Returns:
+            Tuple of (found, store)
+        """
+        with self._lock:
+            entry = self._local.get(host)
+            if entry is None:
+                return False, None
+            
+            expires_at, store = entry
+            if expires_at <= time.monotonic():
+                del self._local[host]
+                return False, None
+            
+            self._local.move_to_end(host)
+            return True, store
+    
+    def _set_local(self, host, store):
+        """
+        Add a host to the local LRU, evicting the least recently used host.
+        """
+        if self.local_timeout <= 0:
+            return
+        
+        with self._lock:
+            self._local[host] = (time.monotonic() + self.local_timeout, store)
+            self._local.move_to_end(host)
+            while len(self._local) > self.max_size:
+                self._local.popitem(last=False)
+    
+    def _get_redis(self, host):
+        """
+        Look a host up in Redis.
+        
+        Returns:
+            Tuple of (found, store)
+        """
+        try:
+            data = self.redis_client.get_cache(self.make_key(host))
+        except Exception:
+            logger.warning("Redis unavailable, resolving tenant from the database")
+            return False, None
+        
+        if data is None:
+            return False, None
+        
+        # An empty list marks a host that belongs to no store
+        objects = list(serializers.deserialize('python', data))
+        return True, objects[0].object if objects else None
+    
+    def _set_redis(self, host, store):
+        """
+        Store a host lookup in Redis.
+        """
+        if store is None:
+            value, timeout = [], self.negative_timeout
+        else:
+            # The JSON serializer turns dates and files into plain values
+            value, timeout = serializers.serialize('json', [store]), self.timeout
+        
+        try:
+            self.redis_client.set_cache(self.make_key(host), value, timeout=timeout)
+        except Exception:
+            logger.warning("Redis unavailable, tenant lookup not cached")
+    
+    def _count(self, name, store):
+        """
+        Increment a lookup counter.
+        """
+        with self._lock:
+            self._stats[name] += 1
+            if store is None and name != 'misses':
+                self._stats['negative_hits'] += 1
+
+
+# Process-wide cache used by TenantMiddleware
+tenant_cache = TenantCache()
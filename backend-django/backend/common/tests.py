@@ -1,3 +1,310 @@
-from django.test import TestCase
+from unittest import mock
+import asyncio
+import threading
 
-# Create your tests here.
+from django.conf import settings
+from django.test import SimpleTestCase
+from elasticsearch.exceptions import NotFoundError
+import httpx
+
+from .elasticsearch import CursorExpiredError, ElasticsearchClient, ReindexError
+from .paymob import AsyncPaymobClient, PaymobClient, PaymobError
+from . import redis_client
+from .redis_client import make_cache_key
+from .search_cache import SearchCache
+from .search_indexing import ProductIndexQueue
+
+
+def cached_function(*args, **kwargs):
+    return None
+
+
+class RedisClientTests(SimpleTestCase):
+    """
+    Test cases for the shared Redis client.
+    """
+    
+    @mock.patch.object(redis_client, '_redis_client', None)
+    @mock.patch.object(redis_client, '_connection_pool', None)
+    def test_first_client_creates_the_pool(self):
+        """
+        Test that the first get_redis_client() call also creates the shared pool.
+        """
+        client = redis_client.get_redis_client()
+        self.assertIs(client.redis.connection_pool, redis_client.get_connection_pool())
+
+
+class CacheKeyTests(SimpleTestCase):
+    """
+    Test cases for cache_result key derivation.
+    """
+    
+    def test_key_is_deterministic(self):
+        """
+        Test that equal arguments always produce the same key.
+        """
+        first = make_cache_key(cached_function, (1, 'a'), {'tags': {'b', 'a'}, 'page': 2})
+        second = make_cache_key(cached_function, (1, 'a'), {'page': 2, 'tags': {'a', 'b'}})
+        self.assertEqual(first, second)
+    
+    def test_key_changes_with_arguments_and_version(self):
+        """
+        Test that different arguments or versions produce different keys.
+        """
+        key = make_cache_key(cached_function, (1,), {})
+        self.assertNotEqual(key, make_cache_key(cached_function, (2,), {}))
+        self.assertNotEqual(key, make_cache_key(cached_function, (1,), {}, version=2))
+        self.assertNotEqual(key, make_cache_key(cached_function, (1,), {}, key_prefix='other'))
+
+
+class InvalidateTagsTests(SimpleTestCase):
+    """
+    Test cases for tag invalidation.
+    """
+    
+    def test_missing_tag_set_does_not_offset_count(self):
+        """
+        Test that only removed member keys are counted, even for tags without a set.
+        """
+        existing = {'tag:a', 'k1', 'k2'}
+        members = {'tag:a': ['k1', 'k2', 'expired'], 'tag:b': []}
+        pipe = mock.Mock()
+        unlinked = []
+        pipe.unlink.side_effect = lambda *keys: unlinked.append(len(existing.intersection(keys)))
+        pipe.execute.side_effect = lambda: [unlinked.pop(0) for _ in range(len(unlinked))]
+        
+        client = redis_client.RedisClient.__new__(redis_client.RedisClient)
+        client.redis = mock.Mock()
+        client.redis.sscan_iter.side_effect = lambda key, count: members.get(key, [])
+        client.redis.pipeline.return_value = pipe
+        
+        self.assertEqual(client.invalidate_tags('a', 'b', 'c', batch_size=10), 2)
+
+
+class CacheResultTests(SimpleTestCase):
+    """
+    Test cases for cache_result when Redis fails.
+    """
+    
+    def make_client(self, entry=None):
+        client = mock.Mock()
+        client.get_cache.return_value = entry
+        client.get_lock.return_value.acquire.side_effect = redis_client.redis.ConnectionError("Connection refused")
+        return client
+    
+    def test_lock_failure_computes_uncached(self):
+        """
+        Test that a miss computes the result when Redis fails while taking the lock.
+        """
+        cached = redis_client.cache_result()(lambda value: value * 2)
+        
+        with mock.patch.object(redis_client, 'get_redis_client', return_value=self.make_client()):
+            self.assertEqual(cached(21), 42)
+    
+    def test_lock_failure_on_expired_entry_computes_uncached(self):
+        """
+        Test that an expired entry is recomputed when Redis fails while taking the lock.
+        """
+        cached = redis_client.cache_result()(lambda value: value * 2)
+        client = self.make_client({'value': 0, 'expires_at': 0, 'delta': 0})
+        
+        with mock.patch.object(redis_client, 'get_redis_client', return_value=client):
+            self.assertEqual(cached(21), 42)
+
+
+class ReindexTests(SimpleTestCase):
+    """
+    Test cases for swapping the search alias after a reindex.
+    """
+    
+    def make_client(self, failed):
+        client = ElasticsearchClient.__new__(ElasticsearchClient)
+        client.es = mock.Mock()
+        client.index_name = 'products'
+        client.create_versioned_index = mock.Mock(return_value='products_v2')
+        client.get_reindex_queryset = mock.Mock()
+        client.swap_alias = mock.Mock()
+        client.cleanup_old_indices = mock.Mock()
+        client.bulk_index = mock.Mock(return_value={
+            'indexed': 10 - failed, 'failed': failed, 'errors': [], 'elapsed': 1.0, 'rate': 10.0,
+        })
+        return client
+    
+    def test_failed_documents_keep_the_live_index(self):
+        """
+        Test that a reindex with bulk failures deletes the new index and leaves the alias alone.
+        """
+        client = self.make_client(failed=3)
+        
+        with self.assertRaises(ReindexError) as raised:
+            client.reindex_all_products()
+        
+        self.assertEqual(raised.exception.stats['failed'], 3)
+        client.es.indices.delete.assert_called_once_with(index='products_v2')
+        client.swap_alias.assert_not_called()
+        client.cleanup_old_indices.assert_not_called()
+    
+    def test_complete_reindex_goes_live(self):
+        """
+        Test that a reindex without failures swaps the alias to the new index.
+        """
+        client = self.make_client(failed=0)
+        
+        stats = client.reindex_all_products()
+        
+        self.assertEqual(stats['index'], 'products_v2')
+        client.swap_alias.assert_called_once_with('products_v2')
+        client.es.indices.delete.assert_not_called()
+
+
+class ProductIndexQueueTests(SimpleTestCase):
+    """
+    Test cases for the debounced search indexing queue.
+    """
+    
+    @mock.patch('common.search_indexing.ElasticsearchClient')
+    def test_full_batch_is_not_flushed_on_the_caller(self, client_class):
+        """
+        Test that reaching the batch size hands the flush to a background thread.
+        """
+        queue = ProductIndexQueue(delay=60, max_batch_size=2)
+        
+        with mock.patch.object(queue, '_start_timer') as start_timer:
+            queue.enqueue([1, 2, 3])
+        
+        start_timer.assert_called_once_with(0)
+        client_class.assert_not_called()
+        self.assertEqual(len(queue), 3)
+    
+    @mock.patch('common.search_indexing.SearchCache')
+    @mock.patch('common.search_indexing.ElasticsearchClient')
+    def test_flush_sends_chunks(self, client_class, search_cache_class):
+        """
+        Test that pending products are synced in chunks of the batch size.
+        """
+        queue = ProductIndexQueue(delay=60, max_batch_size=2)
+        queue._pending.update([1, 2, 3, 4, 5])
+        
+        queue.flush()
+        
+        chunks = [call.args[0] for call in client_class.return_value.sync_products.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(set().union(*chunks), {1, 2, 3, 4, 5})
+        self.assertEqual(len(queue), 0)
+
+
+class SearchCacheTests(SimpleTestCase):
+    """
+    Test cases for search result tagging.
+    """
+    
+    @mock.patch.object(settings, 'SEARCH_CACHE_ENABLED', True)
+    def test_results_are_tagged_by_listed_products(self):
+        """
+        Test that a cached search is tagged by the products it lists.
+        """
+        redis = mock.Mock()
+        redis.get_cache.return_value = None
+        client = mock.Mock()
+        client.search_products.return_value = {'products': [{'id': 7}, {'id': 9}], 'total': 2}
+        
+        SearchCache(redis_client=redis, timeout=60).search(client, 'shirt', store_id=3)
+        
+        self.assertEqual(
+            redis.set_cache.call_args.kwargs['tags'],
+            ['search:store:3', 'search:product:7', 'search:product:9']
+        )
+    
+    def test_invalidate_products_leaves_store_tags(self):
+        """
+        Test that invalidating products only drops their own tags.
+        """
+        redis = mock.Mock()
+        
+        SearchCache(redis_client=redis, timeout=60).invalidate_products([7, None])
+        
+        redis.invalidate_tags.assert_called_once_with('search:product:7')
+
+
+class SearchCursorTests(SimpleTestCase):
+    """
+    Test cases for cursor (point in time) searches.
+    """
+    
+    def make_client(self):
+        client = ElasticsearchClient.__new__(ElasticsearchClient)
+        client.es = mock.Mock()
+        client.index_name = 'products'
+        return client
+    
+    def test_expired_point_in_time_raises_cursor_expired(self):
+        """
+        Test that a missing point in time is reported as an expired cursor.
+        """
+        client = self.make_client()
+        client.es.search.side_effect = NotFoundError('search_context_missing_exception', mock.Mock(status=404), {})
+        cursor = client.encode_cursor({'pit': 'gone', 'after': [1.0, 5]})
+        
+        with self.assertRaises(CursorExpiredError):
+            client._search_with_cursor({'match_all': {}}, ['_score'], 20, None, cursor)
+    
+    def test_close_cursor_releases_point_in_time(self):
+        """
+        Test that closing a cursor closes its point in time, even if already expired.
+        """
+        client = self.make_client()
+        client.es.close_point_in_time.side_effect = NotFoundError('not found', mock.Mock(status=404), {})
+        
+        client.close_cursor(client.encode_cursor({'pit': 'abc', 'after': [1]}))
+        
+        client.es.close_point_in_time.assert_called_once_with(body={'id': 'abc'})
+
+
+class PaymobClientTests(SimpleTestCase):
+    """
+    Test cases for Paymob responses and the token cache.
+    """
+    
+    def test_html_reply_raises_paymob_error(self):
+        """
+        Test that a gateway reply that isn't JSON raises PaymobError.
+        """
+        response = mock.Mock(status_code=200)
+        response.json.side_effect = ValueError("Expecting value")
+        session = mock.Mock()
+        session.request.return_value = response
+        client = PaymobClient(redis_client=mock.Mock(), session=session)
+        
+        with self.assertRaises(PaymobError):
+            client._request('POST', 'auth/tokens', json={})
+    
+    def test_async_html_reply_raises_paymob_error(self):
+        """
+        Test that the async client also raises PaymobError for a reply that isn't JSON.
+        """
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text='<html></html>'))
+        
+        async def request():
+            async with httpx.AsyncClient(transport=transport) as http_client:
+                client = AsyncPaymobClient(redis_client=mock.Mock(), http_client=http_client)
+                await client._request('POST', 'auth/tokens', json={})
+        
+        with self.assertRaises(PaymobError):
+            asyncio.run(request())
+    
+    def test_async_token_cache_runs_off_the_event_loop(self):
+        """
+        Test that the async client reads the cached token outside the event loop thread.
+        """
+        threads = []
+        redis = mock.Mock()
+        redis.redis.get.side_effect = lambda key: threads.append(threading.get_ident()) or 'token'
+        
+        async def get_token():
+            client = AsyncPaymobClient(redis_client=redis, http_client=mock.Mock())
+            return await client.get_auth_token(), threading.get_ident()
+        
+        token, loop_thread = asyncio.run(get_token())
+        
+        self.assertEqual(token, 'token')
+        self.assertNotIn(loop_thread, threads)
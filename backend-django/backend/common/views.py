@@ -5,6 +5,8 @@ Common views and viewsets for the Fashion Hub project.
 from rest_framework import viewsets, mixins
 from rest_framework.permissions import IsAuthenticated
 
+from .serializers import DynamicFieldsModelSerializer
+
 
 class BaseViewSet(viewsets.ModelViewSet):
     """
@@ -20,3 +22,31 @@ class ReadOnlyViewSet(mixins.RetrieveModelMixin,
     A viewset that provides only 'read-only' actions.
     """
     permission_classes = [IsAuthenticated]
+
+
+class DynamicFieldsMixin:
+    """
+    Viewset mixin that trims read responses to the fields listed in ?fields=.
+    
+    Only applies to serializers based on DynamicFieldsModelSerializer.
+    """
+    fields_param = 'fields'
+    
+    def get_requested_fields(self):
+        """
+        Get the field names requested by the client, or None for all fields.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None
+        
+        value = request.query_params.get(self.fields_param)
+        if not value:
+            return None
+        return [field.strip() for field in value.split(',') if field.strip()]
+    
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_requested_fields()
+        if fields and issubclass(self.get_serializer_class(), DynamicFieldsModelSerializer):
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
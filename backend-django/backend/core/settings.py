@@ -25,7 +25,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'core',
     'django_elasticsearch_dsl',
-
+    
     'common',
     'users',
     'stores',
@@ -64,7 +64,10 @@ REST_FRAMEWORK = {
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.CursorPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=20, cast=int),
 }
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=100, cast=int)
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -76,6 +79,111 @@ ELASTICSEARCH_DSL = {
     },
 }
 
+ELASTICSEARCH_HOST = config('ELASTICSEARCH_HOST', default='http://elasticsearch:9200')
+ELASTICSEARCH_USERNAME = config('ELASTICSEARCH_USERNAME', default='')
+ELASTICSEARCH_PASSWORD = config('ELASTICSEARCH_PASSWORD', default='')
+ELASTICSEARCH_USE_SSL = config('ELASTICSEARCH_USE_SSL', default=False, cast=bool)
+ELASTICSEARCH_VERIFY_CERTS = config('ELASTICSEARCH_VERIFY_CERTS', default=True, cast=bool)
+ELASTICSEARCH_INDEX = config('ELASTICSEARCH_INDEX', default='products')
+
+# Elasticsearch bulk indexing
+ELASTICSEARCH_BULK_CHUNK_SIZE = config('ELASTICSEARCH_BULK_CHUNK_SIZE', default=500, cast=int)
+ELASTICSEARCH_BULK_THREADS = config('ELASTICSEARCH_BULK_THREADS', default=4, cast=int)
+ELASTICSEARCH_BULK_MAX_RETRIES = config('ELASTICSEARCH_BULK_MAX_RETRIES', default=2, cast=int)
+
+# Elasticsearch index versioning (ELASTICSEARCH_INDEX is the read alias)
+ELASTICSEARCH_INDEX_REPLICAS = config('ELASTICSEARCH_INDEX_REPLICAS', default=1, cast=int)
+ELASTICSEARCH_REFRESH_INTERVAL = config('ELASTICSEARCH_REFRESH_INTERVAL', default='1s')
+ELASTICSEARCH_KEEP_INDEX_VERSIONS = config('ELASTICSEARCH_KEEP_INDEX_VERSIONS', default=1, cast=int)
+ELASTICSEARCH_REINDEX_MAX_FAILURES = config('ELASTICSEARCH_REINDEX_MAX_FAILURES', default=0, cast=int)
+
+# Point-in-time keep alive for cursor (search_after) pagination
+ELASTICSEARCH_PIT_KEEP_ALIVE = config('ELASTICSEARCH_PIT_KEEP_ALIVE', default='1m')
+
+# Search facets
+SEARCH_FACET_SIZE = config('SEARCH_FACET_SIZE', default=50, cast=int)
+SEARCH_FACET_PRICE_INTERVAL = config('SEARCH_FACET_PRICE_INTERVAL', default=100, cast=int)
+
+# Search-as-you-type suggestions
+SEARCH_SUGGEST_SIZE = config('SEARCH_SUGGEST_SIZE', default=8, cast=int)
+SEARCH_SUGGEST_CACHE_TIMEOUT = config('SEARCH_SUGGEST_CACHE_TIMEOUT', default=60, cast=int)
+
+# Redis
+REDIS_HOST = config('REDIS_HOST', default='redis')
+REDIS_PORT = config('REDIS_PORT', default=6379, cast=int)
+REDIS_DB = config('REDIS_DB', default=0, cast=int)
+REDIS_PASSWORD = config('REDIS_PASSWORD', default=None)
+REDIS_USE_SSL = config('REDIS_USE_SSL', default=False, cast=bool)
+REDIS_MAX_CONNECTIONS = config('REDIS_MAX_CONNECTIONS', default=50, cast=int)
+REDIS_HEALTH_CHECK_INTERVAL = config('REDIS_HEALTH_CHECK_INTERVAL', default=30, cast=int)
+REDIS_SOCKET_TIMEOUT = config('REDIS_SOCKET_TIMEOUT', default=5, cast=float)
+REDIS_SOCKET_CONNECT_TIMEOUT = config('REDIS_SOCKET_CONNECT_TIMEOUT', default=2, cast=float)
+CACHE_TIMEOUT = config('CACHE_TIMEOUT', default=300, cast=int)
+CACHE_TAG_TIMEOUT = config('CACHE_TAG_TIMEOUT', default=86400, cast=int)
+CACHE_INVALIDATION_BATCH_SIZE = config('CACHE_INVALIDATION_BATCH_SIZE', default=500, cast=int)
+
+# cache_result stampede protection
+CACHE_STALE_TIMEOUT = config('CACHE_STALE_TIMEOUT', default=60, cast=int)
+CACHE_LOCK_TIMEOUT = config('CACHE_LOCK_TIMEOUT', default=10, cast=int)
+
+# Category tree cache
+CATEGORY_TREE_CACHE_TIMEOUT = config('CATEGORY_TREE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Cart storage ('database', or 'redis' for write-behind carts)
+CART_BACKEND = config('CART_BACKEND', default='database')
+CART_REDIS_TIMEOUT = config('CART_REDIS_TIMEOUT', default=604800, cast=int)
+
+# Seconds stock stays reserved for an unpaid order
+STOCK_RESERVATION_TTL = config('STOCK_RESERVATION_TTL', default=900, cast=int)
+
+# Tenant (host to store) resolution cache
+TENANT_CACHE_LOCAL_SIZE = config('TENANT_CACHE_LOCAL_SIZE', default=1024, cast=int)
+TENANT_CACHE_LOCAL_TIMEOUT = config('TENANT_CACHE_LOCAL_TIMEOUT', default=30, cast=int)
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=600, cast=int)
+TENANT_CACHE_NEGATIVE_TIMEOUT = config('TENANT_CACHE_NEGATIVE_TIMEOUT', default=60, cast=int)
+
+# Paymob
+PAYMOB_API_KEY = config('PAYMOB_API_KEY', default='')
+PAYMOB_INTEGRATION_ID = config('PAYMOB_INTEGRATION_ID', default='')
+PAYMOB_IFRAME_ID = config('PAYMOB_IFRAME_ID', default='')
+PAYMOB_HMAC_SECRET = config('PAYMOB_HMAC_SECRET', default='')
+PAYMOB_BASE_URL = config('PAYMOB_BASE_URL', default='https://accept.paymob.com/api')
+PAYMOB_CONNECT_TIMEOUT = config('PAYMOB_CONNECT_TIMEOUT', default=3.05, cast=float)
+PAYMOB_READ_TIMEOUT = config('PAYMOB_READ_TIMEOUT', default=15, cast=float)
+PAYMOB_MAX_RETRIES = config('PAYMOB_MAX_RETRIES', default=2, cast=int)
+PAYMOB_RETRY_BACKOFF = config('PAYMOB_RETRY_BACKOFF', default=0.5, cast=float)
+PAYMOB_POOL_SIZE = config('PAYMOB_POOL_SIZE', default=10, cast=int)
+# Paymob auth tokens live for an hour; refresh them a little earlier
+PAYMOB_AUTH_TOKEN_TIMEOUT = config('PAYMOB_AUTH_TOKEN_TIMEOUT', default=3300, cast=int)
+
+# Paymob webhook intake and workers
+PAYMOB_WEBHOOK_THROTTLE_RATE = config('PAYMOB_WEBHOOK_THROTTLE_RATE', default='600/min')
+PAYMOB_WEBHOOK_BATCH_SIZE = config('PAYMOB_WEBHOOK_BATCH_SIZE', default=50, cast=int)
+PAYMOB_WEBHOOK_CLAIM_IDLE = config('PAYMOB_WEBHOOK_CLAIM_IDLE', default=60, cast=int)
+PAYMOB_WEBHOOK_MAX_DELIVERIES = config('PAYMOB_WEBHOOK_MAX_DELIVERIES', default=5, cast=int)
+
+# Analytics ingestion buffer
+ANALYTICS_BUFFER_MAX_LENGTH = config('ANALYTICS_BUFFER_MAX_LENGTH', default=100000, cast=int)
+ANALYTICS_FLUSH_BATCH_SIZE = config('ANALYTICS_FLUSH_BATCH_SIZE', default=500, cast=int)
+ANALYTICS_FLUSH_INTERVAL_MS = config('ANALYTICS_FLUSH_INTERVAL_MS', default=1000, cast=int)
+ANALYTICS_CLAIM_IDLE = config('ANALYTICS_CLAIM_IDLE', default=60, cast=int)
+ANALYTICS_RETRY_AFTER = config('ANALYTICS_RETRY_AFTER', default=5, cast=int)
+
+# Analytics rollups
+ANALYTICS_ROLLUP_LAG = config('ANALYTICS_ROLLUP_LAG', default=30, cast=int)
+ANALYTICS_ROLLUP_MAX_ROWS = config('ANALYTICS_ROLLUP_MAX_ROWS', default=100000, cast=int)
+# Checkpoints are kept per shard, so changing this needs the rollups rebuilt
+ANALYTICS_ROLLUP_SHARDS = config('ANALYTICS_ROLLUP_SHARDS', default=8, cast=int)
+
+# Search result cache
+SEARCH_CACHE_ENABLED = config('SEARCH_CACHE_ENABLED', default=True, cast=bool)
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=300, cast=int)
+
+# Incremental search indexing from model signals
+SEARCH_INDEX_AUTO_SYNC = config('SEARCH_INDEX_AUTO_SYNC', default=True, cast=bool)
+SEARCH_INDEX_DEBOUNCE_SECONDS = config('SEARCH_INDEX_DEBOUNCE_SECONDS', default=2.0, cast=float)
+SEARCH_INDEX_MAX_BATCH_SIZE = config('SEARCH_INDEX_MAX_BATCH_SIZE', default=500, cast=int)
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -0,0 +1,393 @@
+"""
+Cart storage backends for the Fashion Hub project.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+import json
+import logging
+
+from common.redis_client import get_redis_client
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseCartStore:
+    """
+    Cart stored directly in the Cart and CartItem tables.
+    """
+    
+    def get_cart_data(self, user, context=None):
+        """
+        Get the serialized cart of a user.
+        """
+        from .serializers import CartSerializer
+        
+        # Items, totals and item fields all come from this one prefetch
+        cart, created = Cart.objects.prefetch_related(
+            Prefetch('items', queryset=CartItem.objects.select_related('product', 'variant'))
+        ).get_or_create(user=user)
+        return CartSerializer(cart, context=context or {}).data
+    
+    def add_item(self, user, product, variant, quantity):
+        """
+        Add a quantity of a product (and variant) to the cart.
+        """
+        cart, created = Cart.objects.get_or_create(user=user)
+        cart_item, created = CartItem.objects.get_or_create(
+            cart=cart, product=product, variant=variant, defaults={'quantity': quantity}
+        )
+        if not created:
+            cart_item.quantity += quantity
+            cart_item.save()
+    
+    def get_item(self, user, item_id):
+        """
+        Get a cart item of the user, or None.
+        """
+        return CartItem.objects.filter(id=item_id, cart__user=user).select_related('variant').first()
+    
+    def set_quantity(self, user, item_id, quantity):
+        """
+        Set the quantity of a cart item.
+        """
+        return CartItem.objects.filter(id=item_id, cart__user=user).update(quantity=quantity) > 0
+    
+    def remove_item(self, user, item_id):
+        """
+        Remove an item from the cart.
+        """
+        deleted, _ = CartItem.objects.filter(id=item_id, cart__user=user).delete()
+        return deleted > 0
+    
+    def clear(self, user):
+        """
+        Remove all items from the cart.
+        """
+        CartItem.objects.filter(cart__user=user).delete()
+    
+    def persist(self, user):
+        """
+        Nothing to persist, the database is the store.
+        """
+    
+    def forget(self, user, lines):
+        """
+        Nothing to forget, the database is the store.
+        """
+
+
+class RedisCartStore:
+    """
+    Cart kept in Redis hashes and written behind to the database.
+    
+    Each cart is two hashes keyed by "<product_id>:<variant_id>": one with
+    quantities, updated with HINCRBY, and one with a snapshot of the
+    product's name and price at the time it was added. Changed carts are
+    tracked in a set and persisted by flush_dirty() or at checkout, so
+    cart operations don't write to the database.
+    """
+    key_prefix = "cart"
+    dirty_key = "cart:dirty"
+    
+    def __init__(self, redis_client=None, timeout=None):
+        """
+        Initialize the Redis cart store.
+        """
+        self.redis_client = redis_client or get_redis_client()
+        self.timeout = timeout or settings.CART_REDIS_TIMEOUT
+    
+    def get_keys(self, user_id):
+        """
+        Get the quantity, snapshot and loaded marker keys of a cart.
+        """
+        base = f"{self.key_prefix}:{user_id}"
+        return f"{base}:qty", f"{base}:lines", f"{base}:loaded"
+    
+    @staticmethod
+    def make_line_key(product_id, variant_id=None):
+        """
+        Get the hash field of a cart line.
+        """
+        return f"{product_id}:{variant_id or 0}"
+    
+    @staticmethod
+    def parse_line_key(line_key):
+        """
+        Get the product and variant IDs of a cart line.
+        """
+        product_id, variant_id = str(line_key).split(':')
+        return int(product_id), int(variant_id) or None
+    
+    def get_cart_data(self, user, context=None):
+        """
+        Get the cart of a user in the same shape as CartSerializer.
+        """
+        lines = self._load(user)
+        items = []
+        subtotal = Decimal('0')
+        
+        for line_key, (quantity, snapshot) in lines.items():
+            unit_price = Decimal(snapshot['unit_price'])
+            product_id, variant_id = self.parse_line_key(line_key)
+            items.append({
+                'id': line_key,
+                'cart': None,
+                'product': product_id,
+                'variant': variant_id,
+                'quantity': quantity,
+                'product_name': snapshot['product_name'],
+                'variant_name': snapshot['variant_name'],
+                'unit_price': unit_price,
+                'subtotal': unit_price * quantity,
+                'created_at': snapshot['added_at'],
+                'updated_at': snapshot['added_at'],
+            })
+            subtotal += unit_price * quantity
+        
+        return {
+            'id': None,
+            'user': user.id,
+            'items': items,
+            'total_items': len(items),
+            'subtotal': subtotal,
+            'created_at': None,
+            'updated_at': None,
+        }
+    
+    def add_item(self, user, product, variant, quantity):
+        """
+        Add a quantity of a product (and variant) to the cart.
+        """
+        self._ensure_loaded(user)
+        line_key = self.make_line_key(product.id, variant.id if variant else None)
+        snapshot = {
+            'product_name': product.name_en,
+            'variant_name': variant.name_en if variant else None,
+            'unit_price': str(CartItem(product=product, variant=variant).unit_price),
+            'added_at': timezone.now().isoformat(),
+        }
+        
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        with self.redis_client.transaction() as pipe:
+            pipe.hincrby(qty_key, line_key, quantity)
+            pipe.hset(lines_key, line_key, json.dumps(snapshot))
+            self._touch(pipe, user.id)
+    
+    def get_item(self, user, item_id):
+        """
+        Get a cart line as an unsaved CartItem, or None.
+        """
+        try:
+            product_id, variant_id = self.parse_line_key(item_id)
+        except ValueError:
+            return None
+        
+        quantity = self._load(user).get(self.make_line_key(product_id, variant_id), (None, None))[0]
+        if quantity is None:
+            return None
+        return CartItem(product_id=product_id, variant_id=variant_id, quantity=quantity)
+    
+    def set_quantity(self, user, item_id, quantity):
+        """
+        Set the quantity of a cart line.
+        """
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        if not self.redis_client.redis.hexists(qty_key, item_id):
+            return False
+        
+        with self.redis_client.transaction() as pipe:
+            pipe.hset(qty_key, item_id, quantity)
+            self._touch(pipe, user.id)
+        return True
+    
+    def remove_item(self, user, item_id):
+        """
+        Remove a line from the cart.
+        """
+        self._ensure_loaded(user)
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        pipe = self.redis_client.redis.pipeline(transaction=True)
+        pipe.hdel(qty_key, item_id)
+        pipe.hdel(lines_key, item_id)
+        self._touch(pipe, user.id)
+        return bool(pipe.execute()[0])
+    
+    def clear(self, user):
+        """
+        Remove all lines from the cart.
+        """
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        with self.redis_client.transaction() as pipe:
+            pipe.delete(qty_key, lines_key)
+            self._touch(pipe, user.id)
+    
+    def persist(self, user):
+        """
+        Write a user's cart to the Cart and CartItem tables.
+        """
+        self.persist_user_id(user.id)
+    
+    def persist_user_id(self, user_id):
+        """
+        Write the cart of a user ID to the Cart and CartItem tables.
+        """
+        qty_key, lines_key, loaded_key = self.get_keys(user_id)
+        pipe = self.redis_client.redis.pipeline(transaction=True)
+        pipe.exists(loaded_key)
+        pipe.hgetall(qty_key)
+        pipe.srem(self.dirty_key, user_id)
+        loaded, quantities, _ = pipe.execute()
+        
+        # Never overwrite the database with a cart that was evicted from Redis
+        if not loaded:
+            return
+        
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user_id=user_id)
+            # Replacing the lines is simpler than upserting, and NULL
+            # variants don't take part in the unique constraint anyway
+            CartItem.objects.filter(cart=cart).delete()
+            CartItem.objects.bulk_create([
+                CartItem(cart=cart, product_id=product_id, variant_id=variant_id, quantity=int(quantity))
+                for (product_id, variant_id), quantity in (
+                    (self.parse_line_key(line_key), quantity) for line_key, quantity in quantities.items()
+                )
+                if int(quantity) > 0
+            ])
+    
+    def forget(self, user, lines):
+        """
+        Take ordered lines out of a user's cart after checkout.
+        
+        Only the ordered quantities are subtracted, so lines added or
+        increased while the order was being placed stay in the cart.
+        
+        Args:
+            user: User who checked out
+            lines: (product_id, variant_id, quantity) tuples that were ordered
+        """
+        ordered = defaultdict(int)
+        for product_id, variant_id, quantity in lines:
+            ordered[self.make_line_key(product_id, variant_id)] += quantity
+        if not ordered:
+            return
+        
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        
+        def subtract(pipe):
+            current = dict(zip(ordered, pipe.hmget(qty_key, list(ordered))))
+            pipe.multi()
+            for line_key, quantity in ordered.items():
+                remaining = int(current[line_key] or 0) - quantity
+                if remaining > 0:
+                    pipe.hset(qty_key, line_key, remaining)
+                else:
+                    pipe.hdel(qty_key, line_key)
+                    pipe.hdel(lines_key, line_key)
+            # The database lost the ordered rows, persist what remains
+            self._touch(pipe, user.id)
+        
+        # Retried if the cart changes between reading and writing it
+        self.redis_client.redis.transaction(subtract, qty_key)
+    
+    def flush_dirty(self, batch_size=100):
+        """
+        Persist every cart changed since the last flush.
+        
+        Returns:
+            Number of carts persisted
+        """
+        flushed = 0
+        failed = []
+        while True:
+            user_ids = self.redis_client.redis.spop(self.dirty_key, batch_size)
+            if not user_ids:
+                break
+            
+            for user_id in user_ids:
+                try:
+                    self.persist_user_id(int(user_id))
+                    flushed += 1
+                except Exception:
+                    logger.exception(f"Failed to persist cart of user {user_id}")
+                    failed.append(user_id)
+        
+        # Mark failed carts dirty again so the next flush retries them
+        if failed:
+            self.redis_client.add_to_set(self.dirty_key, *failed)
+        
+        return flushed
+    
+    def _touch(self, pipe, user_id):
+        """
+        Queue marking a cart as changed and extending its expiry.
+        """
+        for key in self.get_keys(user_id):
+            pipe.expire(key, self.timeout)
+        pipe.sadd(self.dirty_key, user_id)
+    
+    def _load(self, user):
+        """
+        Get the lines of a cart as a dict of line key to (quantity, snapshot).
+        """
+        self._ensure_loaded(user)
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        pipe = self.redis_client.redis.pipeline(transaction=False)
+        pipe.hgetall(qty_key)
+        pipe.hgetall(lines_key)
+        quantities, snapshots = pipe.execute()
+        
+        return {
+            line_key: (int(quantity), json.loads(snapshots[line_key]))
+            for line_key, quantity in quantities.items()
+            if line_key in snapshots and int(quantity) > 0
+        }
+    
+    def _ensure_loaded(self, user):
+        """
+        Copy the user's cart from the database into Redis on first use.
+        """
+        qty_key, lines_key, loaded_key = self.get_keys(user.id)
+        if self.redis_client.redis.exists(loaded_key):
+            return
+        
+        def load(pipe):
+            # Another request finished loading while this one was waiting
+            if pipe.exists(loaded_key):
+                return
+            
+            items = list(CartItem.objects.filter(cart__user=user).select_related('product', 'variant'))
+            now = timezone.now().isoformat()
+            pipe.multi()
+            for item in items:
+                line_key = self.make_line_key(item.product_id, item.variant_id)
+                # Don't overwrite lines changed while the cart was loading
+                pipe.hsetnx(qty_key, line_key, item.quantity)
+                pipe.hsetnx(lines_key, line_key, json.dumps({
+                    'product_name': item.product.name_en,
+                    'variant_name': item.variant.name_en if item.variant else None,
+                    'unit_price': str(item.unit_price),
+                    'added_at': now,
+                }))
+            # The marker is only visible together with the lines it covers
+            pipe.set(loaded_key, 1, ex=self.timeout)
+            for key in (qty_key, lines_key):
+                pipe.expire(key, self.timeout)
+        
+        # Concurrent loaders race on the marker and only one copy is applied
+        self.redis_client.redis.transaction(load, loaded_key)
+
+
+def get_cart_store():
+    """
+    Get the cart store selected by the CART_BACKEND setting.
+    """
+    if settings.CART_BACKEND == 'redis':
+        return RedisCartStore()
+    return DatabaseCartStore()
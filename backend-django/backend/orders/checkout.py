@@ -0,0 +1,141 @@
+"""
+Checkout pipeline for the Fashion Hub project.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from django.db import connection, transaction
+from django.utils.translation import gettext_lazy as _
+
+from warehouses.reservations import InsufficientStock, reserve_stock
+from .cart_store import get_cart_store
+from .models import Order, OrderItem, CartItem
+
+# 14% VAT in Egypt
+TAX_RATE = Decimal('0.14')
+CENT = Decimal('0.01')
+
+
+class CheckoutError(Exception):
+    """
+    Raised when a cart can't be turned into an order.
+    """
+
+
+def next_order_id():
+    """
+    Allocate the next order ID from the order table's sequence.
+    
+    The ID doubles as the order number source, so numbers are unique
+    without counting or locking existing orders.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [Order._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+def format_order_number(order_id):
+    """
+    Build the customer-facing order number for an order ID.
+    """
+    return f"ORD-{order_id:08d}"
+
+
+def calculate_totals(cart_items, shipping_cost=Decimal('0')):
+    """
+    Price the cart in a single pass over preloaded items.
+    
+    Returns:
+        Tuple of (lines, totals) where lines pairs each cart item with its
+        unit price and subtotal
+    """
+    lines = []
+    subtotal = Decimal('0')
+    for item in cart_items:
+        unit_price = item.unit_price
+        line_total = unit_price * item.quantity
+        lines.append((item, unit_price, line_total))
+        subtotal += line_total
+    
+    tax = (subtotal * TAX_RATE).quantize(CENT, rounding=ROUND_HALF_UP)
+    shipping_cost = Decimal(shipping_cost)
+    return lines, {
+        'subtotal': subtotal,
+        'tax': tax,
+        'shipping_cost': shipping_cost,
+        'total': subtotal + tax + shipping_cost,
+    }
+
+
+def checkout(user, **order_data):
+    """
+    Turn a user's cart into an order in one transaction.
+    
+    The cart is loaded with its products and variants in one query, stock
+    is reserved for every line, items are inserted with one bulk insert
+    and the cart is emptied, so the cost doesn't grow with cart size.
+    
+    Args:
+        user: User checking out
+        order_data: Order fields (shipping address, method, warehouse, ...)
+    
+    Returns:
+        The created Order
+    
+    Raises:
+        CheckoutError: If the cart is empty or stock is insufficient
+    """
+    # Carts kept in Redis are written to the database before pricing
+    cart_store = get_cart_store()
+    cart_store.persist(user)
+    
+    cart_items = list(
+        CartItem.objects.filter(cart__user=user).select_related('product', 'variant').order_by('id')
+    )
+    if not cart_items:
+        raise CheckoutError(_("Your cart is empty."))
+    
+    lines, totals = calculate_totals(cart_items, order_data.pop('shipping_cost', Decimal('0')))
+    
+    with transaction.atomic():
+        order_id = next_order_id()
+        order = Order.objects.create(
+            id=order_id,
+            order_number=format_order_number(order_id),
+            user=user,
+            **totals,
+            **order_data
+        )
+        
+        # Reserve stock for every line, or fail the whole order
+        try:
+            reserve_stock(
+                order.warehouse,
+                [(item.product_id, item.variant_id, item.quantity) for item in cart_items],
+                order=order
+            )
+        except InsufficientStock:
+            raise CheckoutError(_("Not enough stock available."))
+        
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=item.product_id,
+                variant_id=item.variant_id,
+                quantity=item.quantity,
+                unit_price=unit_price,
+                subtotal=line_total,
+                product_name_en=item.product.name_en,
+                product_name_ar=item.product.name_ar,
+                variant_name_en=item.variant.name_en if item.variant else '',
+                variant_name_ar=item.variant.name_ar if item.variant else ''
+            )
+            for item, unit_price, line_total in lines
+        ])
+        
+        # Clear the cart
+        CartItem.objects.filter(id__in=[item.id for item in cart_items]).delete()
+        # Lines added to the cart since it was persisted are kept
+        ordered = [(item.product_id, item.variant_id, item.quantity) for item in cart_items]
+        transaction.on_commit(lambda: cart_store.forget(user, ordered))
+    
+    return order
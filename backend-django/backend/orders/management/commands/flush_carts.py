@@ -0,0 +1,18 @@
+"""
+Management command to persist Redis carts to the database.
+"""
+
+from django.core.management.base import BaseCommand
+
+from orders.cart_store import RedisCartStore
+
+
+class Command(BaseCommand):
+    help = "Write carts changed in Redis since the last flush to the Cart and CartItem tables."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Carts taken from Redis per round trip")
+    
+    def handle(self, *args, **options):
+        flushed = RedisCartStore().flush_dirty(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Persisted {flushed} carts."))
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('products', '0001_initial'),
+        ('staff', '0001_initial'),
+        ('users', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantity')),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Unit price')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Subtotal')),
+                ('product_name_en', models.CharField(max_length=255, verbose_name='Product name (English)')),
+                ('product_name_ar', models.CharField(max_length=255, verbose_name='Product name (Arabic)')),
+                ('variant_name_en', models.CharField(blank=True, max_length=100, verbose_name='Variant name (English)')),
+                ('variant_name_ar', models.CharField(blank=True, max_length=100, verbose_name='Variant name (Arabic)')),
+            ],
+            options={
+                'verbose_name': 'Order item',
+                'verbose_name_plural': 'Order items',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Cart',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cart', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Cart',
+                'verbose_name_plural': 'Carts',
+            },
+        ),
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quantity', models.PositiveIntegerField(default=1, verbose_name='Quantity')),
+                ('cart', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.cart')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='products.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='products.variant')),
+            ],
+            options={
+                'verbose_name': 'Cart item',
+                'verbose_name_plural': 'Cart items',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('order_number', models.CharField(max_length=50, unique=True, verbose_name='Order number')),
+                ('shipping_method', models.CharField(max_length=100, verbose_name='Shipping method')),
+                ('shipping_cost', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Shipping cost')),
+                ('payment_method', models.CharField(max_length=100, verbose_name='Payment method')),
+                ('payment_id', models.CharField(blank=True, max_length=100, verbose_name='Payment ID')),
+                ('is_paid', models.BooleanField(default=False, verbose_name='Is paid')),
+                ('paid_at', models.DateTimeField(blank=True, null=True, verbose_name='Paid at')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled'), ('refunded', 'Refunded')], default='pending', max_length=20, verbose_name='Status')),
+                ('subtotal', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Subtotal')),
+                ('tax', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Tax')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Discount')),
+                ('total', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Total')),
+                ('tracking_number', models.CharField(blank=True, max_length=100, verbose_name='Tracking number')),
+                ('tracking_url', models.URLField(blank=True, verbose_name='Tracking URL')),
+                ('customer_notes', models.TextField(blank=True, verbose_name='Customer notes')),
+                ('staff_notes', models.TextField(blank=True, verbose_name='Staff notes')),
+                ('assigned_to', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_orders', to='staff.staff')),
+                ('shipping_address', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='shipping_orders', to='users.address')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='orders', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Order',
+                'verbose_name_plural': 'Orders',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0001_initial'),
+        ('warehouses', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='warehouses.warehouse'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='orders.order'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='products.product'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='variant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='order_items', to='products.variant'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cartitem',
+            unique_together={('cart', 'product', 'variant')},
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_number'], name='orders_orde_order_n_f3ada5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user'], name='orders_orde_user_id_a87c6f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status'], name='orders_orde_status_c6dd84_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['is_paid'], name='orders_orde_is_paid_921844_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'id'], name='orders_orde_created_0fb29d_idx'),
+        ),
+    ]
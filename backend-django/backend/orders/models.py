@@ -2,7 +2,9 @@
 Order models for the Fashion Hub project.
 """
 
+from decimal import Decimal
 from django.db import models
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from common.models import TimeStampedModel
@@ -73,7 +75,7 @@ class Order(TimeStampedModel):
             models.Index(fields=['user']),
             models.Index(fields=['status']),
             models.Index(fields=['is_paid']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -135,19 +137,31 @@ class Cart(TimeStampedModel):
     def __str__(self):
         return f"Cart for {self.user.email}"
     
+    @cached_property
+    def line_items(self):
+        """
+        Get the cart items with their products and variants, loaded once.
+        
+        Uses items prefetched with select_related('product', 'variant')
+        when available, so totals and serialization share one query.
+        """
+        if 'items' in getattr(self, '_prefetched_objects_cache', {}):
+            return list(self.items.all())
+        return list(self.items.select_related('product', 'variant'))
+    
     @property
     def total_items(self):
         """
         Get the total number of items in the cart.
         """
-        return self.items.count()
+        return len(self.line_items)
     
     @property
     def subtotal(self):
         """
         Calculate the cart subtotal.
         """
-        return sum(item.subtotal for item in self.items.all())
+        return sum((item.subtotal for item in self.line_items), Decimal('0'))
 
 
 class CartItem(TimeStampedModel):
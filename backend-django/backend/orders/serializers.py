@@ -6,6 +6,7 @@ from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
 
 from common.serializers import DynamicFieldsModelSerializer
+from .checkout import CheckoutError, checkout
 from .models import Order, OrderItem, Cart, CartItem
 
 
@@ -65,54 +66,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         """
         Create a new order from the user's cart.
         """
-        user = self.context['request'].user
-        
-        # Get the user's cart
         try:
-            cart = Cart.objects.get(user=user)
-        except Cart.DoesNotExist:
-            raise serializers.ValidationError(_("You don't have any items in your cart."))
-        
-        # Check if cart has items
-        if cart.items.count() == 0:
-            raise serializers.ValidationError(_("Your cart is empty."))
-        
-        # Calculate order totals
-        subtotal = cart.subtotal
-        tax = subtotal * 0.14  # 14% VAT in Egypt
-        shipping_cost = validated_data.get('shipping_cost', 0)
-        total = subtotal + tax + shipping_cost
-        
-        # Create the order
-        order = Order.objects.create(
-            user=user,
-            order_number=f"ORD-{user.id}-{Order.objects.filter(user=user).count() + 1}",
-            subtotal=subtotal,
-            tax=tax,
-            shipping_cost=shipping_cost,
-            total=total,
-            **validated_data
-        )
-        
-        # Create order items from cart items
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                variant=cart_item.variant,
-                quantity=cart_item.quantity,
-                unit_price=cart_item.unit_price,
-                subtotal=cart_item.subtotal,
-                product_name_en=cart_item.product.name_en,
-                product_name_ar=cart_item.product.name_ar,
-                variant_name_en=cart_item.variant.name_en if cart_item.variant else '',
-                variant_name_ar=cart_item.variant.name_ar if cart_item.variant else ''
-            )
-        
-        # Clear the cart
-        cart.items.all().delete()
-        
-        return order
+            return checkout(self.context['request'].user, **validated_data)
+        except CheckoutError as e:
+            raise serializers.ValidationError(str(e))
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -215,6 +172,12 @@ class AddToCartSerializer(serializers.Serializer):
             # Check if variant has enough stock
             if variant.stock_quantity < attrs.get('quantity'):
                 raise serializers.ValidationError(_("Not enough stock available."))
+        else:
+            variant = None
+        
+        # Keep the loaded objects so the view doesn't fetch them again
+        attrs['product'] = product
+        attrs['variant'] = variant
         
         return attrs
 
@@ -10,6 +10,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.utils.translation import gettext_lazy as _
 
 from common.permissions import IsStoreOwnerOrManager, IsStoreStaff
+from .cart_store import get_cart_store
+from warehouses.reservations import commit_order_stock, release_order_stock
 from .models import Order, OrderItem, Cart, CartItem
 from .serializers import (
     OrderSerializer, OrderItemSerializer, OrderCreateSerializer,
@@ -59,17 +61,23 @@ class OrderViewSet(viewsets.ModelViewSet):
         Update the order status.
         """
         order = self.get_object()
-        status = request.data.get('status')
+        new_status = request.data.get('status')
         
-        if not status:
+        if not new_status:
             return Response({'detail': _('Status is required.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        if status not in dict(Order._meta.get_field('status').choices).keys():
+        if new_status not in dict(Order._meta.get_field('status').choices).keys():
             return Response({'detail': _('Invalid status.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        order.status = status
+        order.status = new_status
         order.save()
         
+        # Settle the stock reserved at checkout
+        if new_status == 'shipped':
+            commit_order_stock(order)
+        elif new_status in ['cancelled', 'refunded']:
+            release_order_stock(order)
+        
         return Response({'detail': _('Order status updated.')}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
@@ -152,9 +160,7 @@ class CartViewSet(viewsets.GenericViewSet):
         """
         Get the current user's cart.
         """
-        cart = self.get_object()
-        serializer = self.get_serializer(cart)
-        return Response(serializer.data)
+        return Response(get_cart_store().get_cart_data(request.user, self.get_serializer_context()))
     
     @action(detail=False, methods=['post'])
     def add_item(self, request):
@@ -163,28 +169,12 @@ class CartViewSet(viewsets.GenericViewSet):
         """
         serializer = AddToCartSerializer(data=request.data)
         if serializer.is_valid():
-            cart = self.get_object()
-            product_id = serializer.validated_data['product_id']
-            variant_id = serializer.validated_data.get('variant_id')
-            quantity = serializer.validated_data['quantity']
-            
-            from products.models import Product, Variant
-            
-            product = Product.objects.get(id=product_id)
-            variant = Variant.objects.get(id=variant_id) if variant_id else None
-            
-            # Check if item already exists in cart
-            try:
-                cart_item = CartItem.objects.get(cart=cart, product=product, variant=variant)
-                cart_item.quantity += quantity
-                cart_item.save()
-            except CartItem.DoesNotExist:
-                CartItem.objects.create(
-                    cart=cart,
-                    product=product,
-                    variant=variant,
-                    quantity=quantity
-                )
+            get_cart_store().add_item(
+                request.user,
+                serializer.validated_data['product'],
+                serializer.validated_data['variant'],
+                serializer.validated_data['quantity']
+            )
             
             return Response({'detail': _('Item added to cart.')}, status=status.HTTP_201_CREATED)
         
@@ -200,16 +190,15 @@ class CartViewSet(viewsets.GenericViewSet):
         if not item_id:
             return Response({'detail': _('Item ID is required.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart__user=request.user)
-        except CartItem.DoesNotExist:
+        cart_store = get_cart_store()
+        cart_item = cart_store.get_item(request.user, item_id)
+        if cart_item is None:
             return Response({'detail': _('Cart item not found.')}, status=status.HTTP_404_NOT_FOUND)
         
         serializer = UpdateCartItemSerializer(data=request.data, context={'cart_item': cart_item})
         
         if serializer.is_valid():
-            cart_item.quantity = serializer.validated_data['quantity']
-            cart_item.save()
+            cart_store.set_quantity(request.user, item_id, serializer.validated_data['quantity'])
             
             return Response({'detail': _('Cart item updated.')}, status=status.HTTP_200_OK)
         
@@ -225,13 +214,9 @@ class CartViewSet(viewsets.GenericViewSet):
         if not item_id:
             return Response({'detail': _('Item ID is required.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            cart_item = CartItem.objects.get(id=item_id, cart__user=request.user)
-        except CartItem.DoesNotExist:
+        if not get_cart_store().remove_item(request.user, item_id):
             return Response({'detail': _('Cart item not found.')}, status=status.HTTP_404_NOT_FOUND)
         
-        cart_item.delete()
-        
         return Response({'detail': _('Item removed from cart.')}, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['post'])
@@ -239,7 +224,6 @@ class CartViewSet(viewsets.GenericViewSet):
         """
         Clear the cart.
         """
-        cart = self.get_object()
-        cart.items.all().delete()
+        get_cart_store().clear(request.user)
         
         return Response({'detail': _('Cart cleared.')}, status=status.HTTP_200_OK)
@@ -0,0 +1,38 @@
+"""
+Management command to apply queued Paymob webhooks.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import os
+import socket
+
+from payments.webhooks import WebhookQueue
+
+
+class Command(BaseCommand):
+    help = "Apply Paymob webhook events queued by the webhook endpoint. Run several for a worker pool."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', default=None, help="Unique worker name (default: host and PID)")
+        parser.add_argument('--block', type=int, default=5000, help="Milliseconds to wait for new events")
+        parser.add_argument('--once', action='store_true', help="Apply one batch and exit")
+    
+    def handle(self, *args, **options):
+        queue = WebhookQueue()
+        consumer = options['consumer'] or f"{socket.gethostname()}-{os.getpid()}"
+        
+        while True:
+            stats = queue.process(consumer, block_ms=options['block'])
+            close_old_connections()
+            
+            if any(stats.values()):
+                self.stdout.write(
+                    f"Applied {stats['applied']}, duplicate {stats['duplicate']}, "
+                    f"unmatched {stats['unmatched']}, failed {stats['failed']}, dead-lettered {stats['dead']}"
+                )
+            
+            if options['once']:
+                break
+        
+        self.stdout.write(self.style.SUCCESS("Webhook worker stopped."))
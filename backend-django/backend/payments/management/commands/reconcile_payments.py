@@ -0,0 +1,46 @@
+"""
+Management command to reconcile payments against a Paymob transaction export.
+"""
+
+from django.core.management.base import BaseCommand
+import sys
+
+from payments.reconciliation import Reconciler, read_rows
+
+
+class Command(BaseCommand):
+    help = "Reconcile payments against a Paymob transaction export (CSV, JSON array or JSON Lines)."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Transaction export file")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help="File format (default: from the extension)")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows matched and corrected per transaction")
+        parser.add_argument('--apply', action='store_true', help="Save status corrections instead of only reporting them")
+        parser.add_argument('--report', default=None, help="Write the discrepancy report to this CSV file ('-' for stdout)")
+    
+    def handle(self, *args, **options):
+        report_path = options['report']
+        report = None
+        
+        if report_path == '-':
+            report = sys.stdout
+        elif report_path:
+            report = open(report_path, 'w', newline='', encoding='utf-8')
+        
+        try:
+            reconciler = Reconciler(apply=options['apply'], batch_size=options['batch_size'], report=report)
+            stats = reconciler.run(read_rows(options['path'], options['format']))
+        finally:
+            if report is not None and report is not sys.stdout:
+                report.close()
+        
+        self.stdout.write(
+            f"Checked {stats['rows']} rows: {stats['matched']} matched, {stats['unmatched']} unmatched, "
+            f"{stats['amount_mismatch']} amount mismatches, {stats['status_mismatch']} status mismatches, "
+            f"{stats['missing_success'] + stats['missing_failure']} stale statuses."
+        )
+        
+        if options['apply']:
+            self.stdout.write(self.style.SUCCESS(f"Corrected {stats['corrected']} payments."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Dry run, no payments changed (use --apply to correct)."))
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('subscriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('headers', models.JSONField()),
+                ('status_code', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('idempotency_key', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('payment_id', models.CharField(max_length=100, unique=True, verbose_name='Payment ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Amount')),
+                ('currency', models.CharField(default='EGP', max_length=3, verbose_name='Currency')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20, verbose_name='Status')),
+                ('payment_method', models.CharField(max_length=50, verbose_name='Payment method')),
+                ('paymob_transaction_id', models.CharField(blank=True, max_length=100, verbose_name='Paymob transaction ID')),
+                ('paymob_order_id', models.CharField(blank=True, max_length=100, verbose_name='Paymob order ID')),
+                ('response_data', models.JSONField(blank=True, default=dict, verbose_name='Response data')),
+                ('error_message', models.TextField(blank=True, verbose_name='Error message')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='orders.order')),
+            ],
+            options={
+                'verbose_name': 'Payment',
+                'verbose_name_plural': 'Payments',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['payment_id'], name='payments_pa_payment_6c9e39_idx'), models.Index(fields=['order'], name='payments_pa_order_i_1d1c93_idx'), models.Index(fields=['status'], name='payments_pa_status_7ad4af_idx'), models.Index(fields=['created_at', 'id'], name='payments_pa_created_af5130_idx'), models.Index(condition=models.Q(('paymob_transaction_id', ''), _negated=True), fields=['paymob_transaction_id'], name='payment_paymob_txn_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('paymob_order_id', ''), _negated=True), fields=('paymob_order_id',), name='payment_paymob_order_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubscriptionPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('payment_id', models.CharField(max_length=100, unique=True, verbose_name='Payment ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Amount')),
+                ('currency', models.CharField(default='EGP', max_length=3, verbose_name='Currency')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('failed', 'Failed'), ('refunded', 'Refunded')], default='pending', max_length=20, verbose_name='Status')),
+                ('payment_method', models.CharField(max_length=50, verbose_name='Payment method')),
+                ('paymob_transaction_id', models.CharField(blank=True, max_length=100, verbose_name='Paymob transaction ID')),
+                ('paymob_order_id', models.CharField(blank=True, max_length=100, verbose_name='Paymob order ID')),
+                ('response_data', models.JSONField(blank=True, default=dict, verbose_name='Response data')),
+                ('error_message', models.TextField(blank=True, verbose_name='Error message')),
+                ('billing_period_start', models.DateTimeField(verbose_name='Billing period start')),
+                ('billing_period_end', models.DateTimeField(verbose_name='Billing period end')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='subscriptions.subscription')),
+            ],
+            options={
+                'verbose_name': 'Subscription payment',
+                'verbose_name_plural': 'Subscription payments',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['payment_id'], name='payments_su_payment_9ca518_idx'), models.Index(fields=['subscription'], name='payments_su_subscri_d82bf7_idx'), models.Index(fields=['status'], name='payments_su_status_ed850e_idx'), models.Index(fields=['created_at', 'id'], name='payments_su_created_3f153c_idx'), models.Index(condition=models.Q(('paymob_transaction_id', ''), _negated=True), fields=['paymob_transaction_id'], name='sub_payment_paymob_txn_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('paymob_order_id', ''), _negated=True), fields=('paymob_order_id',), name='sub_payment_paymob_order_uniq')],
+            },
+        ),
+    ]
@@ -54,7 +54,20 @@ class Payment(TimeStampedModel):
             models.Index(fields=['payment_id']),
             models.Index(fields=['order']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(
+                fields=['paymob_transaction_id'],
+                condition=~models.Q(paymob_transaction_id=''),
+                name='payment_paymob_txn_idx'
+            ),
+        ]
+        constraints = [
+            # A Paymob order belongs to one payment; blank until registered
+            models.UniqueConstraint(
+                fields=['paymob_order_id'],
+                condition=~models.Q(paymob_order_id=''),
+                name='payment_paymob_order_uniq'
+            ),
         ]
     
     def __str__(self):
@@ -111,7 +124,19 @@ class SubscriptionPayment(TimeStampedModel):
             models.Index(fields=['payment_id']),
             models.Index(fields=['subscription']),
             models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(
+                fields=['paymob_transaction_id'],
+                condition=~models.Q(paymob_transaction_id=''),
+                name='sub_payment_paymob_txn_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['paymob_order_id'],
+                condition=~models.Q(paymob_order_id=''),
+                name='sub_payment_paymob_order_uniq'
+            ),
         ]
     
     def __str__(self):
@@ -124,5 +149,8 @@ class WebhookLog(models.Model):
     headers = models.JSONField()
     status_code = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # One row per gateway event; set once the event has been applied
+    idempotency_key = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
     def __str__(self):
         return f"{self.event_type} - {self.created_at}"
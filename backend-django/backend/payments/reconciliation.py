@@ -0,0 +1,322 @@
+"""
+Paymob settlement reconciliation for the Fashion Hub project.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from itertools import islice
+import csv
+import json
+import logging
+import re
+
+from .models import Payment, SubscriptionPayment
+from .references import find_payments
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_row(row):
+    """
+    Normalize a settlement row to the fields reconciliation uses.
+    
+    Header names are matched case-insensitively, with spaces treated as
+    underscores, so both API field names and report headings work.
+    
+    Args:
+        row: Dictionary read from a settlement file
+    
+    Returns:
+        Dictionary with order_id, transaction_id, success and amount_cents
+    """
+    row = {str(key).strip().lower().replace(' ', '_'): value for key, value in row.items()}
+    
+    def first(*names):
+        for name in names:
+            value = row.get(name)
+            if value not in (None, ''):
+                return str(value).strip()
+        return ''
+    
+    success = first('success', 'is_success')
+    amount_cents = first('amount_cents')
+    
+    return {
+        'order_id': first('order_id', 'order'),
+        'transaction_id': first('transaction_id', 'id'),
+        'success': success.lower() in ('true', '1', 'yes', 'success') if success else None,
+        'amount_cents': int(float(amount_cents)) if amount_cents else None,
+    }
+
+
+def read_csv(path):
+    """
+    Stream normalized rows from a CSV settlement file.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield normalize_row(row)
+
+
+def read_json(path, chunk_size=65536):
+    """
+    Stream normalized rows from a JSON array or JSON Lines file.
+    
+    The file is decoded an object at a time, so memory use depends on the
+    chunk size rather than the file size.
+    """
+    decoder = json.JSONDecoder()
+    # Whitespace and the array punctuation between objects
+    separators = re.compile(r'[\s,\[\]]*')
+    
+    with open(path, encoding='utf-8-sig') as f:
+        buffer, pos = '', 0
+        while True:
+            chunk = f.read(chunk_size)
+            buffer, pos = buffer[pos:] + chunk, 0
+            while True:
+                pos = separators.match(buffer, pos).end()
+                if pos == len(buffer):
+                    break
+                try:
+                    row, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # An object cut off by the chunk boundary
+                    if not chunk:
+                        raise
+                    break
+                yield normalize_row(row)
+                pos = end
+            if not chunk:
+                return
+
+
+def read_rows(path, file_format=None):
+    """
+    Stream normalized rows from a settlement file.
+    
+    Args:
+        path: CSV, JSON array or JSON Lines file
+        file_format: 'csv' or 'json' (default: from the file extension)
+    """
+    file_format = file_format or ('csv' if str(path).lower().endswith('.csv') else 'json')
+    return read_csv(path) if file_format == 'csv' else read_json(path)
+
+
+def batched(iterable, size):
+    """
+    Split an iterable into lists of at most size items.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def match_rows(rows, batch_size=1000):
+    """
+    Match settlement rows to payments, a batch at a time.
+    
+    Each batch costs at most four indexed IN queries: by Paymob order ID on
+    both payment tables, then by transaction ID for rows still unmatched.
+    
+    Args:
+        rows: Normalized settlement rows
+        batch_size: Rows resolved per round of queries
+    
+    Yields:
+        Lists of (row, payment or None) pairs, one list per batch
+    """
+    for batch in batched(rows, batch_size):
+        by_order = find_payments(row['order_id'] for row in batch)
+        unmatched = [row['transaction_id'] for row in batch if row['order_id'] not in by_order]
+        by_transaction = find_payments(unmatched, field='paymob_transaction_id') if unmatched else {}
+        
+        yield [
+            (row, by_order.get(row['order_id']) or by_transaction.get(row['transaction_id']))
+            for row in batch
+        ]
+
+
+class Reconciler:
+    """
+    Compare gateway transactions with recorded payments.
+    
+    Rows are matched and corrected one batch at a time, and discrepancies
+    are written to the report as they are found, so memory use doesn't
+    grow with the size of the export. Only clear-cut differences are
+    corrected: a gateway success recorded as pending or failed, and a
+    gateway failure still recorded as pending. Everything else is reported
+    for review.
+    """
+    report_fields = ['issue', 'order_id', 'transaction_id', 'payment_id', 'gateway_status', 'recorded_status',
+                     'gateway_amount_cents', 'recorded_amount_cents']
+    
+    # Issues corrected automatically, and the status they correct to
+    corrections = {
+        'missing_success': 'success',
+        'missing_failure': 'failed',
+    }
+    
+    def __init__(self, apply=False, batch_size=1000, report=None):
+        """
+        Initialize the reconciler.
+        
+        Args:
+            apply: Save status corrections (default: report only)
+            batch_size: Rows matched and corrected per transaction
+            report: Open text file the discrepancy CSV is written to
+        """
+        self.apply = apply
+        self.batch_size = batch_size
+        self.report = None
+        self.stats = {
+            'rows': 0, 'matched': 0, 'unmatched': 0, 'amount_mismatch': 0, 'status_mismatch': 0,
+            'missing_success': 0, 'missing_failure': 0, 'corrected': 0,
+        }
+        
+        if report is not None:
+            self.report = csv.DictWriter(report, fieldnames=self.report_fields)
+            self.report.writeheader()
+    
+    @staticmethod
+    def compare(row, payment):
+        """
+        Classify a gateway row against its payment.
+        
+        Args:
+            row: Normalized settlement row
+            payment: Matched Payment or SubscriptionPayment, or None
+        
+        Returns:
+            Issue name, or None if the payment agrees with the gateway
+        """
+        if payment is None:
+            return 'unmatched'
+        
+        if row['amount_cents'] is not None and row['amount_cents'] != int(payment.amount * 100):
+            return 'amount_mismatch'
+        
+        if row['success'] is None:
+            return None
+        
+        if row['success']:
+            return 'missing_success' if payment.status in ('pending', 'failed') else None
+        
+        if payment.status == 'pending':
+            return 'missing_failure'
+        
+        # The gateway failed the very transaction recorded as successful
+        if payment.status == 'success' and payment.paymob_transaction_id == row['transaction_id']:
+            return 'status_mismatch'
+        
+        return None
+    
+    def write_report(self, issue, row, payment):
+        if self.report is None:
+            return
+        
+        gateway_status = '' if row['success'] is None else ('success' if row['success'] else 'failed')
+        self.report.writerow({
+            'issue': issue,
+            'order_id': row['order_id'],
+            'transaction_id': row['transaction_id'],
+            'payment_id': payment.payment_id if payment else '',
+            'gateway_status': gateway_status,
+            'recorded_status': payment.status if payment else '',
+            'gateway_amount_cents': '' if row['amount_cents'] is None else row['amount_cents'],
+            'recorded_amount_cents': int(payment.amount * 100) if payment else '',
+        })
+    
+    def run(self, rows):
+        """
+        Reconcile a stream of normalized rows.
+        
+        Returns:
+            Dictionary of row, issue and correction counts
+        """
+        for pairs in match_rows(rows, self.batch_size):
+            # One correction per payment; a success beats failed attempts
+            pending = {}
+            
+            for row, payment in pairs:
+                self.stats['rows'] += 1
+                issue = self.compare(row, payment)
+                
+                if payment is not None:
+                    self.stats['matched'] += 1
+                if issue is None:
+                    continue
+                
+                self.stats[issue] += 1
+                self.write_report(issue, row, payment)
+                if issue in self.corrections:
+                    key = (type(payment), payment.pk)
+                    if key not in pending or self.corrections[issue] == 'success':
+                        pending[key] = (payment, self.corrections[issue], row['transaction_id'])
+            
+            if pending and self.apply:
+                self.stats['corrected'] += self.save_corrections(list(pending.values()))
+        
+        return self.stats
+    
+    def save_corrections(self, pending):
+        """
+        Save a batch of status corrections with bulk updates.
+        
+        Payments whose status changed since they were matched (e.g. by a
+        webhook) are skipped.
+        
+        Args:
+            pending: List of (payment, new status, transaction ID) tuples
+        
+        Returns:
+            Number of payments corrected
+        """
+        from orders.models import Order
+        from subscriptions.models import Subscription
+        
+        now = timezone.now()
+        corrected = 0
+        
+        with transaction.atomic():
+            for model in (Payment, SubscriptionPayment):
+                batch = [item for item in pending if isinstance(item[0], model)]
+                if not batch:
+                    continue
+                
+                current = dict(
+                    model.objects.select_for_update()
+                    .filter(pk__in=[payment.pk for payment, _, _ in batch])
+                    .values_list('pk', 'status')
+                )
+                
+                payments = []
+                for payment, status, transaction_id in batch:
+                    if current.get(payment.pk) != payment.status:
+                        continue
+                    payment.status = status
+                    if status == 'success' and transaction_id:
+                        payment.paymob_transaction_id = transaction_id
+                    payment.updated_at = now
+                    payments.append(payment)
+                
+                model.objects.bulk_update(payments, ['status', 'paymob_transaction_id', 'updated_at'])
+                corrected += len(payments)
+                
+                successful = [payment for payment in payments if payment.status == 'success']
+                if model is Payment:
+                    Order.objects.bulk_update(
+                        [
+                            Order(pk=payment.order_id, is_paid=True, paid_at=now,
+                                  payment_id=payment.payment_id, updated_at=now)
+                            for payment in successful
+                        ],
+                        ['is_paid', 'paid_at', 'payment_id', 'updated_at']
+                    )
+                elif successful:
+                    Subscription.objects.filter(
+                        pk__in=[payment.subscription_id for payment in successful]
+                    ).update(is_active=True, updated_at=now)
+        
+        logger.info(f"Reconciliation corrected {corrected} payments")
+        return corrected
@@ -0,0 +1,125 @@
+"""
+Gateway reference lookups for the Fashion Hub project.
+"""
+
+from django.db import connection
+from django.db.models import Value
+
+from .models import Payment, SubscriptionPayment
+
+# Every model that stores Paymob references, most frequent first
+PAYMENT_MODELS = (Payment, SubscriptionPayment)
+
+REFERENCE_FIELDS = ('paymob_order_id', 'paymob_transaction_id')
+
+# Columns both payment models share, selected in the same order from each
+SHARED_FIELDS = (
+    'id', 'created_at', 'updated_at', 'payment_id', 'amount', 'currency', 'status', 'payment_method',
+    'paymob_transaction_id', 'paymob_order_id', 'response_data', 'error_message',
+)
+
+# The column each model points at its order or subscription with
+OWNER_FIELDS = {Payment: 'order_id', SubscriptionPayment: 'subscription_id'}
+
+
+def _select_payments(field, lookup, value, for_update=False):
+    """
+    Fetch payments of both types by a gateway reference in one query.
+    
+    Each model contributes one branch of a UNION ALL, so every branch is
+    a scan of that model's partial index. Branches lock their own rows
+    when for_update is set, since Postgres doesn't allow FOR UPDATE on a
+    UNION itself. Fields only one model has (the billing period) are
+    deferred.
+    
+    Args:
+        field: 'paymob_order_id' or 'paymob_transaction_id'
+        lookup: Field lookup, e.g. 'exact' or 'in'
+        value: Lookup value
+        for_update: Lock the payment rows until the transaction ends
+    
+    Returns:
+        List of payments, Payment rows before SubscriptionPayment rows
+    """
+    branches = []
+    params = []
+    
+    for kind, model in enumerate(PAYMENT_MODELS):
+        # The exclude repeats the partial index condition so Postgres can
+        # use the index for IN lists of any length
+        queryset = (
+            model.objects.filter(**{f'{field}__{lookup}': value})
+            .exclude(**{field: ''})
+            .annotate(kind=Value(kind))
+            .values_list('kind', *SHARED_FIELDS, OWNER_FIELDS[model])
+            .order_by()
+        )
+        if for_update:
+            queryset = queryset.select_for_update(of=('self',))
+        sql, branch_params = queryset.query.sql_with_params()
+        branches.append(f'SELECT * FROM ({sql}) AS {model._meta.db_table}')
+        params.extend(branch_params)
+    
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(branches) + ' ORDER BY 1', params)
+        rows = cursor.fetchall()
+    
+    payments = []
+    for kind, *values in rows:
+        model = PAYMENT_MODELS[kind]
+        row = dict(zip(SHARED_FIELDS + (OWNER_FIELDS[model],), values))
+        
+        # Raw rows skip the ORM's converters, e.g. JSON decoding
+        for name, value in row.items():
+            from_db_value = getattr(model._meta.get_field(name), 'from_db_value', None)
+            if from_db_value is not None and value is not None:
+                row[name] = from_db_value(value, None, connection)
+        
+        field_names = [f.attname for f in model._meta.concrete_fields if f.attname in row]
+        payments.append(model.from_db(connection.alias, field_names, [row[name] for name in field_names]))
+    
+    return payments
+
+
+def find_payment(paymob_order_id, for_update=False):
+    """
+    Find the Payment or SubscriptionPayment registered for a Paymob order.
+    
+    Both payment types are probed in a single UNION ALL query over their
+    unique paymob_order_id indexes.
+    
+    Args:
+        paymob_order_id: Paymob order ID
+        for_update: Lock the payment row until the transaction ends
+    
+    Returns:
+        Payment, SubscriptionPayment or None
+    """
+    payments = _select_payments('paymob_order_id', 'exact', str(paymob_order_id), for_update)
+    return payments[0] if payments else None
+
+
+def find_payments(references, field='paymob_order_id'):
+    """
+    Resolve many gateway references across both payment types.
+    
+    Args:
+        references: Paymob order or transaction IDs
+        field: 'paymob_order_id' or 'paymob_transaction_id'
+    
+    Returns:
+        Dictionary mapping each matched reference to its payment
+    """
+    if field not in REFERENCE_FIELDS:
+        raise ValueError(f"Unknown gateway reference field: {field}")
+    
+    references = {str(reference) for reference in references if reference}
+    if not references:
+        return {}
+    
+    matches = {}
+    for payment in _select_payments(field, 'in', references):
+        # A Payment wins over a SubscriptionPayment with the same reference
+        matches.setdefault(getattr(payment, field), payment)
+    
+    return matches
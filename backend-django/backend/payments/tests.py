@@ -0,0 +1,124 @@
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from stores.models import Store
+from subscriptions.models import Subscription
+from .models import Payment, SubscriptionPayment
+from .reconciliation import Reconciler, read_csv, read_json
+from .references import find_payment, find_payments
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+class SettlementFileTests(SimpleTestCase):
+    """
+    Test cases for reading Paymob transaction exports.
+    """
+    
+    def test_csv_rows_are_normalized(self):
+        """
+        Test that report headings are mapped to reconciliation fields.
+        """
+        rows = list(read_csv(FIXTURES / 'paymob_transactions.csv'))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0], {'order_id': '5001', 'transaction_id': '9001', 'success': True, 'amount_cents': 15000})
+        self.assertFalse(rows[1]['success'])
+        self.assertEqual(rows[3]['order_id'], '')
+    
+    def test_json_is_streamed_across_chunks(self):
+        """
+        Test that a JSON array read in small chunks matches the CSV export.
+        """
+        rows = list(read_json(FIXTURES / 'paymob_transactions.json', chunk_size=16))
+        self.assertEqual(rows, list(read_csv(FIXTURES / 'paymob_transactions.csv')))
+
+
+class ReconcilerTests(SimpleTestCase):
+    """
+    Test cases for classifying gateway rows against payments.
+    """
+    
+    def make_row(self, success, amount_cents=15000, transaction_id='9001'):
+        return {'order_id': '5001', 'transaction_id': transaction_id, 'success': success, 'amount_cents': amount_cents}
+    
+    def test_compare(self):
+        """
+        Test that only clear-cut differences are marked for correction.
+        """
+        pending = Payment(payment_id='PAY-1', amount=Decimal('150.00'), status='pending')
+        paid = Payment(payment_id='PAY-2', amount=Decimal('150.00'), status='success', paymob_transaction_id='9001')
+        
+        self.assertEqual(Reconciler.compare(self.make_row(True), None), 'unmatched')
+        self.assertEqual(Reconciler.compare(self.make_row(True, amount_cents=100), pending), 'amount_mismatch')
+        self.assertEqual(Reconciler.compare(self.make_row(True), pending), 'missing_success')
+        self.assertEqual(Reconciler.compare(self.make_row(False), pending), 'missing_failure')
+        self.assertIsNone(Reconciler.compare(self.make_row(True), paid))
+        self.assertIsNone(Reconciler.compare(self.make_row(False, transaction_id='8000'), paid))
+        self.assertEqual(Reconciler.compare(self.make_row(False), paid), 'status_mismatch')
+    
+    def test_report_lists_discrepancies(self):
+        """
+        Test that discrepancies are written to the report as CSV rows.
+        """
+        report = StringIO()
+        reconciler = Reconciler(report=report)
+        reconciler.write_report('unmatched', self.make_row(True), None)
+        
+        lines = report.getvalue().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'issue')
+        self.assertEqual(lines[1], 'unmatched,5001,9001,,success,,15000,')
+
+
+class ReferenceLookupTests(TestCase):
+    """
+    Test cases for resolving Paymob references to payments.
+    """
+    
+    def setUp(self):
+        store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        subscription = Subscription.objects.create(store=store, price=Decimal('500.00'))
+        self.payment = SubscriptionPayment.objects.create(
+            payment_id='SUB-1', subscription=subscription, amount=Decimal('500.00'), payment_method='card',
+            paymob_order_id='7001', paymob_transaction_id='8001', response_data={'id': 8001},
+            billing_period_start=timezone.now(), billing_period_end=timezone.now()
+        )
+    
+    def test_subscription_payment_is_found_in_one_query(self):
+        """
+        Test that a subscription payment resolves with a single locking query.
+        """
+        with transaction.atomic(), self.assertNumQueries(1):
+            payment = find_payment(7001, for_update=True)
+        
+        self.assertIsInstance(payment, SubscriptionPayment)
+        self.assertEqual(payment.pk, self.payment.pk)
+        self.assertEqual(payment.subscription_id, self.payment.subscription_id)
+        self.assertEqual(payment.response_data, {'id': 8001})
+        self.assertEqual(payment.amount, Decimal('500.00'))
+    
+    def test_found_payment_can_be_saved(self):
+        """
+        Test that a resolved payment saves its updated fields.
+        """
+        payment = find_payment('7001')
+        payment.status = 'success'
+        payment.save(update_fields=['status', 'updated_at'])
+        
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'success')
+        self.assertIsNotNone(self.payment.billing_period_start)
+    
+    def test_find_payments_skips_unknown_and_blank_references(self):
+        """
+        Test that bulk lookups return only matched references.
+        """
+        self.assertIsNone(find_payment('9999'))
+        self.assertEqual(find_payments(['', '9999']), {})
+        matches = find_payments(['8001', '9999'], field='paymob_transaction_id')
+        self.assertEqual(list(matches), ['8001'])
+        self.assertEqual(matches['8001'].pk, self.payment.pk)
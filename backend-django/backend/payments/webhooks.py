@@ -0,0 +1,233 @@
+"""
+Paymob webhook processing for the Fashion Hub project.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+import json
+import logging
+
+from common.streams import StreamQueue
+from .models import Payment, WebhookLog
+from .references import find_payment
+
+logger = logging.getLogger(__name__)
+
+
+def get_idempotency_key(payload):
+    """
+    Get the key that identifies a webhook event across Paymob retries.
+    
+    Args:
+        payload: Webhook request data
+    
+    Returns:
+        Key built from the Paymob transaction ID, or None if it is missing
+    """
+    transaction_data = payload.get('obj') or {}
+    transaction_id = transaction_data.get('id')
+    
+    if not transaction_id:
+        return None
+    
+    return f"paymob:{transaction_id}"
+
+
+def apply_webhook_event(key, payload, headers=None):
+    """
+    Apply a Paymob transaction callback exactly once.
+    
+    The WebhookLog row for the idempotency key, the payment and the order or
+    subscription are all written in one transaction. A redelivered event
+    finds the processed log row and changes nothing.
+    
+    Args:
+        key: Idempotency key from get_idempotency_key()
+        payload: Webhook request data
+        headers: Request headers, kept on the log row
+    
+    Returns:
+        'applied', 'duplicate' or 'unmatched'
+    """
+    transaction_data = payload.get('obj') or {}
+    paymob_order_id = (transaction_data.get('order') or {}).get('id')
+    success = bool(transaction_data.get('success'))
+    
+    with transaction.atomic():
+        log, created = WebhookLog.objects.get_or_create(
+            idempotency_key=key,
+            defaults={
+                'event_type': 'paymob',
+                'payload': payload,
+                'headers': headers or {},
+                'status_code': 0
+            }
+        )
+        
+        if not created:
+            # Wait for a concurrent worker holding the same event
+            log = WebhookLog.objects.select_for_update().get(pk=log.pk)
+            if log.processed_at:
+                return 'duplicate'
+        
+        payment = find_payment(paymob_order_id, for_update=True) if paymob_order_id else None
+        
+        if payment is None:
+            log.status_code = 404
+            log.processed_at = timezone.now()
+            log.save(update_fields=['status_code', 'processed_at'])
+            logger.warning(f"Paymob webhook {key} matches no payment (order {paymob_order_id})")
+            return 'unmatched'
+        
+        # A late failed attempt never undoes a successful payment
+        if success or payment.status != 'success':
+            payment.status = 'success' if success else 'failed'
+            payment.paymob_transaction_id = str(transaction_data.get('id'))
+        payment.response_data.update(transaction_data)
+        payment.save(update_fields=['status', 'paymob_transaction_id', 'response_data', 'updated_at'])
+        
+        # If payment is successful, update the order or subscription
+        if success:
+            if isinstance(payment, Payment):
+                from orders.models import Order
+                
+                Order.objects.filter(pk=payment.order_id).update(
+                    is_paid=True,
+                    paid_at=timezone.now(),
+                    payment_id=payment.payment_id,
+                    updated_at=timezone.now()
+                )
+            else:
+                from subscriptions.models import Subscription
+                
+                Subscription.objects.filter(pk=payment.subscription_id).update(
+                    is_active=True,
+                    updated_at=timezone.now()
+                )
+        
+        log.status_code = 200 if success else 400
+        log.processed_at = timezone.now()
+        log.save(update_fields=['status_code', 'processed_at'])
+    
+    return 'applied'
+
+
+class WebhookQueue(StreamQueue):
+    """
+    Durable queue of verified webhook events on a Redis stream.
+    """
+    stream = "payments:webhooks"
+    group = "webhook-workers"
+    
+    def enqueue(self, key, payload, headers=None):
+        """
+        Add a verified event to the stream.
+        
+        Args:
+            key: Idempotency key
+            payload: Webhook request data
+            headers: Request headers
+        
+        Returns:
+            Stream entry ID
+        """
+        return self.add({
+            'key': key,
+            'payload': json.dumps(payload),
+            'headers': json.dumps(headers or {})
+        })
+    
+    @staticmethod
+    def _decode(entries):
+        return [
+            (entry_id, fields['key'], json.loads(fields['payload']), json.loads(fields.get('headers') or '{}'))
+            for entry_id, fields in entries
+        ]
+    
+    def read(self, consumer, count=None, block_ms=None):
+        """
+        Read new events for a consumer.
+        
+        Args:
+            consumer: Consumer name, unique per worker
+            count: Maximum number of events (default: PAYMOB_WEBHOOK_BATCH_SIZE)
+            block_ms: Milliseconds to wait for events (default: don't wait)
+        
+        Returns:
+            List of (entry_id, key, payload, headers) tuples
+        """
+        entries = self.read_entries(consumer, count or settings.PAYMOB_WEBHOOK_BATCH_SIZE, block_ms)
+        return self._decode(entries)
+    
+    def claim_stale(self, consumer, min_idle_ms=None, count=None):
+        """
+        Take over events left pending by a worker that stopped.
+        
+        Args:
+            consumer: Consumer name, unique per worker
+            min_idle_ms: Idle time before an event is claimed (default: PAYMOB_WEBHOOK_CLAIM_IDLE)
+            count: Maximum number of events (default: PAYMOB_WEBHOOK_BATCH_SIZE)
+        
+        Returns:
+            List of (entry_id, key, payload, headers) tuples
+        """
+        entries = self.claim_entries(
+            consumer,
+            min_idle_ms or settings.PAYMOB_WEBHOOK_CLAIM_IDLE * 1000,
+            count or settings.PAYMOB_WEBHOOK_BATCH_SIZE
+        )
+        return self._decode(entries)
+    
+    def process(self, consumer, block_ms=None):
+        """
+        Apply one batch of events, starting with any stale ones.
+        
+        Events that fail stay pending and are retried after claim_stale()
+        picks them up again. Once an event has been delivered
+        PAYMOB_WEBHOOK_MAX_DELIVERIES times it is moved to the dead-letter
+        stream instead.
+        
+        Args:
+            consumer: Consumer name, unique per worker
+            block_ms: Milliseconds to wait for new events
+        
+        Returns:
+            Dictionary of result counts
+        """
+        stats = {'applied': 0, 'duplicate': 0, 'unmatched': 0, 'failed': 0, 'dead': 0}
+        events = self.claim_stale(consumer) or self.read(consumer, block_ms=block_ms)
+        done = []
+        failed = []
+        
+        for entry_id, key, payload, headers in events:
+            try:
+                result = apply_webhook_event(key, payload, headers)
+            except Exception as e:
+                logger.error(f"Error applying Paymob webhook {key}: {e}")
+                stats['failed'] += 1
+                failed.append((entry_id, key, payload, headers, e))
+                continue
+            stats[result] += 1
+            done.append(entry_id)
+        
+        self.ack(*done)
+        
+        if failed:
+            deliveries = self.delivery_counts(*[entry_id for entry_id, *_ in failed])
+            for entry_id, key, payload, headers, error in failed:
+                if deliveries[entry_id] >= settings.PAYMOB_WEBHOOK_MAX_DELIVERIES:
+                    self.dead_letter(entry_id, {
+                        'key': key,
+                        'payload': json.dumps(payload),
+                        'headers': json.dumps(headers),
+                        'error': str(error),
+                        'deliveries': str(deliveries[entry_id]),
+                    })
+                    logger.error(f"Paymob webhook {key} failed {deliveries[entry_id]} times, moved to dead letters")
+                    stats['dead'] += 1
+        
+        return stats
+
+
+webhook_queue = WebhookQueue()
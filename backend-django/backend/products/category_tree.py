@@ -0,0 +1,118 @@
+"""
+Category tree building and caching for the Fashion Hub project.
+"""
+
+from collections import defaultdict
+from django.conf import settings
+import logging
+
+from common.redis_client import get_redis_client
+from .models import Category
+
+logger = logging.getLogger(__name__)
+
+
+def get_children_map(categories):
+    """
+    Group categories by parent ID.
+    
+    Args:
+        categories: Iterable of categories
+    
+    Returns:
+        Dictionary of parent ID to list of child categories
+    """
+    children = defaultdict(list)
+    for category in categories:
+        children[category.parent_id].append(category)
+    return children
+
+
+def build_tree(categories):
+    """
+    Assemble serialized category trees in memory.
+    
+    Args:
+        categories: Iterable of categories, loaded in a single query
+    
+    Returns:
+        List of serialized root categories with nested children
+    """
+    from .serializers import CategorySerializer
+    
+    children = get_children_map(categories)
+    serializer = CategorySerializer(children.get(None, []), many=True, context={'category_children': children})
+    return serializer.data
+
+
+class CategoryTree:
+    """
+    Redis cache of each store's category tree.
+    
+    The tree is built from one query and invalidated by the category
+    signals, so storefront navigation is served from cache.
+    """
+    key_prefix = "categories:tree"
+    
+    def __init__(self, redis_client=None, timeout=None):
+        """
+        Initialize the category tree cache.
+        """
+        self.redis_client = redis_client or get_redis_client()
+        self.timeout = timeout or settings.CATEGORY_TREE_CACHE_TIMEOUT
+    
+    def make_key(self, store_id, active_only=False):
+        """
+        Get the cache key for a store's tree.
+        """
+        return f"{self.key_prefix}:{store_id}:{'active' if active_only else 'all'}"
+    
+    def get_tree(self, store_id, active_only=False):
+        """
+        Get a store's category tree, building and caching it on a miss.
+        
+        Args:
+            store_id: ID of the store
+            active_only: Leave out inactive categories and their subtrees
+        
+        Returns:
+            List of serialized root categories with nested children
+        """
+        key = self.make_key(store_id, active_only)
+        
+        try:
+            tree = self.redis_client.get_cache(key)
+        except Exception:
+            logger.warning("Redis unavailable, building category tree without cache")
+            return self.build(store_id, active_only)
+        
+        if tree is not None:
+            return tree
+        
+        tree = self.build(store_id, active_only)
+        
+        try:
+            self.redis_client.set_cache(key, tree, timeout=self.timeout)
+        except Exception:
+            logger.warning("Redis unavailable, category tree not cached")
+        
+        return tree
+    
+    def build(self, store_id, active_only=False):
+        """
+        Build a store's category tree from a single query.
+        """
+        categories = Category.objects.filter(store_id=store_id)
+        if active_only:
+            categories = categories.filter(is_active=True)
+        return build_tree(categories)
+    
+    def invalidate(self, store_id):
+        """
+        Drop the cached trees of a store.
+        """
+        try:
+            for active_only in (False, True):
+                self.redis_client.delete_cache(self.make_key(store_id, active_only))
+        except Exception:
+            logger.exception(f"Failed to invalidate category tree of store {store_id}")
@@ -0,0 +1,201 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import common.utils
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=255, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=255, verbose_name='Name (Arabic)')),
+                ('description_en', models.TextField(blank=True, verbose_name='Description (English)')),
+                ('description_ar', models.TextField(blank=True, verbose_name='Description (Arabic)')),
+                ('slug', models.SlugField(max_length=100, unique=True, verbose_name='Slug')),
+                ('image', models.ImageField(blank=True, null=True, upload_to=common.utils.get_file_path, verbose_name='Image')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Order')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='products.category')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+                'ordering': ['order', 'name_en'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=255, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=255, verbose_name='Name (Arabic)')),
+                ('description_en', models.TextField(blank=True, verbose_name='Description (English)')),
+                ('description_ar', models.TextField(blank=True, verbose_name='Description (Arabic)')),
+                ('slug', models.SlugField(max_length=100, unique=True, verbose_name='Slug')),
+                ('sku', models.CharField(max_length=50, unique=True, verbose_name='SKU')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Price')),
+                ('sale_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Sale price')),
+                ('cost_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Cost price')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('is_featured', models.BooleanField(default=False, verbose_name='Is featured')),
+                ('is_new', models.BooleanField(default=False, verbose_name='Is new')),
+                ('is_on_sale', models.BooleanField(default=False, verbose_name='Is on sale')),
+                ('weight', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, verbose_name='Weight (kg)')),
+                ('width', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, verbose_name='Width (cm)')),
+                ('height', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, verbose_name='Height (cm)')),
+                ('depth', models.DecimalField(blank=True, decimal_places=2, max_digits=6, null=True, verbose_name='Depth (cm)')),
+                ('meta_title_en', models.CharField(blank=True, max_length=100, verbose_name='Meta title (English)')),
+                ('meta_title_ar', models.CharField(blank=True, max_length=100, verbose_name='Meta title (Arabic)')),
+                ('meta_description_en', models.TextField(blank=True, verbose_name='Meta description (English)')),
+                ('meta_description_ar', models.TextField(blank=True, verbose_name='Meta description (Arabic)')),
+                ('search_tags', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=50), blank=True, null=True, size=None, verbose_name='Search tags')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='products.category')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Product',
+                'verbose_name_plural': 'Products',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('image', models.ImageField(upload_to=common.utils.get_file_path, verbose_name='Image')),
+                ('alt_text_en', models.CharField(blank=True, max_length=100, verbose_name='Alt text (English)')),
+                ('alt_text_ar', models.CharField(blank=True, max_length=100, verbose_name='Alt text (Arabic)')),
+                ('is_primary', models.BooleanField(default=False, verbose_name='Is primary')),
+                ('order', models.PositiveIntegerField(default=0, verbose_name='Order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='products.product')),
+            ],
+            options={
+                'verbose_name': 'Product image',
+                'verbose_name_plural': 'Product images',
+                'ordering': ['order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('rating', models.PositiveSmallIntegerField(choices=[(1, 1), (2, 2), (3, 3), (4, 4), (5, 5)], verbose_name='Rating')),
+                ('title', models.CharField(max_length=100, verbose_name='Title')),
+                ('comment', models.TextField(verbose_name='Comment')),
+                ('is_approved', models.BooleanField(default=False, verbose_name='Is approved')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reviews', to='products.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_reviews', to='stores.store')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_reviews', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Product review',
+                'verbose_name_plural': 'Product reviews',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Variant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=100, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=100, verbose_name='Name (Arabic)')),
+                ('sku', models.CharField(max_length=50, unique=True, verbose_name='SKU')),
+                ('price_adjustment', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Price adjustment')),
+                ('stock_quantity', models.PositiveIntegerField(default=0, verbose_name='Stock quantity')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('attributes', models.JSONField(default=dict, verbose_name='Attributes')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='products.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Variant',
+                'verbose_name_plural': 'Variants',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['slug'], name='products_ca_slug_da4386_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['is_active'], name='products_ca_is_acti_a2d000_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['slug'], name='products_pr_slug_3edc0c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['sku'], name='products_pr_sku_ca0cdc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_active'], name='products_pr_is_acti_ca4d9a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_featured'], name='products_pr_is_feat_a5d7cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_new'], name='products_pr_is_new_ab0139_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['is_on_sale'], name='products_pr_is_on_s_c25054_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['store', 'created_at', 'id'], name='products_pr_store_i_4db8d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_tags'], name='products_pr_search__d807fb_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['rating'], name='products_pr_rating_0e31b2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['is_approved'], name='products_pr_is_appr_790eda_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(fields=['product', 'created_at', 'id'], name='products_pr_product_d9f37a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=models.Index(fields=['sku'], name='products_va_sku_5451be_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=models.Index(fields=['is_active'], name='products_va_is_acti_3e17d0_idx'),
+        ),
+    ]
@@ -94,6 +94,7 @@ class Product(TimeStampedModel, TranslatedField):
             models.Index(fields=['is_featured']),
             models.Index(fields=['is_new']),
             models.Index(fields=['is_on_sale']),
+            models.Index(fields=['store', 'created_at', 'id']),
             GinIndex(fields=['search_tags']),
         ]
     
@@ -194,6 +195,7 @@ class ProductReview(TimeStampedModel):
         indexes = [
             models.Index(fields=['rating']),
             models.Index(fields=['is_approved']),
+            models.Index(fields=['product', 'created_at', 'id']),
         ]
     
     def __str__(self):
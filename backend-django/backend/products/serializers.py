@@ -3,6 +3,7 @@ Product serializers for the Fashion Hub project.
 """
 
 from rest_framework import serializers
+from django.core.files.storage import default_storage
 from django.utils.translation import gettext_lazy as _
 
 from common.serializers import DynamicFieldsModelSerializer
@@ -27,7 +28,12 @@ class CategorySerializer(DynamicFieldsModelSerializer):
         """
         Get serialized children categories.
         """
-        children = Category.objects.filter(parent=obj)
+        # Views pass every category of the store grouped by parent to avoid a query per node
+        children_map = self.context.get('category_children')
+        if children_map is not None:
+            children = children_map.get(obj.id, [])
+        else:
+            children = Category.objects.filter(parent=obj)
         serializer = CategorySerializer(children, many=True, context=self.context)
         return serializer.data
 
@@ -121,11 +127,48 @@ class ProductSerializer(DynamicFieldsModelSerializer):
         """
         Get approved reviews only.
         """
-        reviews = obj.reviews.filter(is_approved=True)
+        # Use the reviews prefetched by the view when available
+        reviews = getattr(obj, 'approved_reviews', None)
+        if reviews is None:
+            reviews = obj.reviews.filter(is_approved=True).select_related('user')
         serializer = ProductReviewSerializer(reviews, many=True, context=self.context)
         return serializer.data
 
 
+class ProductListSerializer(DynamicFieldsModelSerializer):
+    """
+    Slim serializer for product listings.
+    
+    Expects the queryset to be annotated with primary_image_path,
+    review_count and average_rating (see ProductViewSet.get_queryset).
+    """
+    category_name = serializers.CharField(source='category.name_en', read_only=True)
+    primary_image = serializers.SerializerMethodField()
+    review_count = serializers.IntegerField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Product
+        fields = [
+            'id', 'category', 'category_name', 'name_en', 'name_ar', 'slug', 'price',
+            'sale_price', 'is_featured', 'is_new', 'is_on_sale', 'primary_image',
+            'review_count', 'average_rating', 'created_at'
+        ]
+        read_only_fields = fields
+    
+    def get_primary_image(self, obj):
+        """
+        Get the URL of the primary image, falling back to the first image.
+        """
+        path = getattr(obj, 'primary_image_path', None)
+        if not path:
+            return None
+        
+        url = default_storage.url(path)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating and updating products.
@@ -148,3 +191,10 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
         if Product.objects.filter(sku=value).exclude(id=instance.id if instance else None).exists():
             raise serializers.ValidationError(_("A product with this SKU already exists."))
         return value
+    
+    def create(self, validated_data):
+        """
+        Create a product in the store of its category.
+        """
+        validated_data.setdefault('store', validated_data['category'].store)
+        return super().create(validated_data)
@@ -2,7 +2,156 @@
 Product signals for the Fashion Hub project.
 """
 
-from django.db.models.signals import post_save, post_delete
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
-from .models import Product, ProductImage, Variant
+from common.search_indexing import product_index_queue
+from stores.models import Store
+from .category_tree import CategoryTree
+from .models import Category, Product, ProductImage
+
+# Fields of each model that product search documents are built from.
+# Variants aren't part of the documents, so their changes are ignored.
+INDEXED_FIELDS = {
+    Store: ('name_en', 'name_ar'),
+    Category: ('name_en', 'name_ar'),
+    Product: (
+        'name_en', 'name_ar', 'description_en', 'description_ar', 'price', 'sale_price', 'is_on_sale',
+        'is_active', 'is_featured', 'is_new', 'category_id', 'store_id', 'search_tags',
+    ),
+    # The thumbnail is the primary image, or else the first by order
+    ProductImage: ('product_id', 'image', 'is_primary', 'order'),
+}
+
+
+def indexed_fields_changed(instance):
+    """
+    Check whether a saved instance changed a field its products index.
+    """
+    previous = getattr(instance, '_previous_indexed_values', None)
+    return previous is not None and any(
+        previous[field] != getattr(instance, field) for field in INDEXED_FIELDS[type(instance)]
+    )
+
+
+@receiver(pre_save, sender=Store)
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Product)
+@receiver(pre_save, sender=ProductImage)
+def remember_indexed_values(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the indexed fields of an instance before it is saved.
+    """
+    instance._previous_indexed_values = None
+    if not settings.SEARCH_INDEX_AUTO_SYNC or not instance.pk:
+        return
+    
+    fields = INDEXED_FIELDS[sender]
+    if update_fields is not None:
+        updated = {sender._meta.get_field(name).attname for name in update_fields}
+        if not updated & set(fields):
+            return
+    instance._previous_indexed_values = sender._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Product)
+def sync_product_search(sender, instance, created, **kwargs):
+    """
+    Queue a new or changed product for search indexing.
+    
+    Saves that leave every indexed field alone, e.g. a cost price edit,
+    don't touch the index or cached searches.
+    """
+    if not settings.SEARCH_INDEX_AUTO_SYNC:
+        return
+    if created:
+        product_index_queue.enqueue_on_commit(
+            [instance.id], store_ids=[instance.store_id], category_ids=[instance.category_id]
+        )
+    elif indexed_fields_changed(instance):
+        # Searches of the old store and category can list the product too
+        previous = instance._previous_indexed_values
+        product_index_queue.enqueue_on_commit(
+            [instance.id],
+            store_ids={instance.store_id, previous['store_id']},
+            category_ids={instance.category_id, previous['category_id']},
+        )
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_search(sender, instance, **kwargs):
+    """
+    Queue a deleted product for removal from the search index.
+    """
+    if settings.SEARCH_INDEX_AUTO_SYNC:
+        product_index_queue.enqueue_on_commit(
+            [instance.id], store_ids=[instance.store_id], category_ids=[instance.category_id]
+        )
+
+
+@receiver(post_save, sender=ProductImage)
+def sync_image_product_search(sender, instance, created, **kwargs):
+    """
+    Queue the parent product of a new or changed image for search indexing.
+    
+    Images only change a product's thumbnail, so only cached searches
+    listing the product are invalidated.
+    """
+    if not settings.SEARCH_INDEX_AUTO_SYNC:
+        return
+    if created:
+        product_ids = {instance.product_id}
+    elif indexed_fields_changed(instance):
+        product_ids = {instance.product_id, instance._previous_indexed_values['product_id']}
+    else:
+        return
+    product_index_queue.enqueue_on_commit(product_ids, stale_product_ids=product_ids)
+
+
+@receiver(post_delete, sender=ProductImage)
+def remove_image_product_search(sender, instance, **kwargs):
+    """
+    Queue the parent product of a deleted image for search indexing.
+    """
+    if settings.SEARCH_INDEX_AUTO_SYNC:
+        product_index_queue.enqueue_on_commit([instance.product_id], stale_product_ids=[instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+def sync_category_products_search(sender, instance, created, **kwargs):
+    """
+    Queue the products of a renamed category for search indexing.
+    
+    Other changes don't affect product documents. Deleting a category
+    cascades to its products, which are handled by the product signal.
+    """
+    if settings.SEARCH_INDEX_AUTO_SYNC and not created and indexed_fields_changed(instance):
+        product_ids = Product.objects.filter(category=instance).values_list('id', flat=True)
+        product_index_queue.enqueue_on_commit(
+            product_ids, store_ids=[instance.store_id], category_ids=[instance.id]
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree(sender, instance, **kwargs):
+    """
+    Drop the cached category tree of the category's store.
+    """
+    store_id = instance.store_id
+    transaction.on_commit(lambda: CategoryTree().invalidate(store_id))
+
+
+@receiver(post_save, sender=Store)
+def sync_store_products_search(sender, instance, created, **kwargs):
+    """
+    Queue the products of a renamed store for search indexing.
+    
+    Other changes don't affect product documents. Deleting a store
+    cascades to its products, which are handled by the product signal.
+    """
+    if settings.SEARCH_INDEX_AUTO_SYNC and not created and indexed_fields_changed(instance):
+        product_ids = Product.objects.filter(store=instance).values_list('id', flat=True)
+        product_index_queue.enqueue_on_commit(product_ids, store_ids=[instance.id])
@@ -2,7 +2,11 @@ from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.contrib.auth import get_user_model
-from .models import Product, Category, Store
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from .models import Product, Category, Store, ProductImage, Variant, ProductReview
 from .serializers import ProductSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 import pytest
@@ -11,8 +15,9 @@ User = get_user_model()
 
 class ProductBulkOperationTests(APITestCase):
     def setUp(self):
-        self.owner = User.objects.create_user(email='owner@example.com', password='pass', is_store_owner=True)
-        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts')
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass', is_store_owner=True)
+        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts', store=self.store)
         self.client = APIClient()
         refresh = RefreshToken.for_user(self.owner)
         self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
@@ -28,8 +33,8 @@ class ProductBulkOperationTests(APITestCase):
         self.assertEqual(Product.objects.count(), 2)
 
     def test_bulk_update_products(self):
-        p1 = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100)
-        p2 = Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200)
+        p1 = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
+        p2 = Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, store=self.store)
         url = reverse('product-bulk-update')
         data = [
             {"id": p1.id, "price": 150},
@@ -43,8 +48,8 @@ class ProductBulkOperationTests(APITestCase):
         self.assertEqual(p2.price, 250)
 
     def test_bulk_delete_products(self):
-        p1 = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100)
-        p2 = Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200)
+        p1 = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
+        p2 = Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, store=self.store)
         url = reverse('product-bulk-delete')
         data = {"ids": [p1.id, p2.id]}
         response = self.client.delete(url, data, format='json')
@@ -52,25 +57,25 @@ class ProductBulkOperationTests(APITestCase):
         self.assertEqual(Product.objects.count(), 0)
 
     def test_filter_products_by_category(self):
-        c2 = Category.objects.create(name_en='Pants', name_ar='بنطلونات', slug='pants')
-        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100)
-        Product.objects.create(category=c2, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200)
+        c2 = Category.objects.create(name_en='Pants', name_ar='بنطلونات', slug='pants', store=self.store)
+        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
+        Product.objects.create(category=c2, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, store=self.store)
         url = reverse('product-list')
         response = self.client.get(url, {'category': self.category.id})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
     def test_filter_products_by_price(self):
-        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100)
-        Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200)
+        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
+        Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, store=self.store)
         url = reverse('product-list')
         response = self.client.get(url, {'price__gte': 150})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
     def test_filter_products_by_availability(self):
-        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, is_active=True)
-        Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, is_active=False)
+        Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, is_active=True, store=self.store)
+        Product.objects.create(category=self.category, name_en="P2", name_ar="P2", description_en="D2", description_ar="D2", sku="SKU2", price=200, is_active=False, store=self.store)
         url = reverse('product-list')
         response = self.client.get(url, {'is_active': True})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -78,30 +83,143 @@ class ProductBulkOperationTests(APITestCase):
 
     def test_pagination_and_ordering(self):
         for i in range(10):
-            Product.objects.create(category=self.category, name_en=f"P{i}", name_ar=f"P{i}", description_en="D", description_ar="D", sku=f"SKU{i}", price=100+i)
+            Product.objects.create(category=self.category, name_en=f"P{i}", name_ar=f"P{i}", description_en="D", description_ar="D", sku=f"SKU{i}", price=100+i, store=self.store)
         url = reverse('product-list')
         response = self.client.get(url, {'page': 1, 'page_size': 5, 'ordering': '-price'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 5)
         self.assertTrue(response.data['results'][0]['price'] > response.data['results'][1]['price'])
 
+    def test_cursor_pages_through_equal_prices(self):
+        for i in range(9):
+            Product.objects.create(category=self.category, name_en=f"P{i}", name_ar=f"P{i}", description_en="D", description_ar="D", sku=f"SKU{i}", price=100 if i % 3 else 200, store=self.store)
+        url = reverse('product-list')
+        response = self.client.get(url, {'page_size': 2, 'ordering': '-price'})
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [p['id'] for p in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(sorted(ids), sorted(Product.objects.values_list('id', flat=True)))
+        prices = list(Product.objects.filter(id__in=ids).values_list('id', 'price'))
+        self.assertEqual([dict(prices)[i] for i in ids], sorted(dict(prices).values(), reverse=True))
+
     def test_search_products(self):
-        Product.objects.create(category=self.category, name_en="Red Shirt", name_ar="قميص أحمر", description_en="Red", description_ar="أحمر", sku="SKU1", price=100)
-        Product.objects.create(category=self.category, name_en="Blue Shirt", name_ar="قميص أزرق", description_en="Blue", description_ar="أزرق", sku="SKU2", price=200)
+        Product.objects.create(category=self.category, name_en="Red Shirt", name_ar="قميص أحمر", description_en="Red", description_ar="أحمر", sku="SKU1", price=100, store=self.store)
+        Product.objects.create(category=self.category, name_en="Blue Shirt", name_ar="قميص أزرق", description_en="Blue", description_ar="أزرق", sku="SKU2", price=200, store=self.store)
         url = reverse('product-list')
         response = self.client.get(url, {'search': 'Red'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+class ProductListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        self.reviewer = User.objects.create_user(username='reviewer', email='reviewer@example.com', password='pass', first_name='Rana', last_name='Reviewer')
+        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts', store=self.store)
+        self.client = APIClient()
+
+    def create_products(self, start, count):
+        for i in range(start, start + count):
+            product = Product.objects.create(category=self.category, name_en=f"P{i}", name_ar=f"P{i}", description_en="D", description_ar="D", sku=f"SKU{i}", price=100, store=self.store)
+            ProductImage.objects.create(product=product, image=f'products/p{i}.jpg', is_primary=True)
+            Variant.objects.create(product=product, name_en="M", name_ar="M", sku=f"SKU{i}-M", store=self.store)
+            ProductReview.objects.create(product=product, user=self.reviewer, rating=5, title="Good", comment="Good", is_approved=True, store=self.store)
+            ProductReview.objects.create(product=product, user=self.reviewer, rating=1, title="Bad", comment="Bad", is_approved=False, store=self.store)
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_list_query_count_does_not_grow_with_products(self):
+        self.create_products(0, 2)
+        small = self.count_list_queries()
+        self.create_products(2, 8)
+        self.assertEqual(self.count_list_queries(), small)
+
+    def test_detail_returns_only_approved_reviews(self):
+        self.create_products(0, 1)
+        product = Product.objects.get()
+        response = self.client.get(reverse('product-detail', args=[product.id]))
+        self.assertEqual([review['title'] for review in response.data['reviews']], ["Good"])
+        self.assertEqual(response.data['reviews'][0]['user_name'], self.reviewer.full_name)
+
+    def test_list_annotates_reviews_and_primary_image(self):
+        self.create_products(0, 1)
+        response = self.client.get(reverse('product-list'))
+        items = response.data['results']
+        self.assertEqual(items[0]['review_count'], 1)
+        self.assertEqual(items[0]['average_rating'], 5)
+        self.assertTrue(items[0]['primary_image'].endswith('products/p0.jpg'))
+        self.assertNotIn('reviews', items[0])
+
+    def test_list_fields_param_trims_response(self):
+        self.create_products(0, 1)
+        response = self.client.get(reverse('product-list'), {'fields': 'id,name_en'})
+        items = response.data['results']
+        self.assertEqual(set(items[0]), {'id', 'name_en'})
+
+    def test_list_annotations_without_reviews_or_images(self):
+        Product.objects.create(category=self.category, name_en="P0", name_ar="P0", description_en="D", description_ar="D", sku="SKU0", price=100, store=self.store)
+        response = self.client.get(reverse('product-list'))
+        items = response.data['results']
+        self.assertEqual(items[0]['review_count'], 0)
+        self.assertIsNone(items[0]['average_rating'])
+        self.assertIsNone(items[0]['primary_image'])
+
+    def test_list_primary_image_falls_back_to_first_image(self):
+        product = Product.objects.create(category=self.category, name_en="P0", name_ar="P0", description_en="D", description_ar="D", sku="SKU0", price=100, store=self.store)
+        ProductImage.objects.create(product=product, image='products/second.jpg', is_primary=False, order=2)
+        ProductImage.objects.create(product=product, image='products/first.jpg', is_primary=False, order=1)
+        response = self.client.get(reverse('product-list'))
+        self.assertTrue(response.data['results'][0]['primary_image'].endswith('products/first.jpg'))
+
+
+@override_settings(SEARCH_INDEX_AUTO_SYNC=True)
+class SearchSyncSignalTests(TestCase):
+    def setUp(self):
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts', store=self.store)
+        self.product = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
+        patcher = mock.patch('products.signals.product_index_queue.enqueue_on_commit')
+        self.enqueue = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_variant_save_is_not_indexed(self):
+        Variant.objects.create(product=self.product, name_en="M", name_ar="M", sku="SKU1-M", store=self.store)
+        self.enqueue.assert_not_called()
+
+    def test_unindexed_product_change_is_not_indexed(self):
+        self.product.cost_price = 40
+        self.product.save()
+        self.enqueue.assert_not_called()
+
+    def test_indexed_product_change_invalidates_store_and_category(self):
+        self.product.price = 150
+        self.product.save()
+        self.enqueue.assert_called_once_with([self.product.id], store_ids={self.store.id}, category_ids={self.category.id})
+
+    def test_image_change_invalidates_only_listing_product(self):
+        image = ProductImage.objects.create(product=self.product, image='products/p1.jpg')
+        image.alt_text_en = 'Front'
+        image.save()
+        self.enqueue.assert_called_once_with({self.product.id}, stale_product_ids={self.product.id})
+
+
 @pytest.mark.django_db
 class TestProductPermissions:
     @pytest.fixture(autouse=True)
     def setup(self):
-        self.owner = User.objects.create_user(email='owner@example.com', password='pass', is_store_owner=True)
-        self.admin = User.objects.create_user(email='admin@example.com', password='pass', role='admin', is_superuser=True)
-        self.other = User.objects.create_user(email='other@example.com', password='pass')
-        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts')
-        self.product = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100)
+        self.owner = User.objects.create_user(username='owner', email='owner@example.com', password='pass', is_store_owner=True)
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='pass', role='admin', is_superuser=True)
+        self.other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+        self.store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        self.category = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts', store=self.store)
+        self.product = Product.objects.create(category=self.category, name_en="P1", name_ar="P1", description_en="D1", description_ar="D1", sku="SKU1", price=100, store=self.store)
         self.product.owner = self.owner
         self.product.save()
         self.client = APIClient()
@@ -145,10 +263,10 @@ class TestProductTenantIsolation:
     def setup(self):
         self.store1 = Store.objects.create(name_en='Store1', schema_name='store1', slug='store1')
         self.store2 = Store.objects.create(name_en='Store2', schema_name='store2', slug='store2')
-        self.owner1 = User.objects.create_user(email='owner1@example.com', password='pass', is_store_owner=True)
+        self.owner1 = User.objects.create_user(username='owner1', email='owner1@example.com', password='pass', is_store_owner=True)
         self.owner1.store = self.store1
         self.owner1.save()
-        self.owner2 = User.objects.create_user(email='owner2@example.com', password='pass', is_store_owner=True)
+        self.owner2 = User.objects.create_user(username='owner2', email='owner2@example.com', password='pass', is_store_owner=True)
         self.owner2.store = self.store2
         self.owner2.save()
         self.category1 = Category.objects.create(name_en='Shirts', name_ar='قمصان', slug='shirts', store=self.store1)
@@ -183,4 +301,12 @@ class TestProductTenantIsolation:
         assert response.status_code == 200
         ids = [c['id'] for c in response.data['results']]
         assert self.category1.id in ids
-        assert self.category2.id not in ids 
\ No newline at end of file
+        assert self.category2.id not in ids 
+    def test_root_categories_scoped_to_store(self):
+        child = Category.objects.create(name_en='Polo', name_ar='بولو', slug='polo', parent=self.category1, store=self.store1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.get_token(self.owner1)}')
+        url = reverse('category-root')
+        response = self.client.get(url)
+        assert response.status_code == 200
+        assert [c['id'] for c in response.data] == [self.category1.id]
+        assert [c['id'] for c in response.data[0]['children']] == [child.id]
@@ -5,15 +5,20 @@ Product views for the Fashion Hub project.
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Avg, Count, OuterRef, Prefetch, Q, Subquery
 from django.utils.translation import gettext_lazy as _
 from rest_framework.parsers import JSONParser
 
+from common.elasticsearch import CursorExpiredError, ElasticsearchClient
 from common.permissions import IsStoreOwnerOrManager, IsStoreStaff, IsOwnerOrAdminOrReadOnly
+from common.search_cache import SearchCache
+from common.views import DynamicFieldsMixin
+from .category_tree import CategoryTree, build_tree, get_children_map
 from .models import Category, Product, ProductImage, Variant, ProductReview
 from .serializers import (
-    CategorySerializer, ProductSerializer, ProductImageSerializer,
+    CategorySerializer, ProductSerializer, ProductListSerializer, ProductImageSerializer,
     VariantSerializer, ProductReviewSerializer, ProductCreateUpdateSerializer
 )
 
@@ -45,21 +50,37 @@ class CategoryViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), IsStoreOwnerOrManager()]
         return super().get_permissions()
     
+    def get_serializer_context(self):
+        """
+        Add the store's categories grouped by parent for nested children.
+        """
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            context['category_children'] = get_children_map(self.get_queryset())
+        return context
+    
     @action(detail=False, methods=['get'])
     def root(self, request):
         """
-        Get only root categories (no parent).
+        Get the category tree of the current store, starting at root categories.
         """
-        categories = Category.objects.filter(parent=None)
-        serializer = self.get_serializer(categories, many=True)
-        return Response(serializer.data)
+        store = getattr(request, 'tenant', None) or getattr(request.user, 'store', None)
+        active_only = request.query_params.get('is_active', '').lower() in ['1', 'true', 'yes']
+        
+        if store:
+            return Response(CategoryTree().get_tree(store.id, active_only=active_only))
+        
+        categories = self.get_queryset()
+        if active_only:
+            categories = categories.filter(is_active=True)
+        return Response(build_tree(categories))
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(DynamicFieldsMixin, viewsets.ModelViewSet):
     """
     API endpoint for products.
     Supports:
-    - List (GET): Filtering, searching, ordering, pagination
+    - List (GET): Filtering, searching, ordering, pagination, field selection (?fields=)
     - Create (POST): Single or bulk (via /bulk-create/)
     - Retrieve (GET): Single product
     - Update (PUT/PATCH): Single or bulk (via /bulk-update/)
@@ -69,7 +90,14 @@ class ProductViewSet(viewsets.ModelViewSet):
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsOwnerOrAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['category', 'is_active', 'is_featured', 'is_new', 'is_on_sale']
+    filterset_fields = {
+        'category': ['exact'],
+        'is_active': ['exact'],
+        'is_featured': ['exact'],
+        'is_new': ['exact'],
+        'is_on_sale': ['exact'],
+        'price': ['exact', 'gte', 'lte'],
+    }
     search_fields = ['name_en', 'name_ar', 'description_en', 'description_ar', 'sku', 'search_tags']
     ordering_fields = ['name_en', 'price', 'created_at']
     
@@ -78,6 +106,26 @@ class ProductViewSet(viewsets.ModelViewSet):
         qs = Product.objects.all()
         if store:
             qs = qs.filter(store=store)
+        if self.action == 'list':
+            # Everything ProductListSerializer renders comes from one query
+            primary_image = ProductImage.objects.filter(product=OuterRef('pk')).order_by('-is_primary', 'order')
+            approved = Q(reviews__is_approved=True)
+            qs = qs.select_related('category').annotate(
+                primary_image_path=Subquery(primary_image.values('image')[:1]),
+                review_count=Count('reviews', filter=approved),
+                average_rating=Avg('reviews__rating', filter=approved),
+            )
+        elif self.action == 'retrieve':
+            # Load everything ProductSerializer renders in a fixed number of queries
+            qs = qs.select_related('category').prefetch_related(
+                'images',
+                'variants',
+                Prefetch(
+                    'reviews',
+                    queryset=ProductReview.objects.filter(is_approved=True).select_related('user'),
+                    to_attr='approved_reviews',
+                ),
+            )
         return qs
     
     def get_serializer_class(self):
@@ -86,6 +134,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['create', 'update', 'partial_update']:
             return ProductCreateUpdateSerializer
+        if self.action == 'list':
+            return ProductListSerializer
         return self.serializer_class
     
     def get_permissions(self):
@@ -112,10 +162,100 @@ class ProductViewSet(viewsets.ModelViewSet):
         Get reviews for a specific product.
         """
         product = self.get_object()
-        reviews = product.reviews.filter(is_approved=True)
+        reviews = product.reviews.filter(is_approved=True).select_related('user')
         serializer = ProductReviewSerializer(reviews, many=True)
         return Response(serializer.data)
-
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Full-text product search backed by Elasticsearch.
+        
+        Supports page-based pagination (page, size) and cursor pagination
+        for infinite scroll (pass cursor, empty to start). Only listing
+        fields are returned unless fields is given as a comma-separated list.
+        Pass facets=true to get filter sidebar counts in the same response,
+        and release=true with a cursor to stop paging and free its
+        point in time.
+        """
+        params = request.query_params
+        store = getattr(request, 'tenant', None) or getattr(request.user, 'store', None)
+        
+        if params.get('cursor') and params.get('release', '').lower() in ['1', 'true', 'yes']:
+            try:
+                ElasticsearchClient().close_cursor(params['cursor'])
+            except ValueError:
+                return Response({'detail': _('Invalid cursor.')}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        
+        try:
+            page = max(1, int(params.get('page', 1)))
+            size = min(100, max(1, int(params.get('size', 20))))
+        except ValueError:
+            return Response({'detail': _('Page and size must be integers.')}, status=status.HTTP_400_BAD_REQUEST)
+        
+        filters = {}
+        for flag in ['is_featured', 'is_new', 'is_on_sale']:
+            if flag in params:
+                filters[flag] = params[flag].lower() in ['1', 'true', 'yes']
+        for bound in ['price_min', 'price_max']:
+            if bound in params:
+                filters[bound] = params[bound]
+        
+        fields = params.get('fields')
+        fields = fields.split(',') if fields else ElasticsearchClient.LISTING_FIELDS
+        
+        try:
+            results = SearchCache().search(
+                ElasticsearchClient(),
+                params.get('q', ''),
+                store_id=store.id if store else params.get('store_id'),
+                category_id=params.get('category'),
+                filters=filters,
+                sort=params.get('sort'),
+                page=page,
+                size=size,
+                fields=fields,
+                cursor=params.get('cursor'),
+                use_cursor='cursor' in params,
+                facets=params.get('facets', '').lower() in ['1', 'true', 'yes'],
+            )
+        except CursorExpiredError:
+            return Response(
+                {'detail': _('Cursor expired, restart the search.')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except ValueError:
+            return Response({'detail': _('Invalid cursor.')}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(results)
+    
+    @action(detail=False, methods=['get'], url_path='search-stats', permission_classes=[IsAuthenticated, IsAdminUser])
+    def search_stats(self, request):
+        """
+        Get search result cache hit/miss counters.
+        """
+        return Response(SearchCache().get_stats())
+    
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Search-as-you-type suggestions for a prefix.
+        """
+        store = getattr(request, 'tenant', None) or getattr(request.user, 'store', None)
+        
+        try:
+            size = min(20, max(1, int(request.query_params.get('size', 8))))
+        except ValueError:
+            return Response({'detail': _('Size must be an integer.')}, status=status.HTTP_400_BAD_REQUEST)
+        
+        suggestions = ElasticsearchClient().suggest_products(
+            request.query_params.get('q', ''),
+            store_id=store.id if store else request.query_params.get('store_id'),
+            size=size,
+        )
+        return Response({'suggestions': suggestions})
+    
     @action(detail=False, methods=['post'], url_path='bulk-create', parser_classes=[JSONParser])
     def bulk_create(self, request):
         """
@@ -125,10 +265,10 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_bulk_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-
+    
     def perform_bulk_create(self, serializer):
         serializer.save()
-
+    
     @action(detail=False, methods=['put'], url_path='bulk-update', parser_classes=[JSONParser])
     def bulk_update(self, request):
         """
@@ -148,7 +288,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             serializer.save()
             updated.append(serializer.data)
         return Response(updated, status=status.HTTP_200_OK)
-
+    
     @action(detail=False, methods=['delete'], url_path='bulk-delete', parser_classes=[JSONParser])
     def bulk_delete(self, request):
         """
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('stores', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Staff',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('manager', 'Manager'), ('sales', 'Sales Staff')], default='sales', max_length=20, verbose_name='Role')),
+                ('job_title', models.CharField(blank=True, max_length=100, verbose_name='Job title')),
+                ('department', models.CharField(blank=True, max_length=100, verbose_name='Department')),
+                ('work_phone', models.CharField(blank=True, max_length=20, verbose_name='Work phone')),
+                ('work_email', models.EmailField(blank=True, max_length=254, verbose_name='Work email')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('can_manage_products', models.BooleanField(default=False, verbose_name='Can manage products')),
+                ('can_manage_orders', models.BooleanField(default=False, verbose_name='Can manage orders')),
+                ('can_manage_staff', models.BooleanField(default=False, verbose_name='Can manage staff')),
+                ('can_view_analytics', models.BooleanField(default=False, verbose_name='Can view analytics')),
+                ('can_manage_settings', models.BooleanField(default=False, verbose_name='Can manage settings')),
+                ('hire_date', models.DateField(auto_now_add=True, verbose_name='Hire date')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staff', to='stores.store')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='staff_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Staff',
+                'verbose_name_plural': 'Staff',
+                'ordering': ['role', 'user__first_name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StaffPerformance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('period_start', models.DateField(verbose_name='Period start')),
+                ('period_end', models.DateField(verbose_name='Period end')),
+                ('orders_processed', models.PositiveIntegerField(default=0, verbose_name='Orders processed')),
+                ('sales_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Sales amount')),
+                ('customer_satisfaction', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True, verbose_name='Customer satisfaction')),
+                ('returns_processed', models.PositiveIntegerField(default=0, verbose_name='Returns processed')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes')),
+                ('staff', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='performance', to='staff.staff')),
+            ],
+            options={
+                'verbose_name': 'Staff performance',
+                'verbose_name_plural': 'Staff performance',
+                'ordering': ['-period_end'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='staff',
+            index=models.Index(fields=['role'], name='staff_staff_role_423c94_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staff',
+            index=models.Index(fields=['is_active'], name='staff_staff_is_acti_0db61a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffperformance',
+            index=models.Index(fields=['staff'], name='staff_staff_staff_i_77713f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffperformance',
+            index=models.Index(fields=['period_start'], name='staff_staff_period__53c49d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='staffperformance',
+            index=models.Index(fields=['period_end'], name='staff_staff_period__84ff91_idx'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import common.utils
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Store',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=255, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=255, verbose_name='Name (Arabic)')),
+                ('description_en', models.TextField(blank=True, verbose_name='Description (English)')),
+                ('description_ar', models.TextField(blank=True, verbose_name='Description (Arabic)')),
+                ('schema_name', models.CharField(max_length=63, unique=True)),
+                ('slug', models.SlugField(max_length=100, unique=True, verbose_name='Slug')),
+                ('logo', models.ImageField(blank=True, null=True, upload_to=common.utils.get_file_path, verbose_name='Logo')),
+                ('favicon', models.ImageField(blank=True, null=True, upload_to=common.utils.get_file_path, verbose_name='Favicon')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='Phone')),
+                ('facebook', models.URLField(blank=True, verbose_name='Facebook')),
+                ('instagram', models.URLField(blank=True, verbose_name='Instagram')),
+                ('twitter', models.URLField(blank=True, verbose_name='Twitter')),
+                ('subscription_plan', models.CharField(choices=[('pay_as_you_go', 'Pay as you go'), ('basic', 'Basic'), ('standard', 'Standard'), ('gold', 'Gold'), ('platinum', 'Platinum')], default='basic', max_length=20, verbose_name='Subscription plan')),
+                ('subscription_active', models.BooleanField(default=True, verbose_name='Subscription active')),
+                ('subscription_start_date', models.DateTimeField(auto_now_add=True, verbose_name='Subscription start date')),
+                ('subscription_end_date', models.DateTimeField(blank=True, null=True, verbose_name='Subscription end date')),
+                ('theme', models.CharField(default='default', max_length=50, verbose_name='Theme')),
+                ('primary_color', models.CharField(default='#000000', max_length=7, verbose_name='Primary color')),
+                ('secondary_color', models.CharField(default='#ffffff', max_length=7, verbose_name='Secondary color')),
+                ('default_language', models.CharField(choices=[('en', 'English'), ('ar', 'Arabic')], default='en', max_length=2, verbose_name='Default language')),
+                ('currency', models.CharField(default='EGP', max_length=3, verbose_name='Currency')),
+                ('return_policy_en', models.TextField(blank=True, verbose_name='Return policy (English)')),
+                ('return_policy_ar', models.TextField(blank=True, verbose_name='Return policy (Arabic)')),
+                ('shipping_policy_en', models.TextField(blank=True, verbose_name='Shipping policy (English)')),
+                ('shipping_policy_ar', models.TextField(blank=True, verbose_name='Shipping policy (Arabic)')),
+                ('privacy_policy_en', models.TextField(blank=True, verbose_name='Privacy policy (English)')),
+                ('privacy_policy_ar', models.TextField(blank=True, verbose_name='Privacy policy (Arabic)')),
+                ('terms_of_service_en', models.TextField(blank=True, verbose_name='Terms of service (English)')),
+                ('terms_of_service_ar', models.TextField(blank=True, verbose_name='Terms of service (Arabic)')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+            ],
+            options={
+                'verbose_name': 'Store',
+                'verbose_name_plural': 'Stores',
+            },
+        ),
+        migrations.CreateModel(
+            name='Domain',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('domain', models.CharField(max_length=253, unique=True, verbose_name='Domain')),
+                ('is_primary', models.BooleanField(default=False, verbose_name='Is primary')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='domains', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Domain',
+                'verbose_name_plural': 'Domains',
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=255, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=255, verbose_name='Name (Arabic)')),
+                ('description_en', models.TextField(blank=True, verbose_name='Description (English)')),
+                ('description_ar', models.TextField(blank=True, verbose_name='Description (Arabic)')),
+                ('address_line1', models.CharField(max_length=255, verbose_name='Address line 1')),
+                ('address_line2', models.CharField(blank=True, max_length=255, verbose_name='Address line 2')),
+                ('city', models.CharField(max_length=100, verbose_name='City')),
+                ('state', models.CharField(max_length=100, verbose_name='State/Province')),
+                ('postal_code', models.CharField(max_length=20, verbose_name='Postal code')),
+                ('country', models.CharField(max_length=100, verbose_name='Country')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='Phone')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+                ('opening_hours', models.JSONField(blank=True, default=dict, verbose_name='Opening hours')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locations', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Store location',
+                'verbose_name_plural': 'Store locations',
+            },
+        ),
+    ]
@@ -2,7 +2,42 @@
 Store signals for the Fashion Hub project.
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 
+from common.tenant_cache import tenant_cache
 from .models import Store, Domain
+
+
+@receiver(pre_save, sender=Domain)
+def remember_previous_domain(sender, instance, **kwargs):
+    """
+    Keep the previous host of a renamed domain so its cache entry can be dropped.
+    """
+    instance._previous_domain = None
+    if instance.pk:
+        instance._previous_domain = Domain.objects.filter(pk=instance.pk).values_list('domain', flat=True).first()
+
+
+@receiver(post_save, sender=Domain)
+@receiver(post_delete, sender=Domain)
+def invalidate_domain_tenant(sender, instance, **kwargs):
+    """
+    Drop cached tenant lookups of a changed or deleted domain.
+    """
+    hosts = [instance.domain, getattr(instance, '_previous_domain', None)]
+    transaction.on_commit(lambda: tenant_cache.invalidate(*hosts))
+
+
+@receiver(post_save, sender=Store)
+def invalidate_store_tenant(sender, instance, created, **kwargs):
+    """
+    Drop cached tenant lookups of a changed store.
+    
+    Deleting a store cascades to its domains, which are handled by the
+    domain signal.
+    """
+    if not created:
+        hosts = list(instance.domains.values_list('domain', flat=True))
+        transaction.on_commit(lambda: tenant_cache.invalidate(*hosts))
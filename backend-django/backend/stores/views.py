@@ -9,6 +9,7 @@ from django.utils.translation import gettext_lazy as _
 from math import radians, cos, sin, asin, sqrt
 
 from common.permissions import IsStoreOwnerOrManager
+from common.tenant_cache import tenant_cache
 from .models import Store, Domain, StoreLocation
 from .serializers import (
     StoreSerializer, DomainSerializer, StoreLocationSerializer,
@@ -73,6 +74,13 @@ class StoreViewSet(viewsets.ModelViewSet):
         }
         
         return Response(subscription_data)
+    
+    @action(detail=False, methods=['get'], url_path='tenant-cache-stats', permission_classes=[permissions.IsAuthenticated, permissions.IsAdminUser])
+    def tenant_cache_stats(self, request):
+        """
+        Get tenant lookup cache counters of the process serving the request.
+        """
+        return Response(tenant_cache.get_stats())
 
 
 class DomainViewSet(viewsets.ModelViewSet):
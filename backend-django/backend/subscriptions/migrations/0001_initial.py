@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscription',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('plan', models.CharField(choices=[('pay_as_you_go', 'Pay as you go'), ('basic', 'Basic'), ('standard', 'Standard'), ('gold', 'Gold'), ('platinum', 'Platinum')], default='basic', max_length=20, verbose_name='Plan')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Price')),
+                ('billing_cycle', models.CharField(choices=[('monthly', 'Monthly'), ('yearly', 'Yearly')], default='monthly', max_length=20, verbose_name='Billing cycle')),
+                ('start_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Start date')),
+                ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='End date')),
+                ('current_period_start', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Current period start')),
+                ('current_period_end', models.DateTimeField(blank=True, null=True, verbose_name='Current period end')),
+                ('next_billing_date', models.DateTimeField(blank=True, null=True, verbose_name='Next billing date')),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True, verbose_name='Cancelled at')),
+                ('cancellation_reason', models.TextField(blank=True, verbose_name='Cancellation reason')),
+                ('has_custom_domain', models.BooleanField(default=False, verbose_name='Has custom domain')),
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='subscription', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Subscription',
+                'verbose_name_plural': 'Subscriptions',
+            },
+        ),
+        migrations.CreateModel(
+            name='SubscriptionLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('product_limit', models.IntegerField(default=-1, verbose_name='Product limit')),
+                ('product_count', models.IntegerField(default=0, verbose_name='Product count')),
+                ('staff_limit', models.IntegerField(default=-1, verbose_name='Staff limit')),
+                ('staff_count', models.IntegerField(default=0, verbose_name='Staff count')),
+                ('warehouse_limit', models.IntegerField(default=-1, verbose_name='Warehouse limit')),
+                ('warehouse_count', models.IntegerField(default=0, verbose_name='Warehouse count')),
+                ('analytics_days', models.IntegerField(default=7, verbose_name='Analytics days')),
+                ('theme_limit', models.IntegerField(default=5, verbose_name='Theme limit')),
+                ('subscription', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='limits', to='subscriptions.subscription')),
+            ],
+            options={
+                'verbose_name': 'Subscription limit',
+                'verbose_name_plural': 'Subscription limits',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['plan'], name='subscriptio_plan_0d0f8d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['is_active'], name='subscriptio_is_acti_46f9bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['next_billing_date'], name='subscriptio_next_bi_0e9626_idx'),
+        ),
+    ]
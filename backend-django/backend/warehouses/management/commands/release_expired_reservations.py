@@ -0,0 +1,18 @@
+"""
+Management command to release expired stock reservations.
+"""
+
+from django.core.management.base import BaseCommand
+
+from warehouses.reservations import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Release stock reserved by unpaid orders whose reservation TTL has passed."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Reservations released per transaction")
+    
+    def handle(self, *args, **options):
+        released = release_expired_reservations(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired reservations."))
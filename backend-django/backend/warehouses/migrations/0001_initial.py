@@ -0,0 +1,183 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('orders', '0001_initial'),
+        ('products', '0001_initial'),
+        ('staff', '0001_initial'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockTransfer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('reference_number', models.CharField(max_length=50, unique=True, verbose_name='Reference number')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_transit', 'In Transit'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='pending', max_length=20, verbose_name='Status')),
+                ('requested_date', models.DateTimeField(auto_now_add=True, verbose_name='Requested date')),
+                ('shipped_date', models.DateTimeField(blank=True, null=True, verbose_name='Shipped date')),
+                ('received_date', models.DateTimeField(blank=True, null=True, verbose_name='Received date')),
+                ('notes', models.TextField(blank=True, verbose_name='Notes')),
+                ('approved_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approved_transfers', to='staff.staff')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='requested_transfers', to='staff.staff')),
+            ],
+            options={
+                'verbose_name': 'Stock transfer',
+                'verbose_name_plural': 'Stock transfers',
+                'ordering': ['-requested_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockTransferItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantity')),
+                ('product_name_en', models.CharField(max_length=255, verbose_name='Product name (English)')),
+                ('product_name_ar', models.CharField(max_length=255, verbose_name='Product name (Arabic)')),
+                ('variant_name_en', models.CharField(blank=True, max_length=100, verbose_name='Variant name (English)')),
+                ('variant_name_ar', models.CharField(blank=True, max_length=100, verbose_name='Variant name (Arabic)')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transfer_items', to='products.product')),
+                ('transfer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='warehouses.stocktransfer')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transfer_items', to='products.variant')),
+            ],
+            options={
+                'verbose_name': 'Stock transfer item',
+                'verbose_name_plural': 'Stock transfer items',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Warehouse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('name_en', models.CharField(max_length=255, verbose_name='Name (English)')),
+                ('name_ar', models.CharField(max_length=255, verbose_name='Name (Arabic)')),
+                ('description_en', models.TextField(blank=True, verbose_name='Description (English)')),
+                ('description_ar', models.TextField(blank=True, verbose_name='Description (Arabic)')),
+                ('address_line1', models.CharField(max_length=255, verbose_name='Address line 1')),
+                ('address_line2', models.CharField(blank=True, max_length=255, verbose_name='Address line 2')),
+                ('city', models.CharField(max_length=100, verbose_name='City')),
+                ('state', models.CharField(max_length=100, verbose_name='State/Province')),
+                ('postal_code', models.CharField(max_length=20, verbose_name='Postal code')),
+                ('country', models.CharField(max_length=100, verbose_name='Country')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='Phone')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Is active')),
+                ('is_default', models.BooleanField(default=False, verbose_name='Is default')),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='Longitude')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='warehouses', to='stores.store')),
+            ],
+            options={
+                'verbose_name': 'Warehouse',
+                'verbose_name_plural': 'Warehouses',
+                'ordering': ['-is_default', 'name_en'],
+            },
+        ),
+        migrations.AddField(
+            model_name='stocktransfer',
+            name='destination_warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_transfers', to='warehouses.warehouse'),
+        ),
+        migrations.AddField(
+            model_name='stocktransfer',
+            name='source_warehouse',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_transfers', to='warehouses.warehouse'),
+        ),
+        migrations.CreateModel(
+            name='Inventory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Quantity')),
+                ('reserved_quantity', models.PositiveIntegerField(default=0, verbose_name='Reserved quantity')),
+                ('low_stock_threshold', models.PositiveIntegerField(default=5, verbose_name='Low stock threshold')),
+                ('location', models.CharField(blank=True, max_length=100, verbose_name='Location')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='products.product')),
+                ('variant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='products.variant')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory', to='warehouses.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Inventory',
+                'verbose_name_plural': 'Inventory',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created at')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantity')),
+                ('status', models.CharField(choices=[('active', 'Active'), ('committed', 'Committed'), ('released', 'Released')], default='active', max_length=20, verbose_name='Status')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expires at')),
+                ('inventory', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='warehouses.inventory')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_reservations', to='orders.order')),
+            ],
+            options={
+                'verbose_name': 'Stock reservation',
+                'verbose_name_plural': 'Stock reservations',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['order', 'status'], name='warehouses__order_i_b4f389_idx'), models.Index(fields=['status', 'expires_at'], name='warehouses__status_18a26f_idx'), models.Index(fields=['created_at', 'id'], name='warehouses__created_87a49d_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['store'], name='warehouses__store_i_cd906b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['is_active'], name='warehouses__is_acti_0f15f9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['is_default'], name='warehouses__is_defa_d68a35_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['reference_number'], name='warehouses__referen_09d805_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['status'], name='warehouses__status_f4994d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['requested_date'], name='warehouses__request_50eca5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stocktransfer',
+            index=models.Index(fields=['created_at', 'id'], name='warehouses__created_c286f0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['warehouse', 'product'], name='warehouses__warehou_2f85e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['quantity'], name='warehouses__quantit_c9f45e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['created_at', 'id'], name='warehouses__created_faaaab_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='inventory',
+            unique_together={('warehouse', 'product', 'variant')},
+        ),
+    ]
@@ -83,6 +83,7 @@ class Inventory(TimeStampedModel):
         indexes = [
             models.Index(fields=['warehouse', 'product']),
             models.Index(fields=['quantity']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -104,6 +105,43 @@ class Inventory(TimeStampedModel):
         return self.available_quantity <= self.low_stock_threshold
 
 
+class StockReservation(TimeStampedModel):
+    """
+    Stock held for an order until it ships, is cancelled or expires.
+    """
+    inventory = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='reservations')
+    order = models.ForeignKey('orders.Order', on_delete=models.CASCADE, related_name='stock_reservations', null=True, blank=True)
+    quantity = models.PositiveIntegerField(_("Quantity"))
+    
+    # Reservation status
+    status = models.CharField(
+        _("Status"),
+        max_length=20,
+        choices=[
+            ('active', _('Active')),
+            ('committed', _('Committed')),
+            ('released', _('Released')),
+        ],
+        default='active'
+    )
+    
+    # Active reservations past this time are released (never, if empty)
+    expires_at = models.DateTimeField(_("Expires at"), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _("Stock reservation")
+        verbose_name_plural = _("Stock reservations")
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['order', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['created_at', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.quantity} of {self.inventory_id} ({self.status})"
+
+
 class StockTransfer(TimeStampedModel):
     """
     Stock transfer model for tracking inventory movement between warehouses.
@@ -148,6 +186,7 @@ class StockTransfer(TimeStampedModel):
             models.Index(fields=['reference_number']),
             models.Index(fields=['status']),
             models.Index(fields=['requested_date']),
+            models.Index(fields=['created_at', 'id']),
         ]
     
     def __str__(self):
@@ -0,0 +1,289 @@
+"""
+Stock reservation engine for the Fashion Hub project.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+import logging
+
+from .models import Inventory, StockReservation, StockTransfer
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(Exception):
+    """
+    Raised when a warehouse can't cover all requested lines.
+    """
+    
+    def __init__(self, product_id, variant_id=None, requested=0):
+        self.product_id = product_id
+        self.variant_id = variant_id
+        self.requested = requested
+        super().__init__(f"Not enough stock for product {product_id} (variant {variant_id}), requested {requested}")
+
+
+def reserve_inventory(inventory_id, quantity):
+    """
+    Reserve stock on one inventory row if enough is available.
+    
+    The check and the increment happen in a single conditional UPDATE,
+    so concurrent reservations can't oversell and no row lock is held
+    beyond the statement.
+    
+    Returns:
+        True if the stock was reserved
+    """
+    return Inventory.objects.filter(
+        pk=inventory_id,
+        quantity__gte=F('reserved_quantity') + quantity,
+    ).update(reserved_quantity=F('reserved_quantity') + quantity) == 1
+
+
+def unreserve_inventory(inventory_id, quantity):
+    """
+    Give reserved stock on one inventory row back.
+    """
+    return Inventory.objects.filter(pk=inventory_id).update(
+        reserved_quantity=Greatest(F('reserved_quantity') - quantity, 0)
+    )
+
+
+def consume_inventory(inventory_id, quantity):
+    """
+    Remove reserved stock that left the warehouse.
+    """
+    return Inventory.objects.filter(pk=inventory_id).update(
+        quantity=Greatest(F('quantity') - quantity, 0),
+        reserved_quantity=Greatest(F('reserved_quantity') - quantity, 0),
+    )
+
+
+def adjust_inventory(inventory_id, delta):
+    """
+    Add (or remove, for a negative delta) on-hand stock, never going below zero.
+    """
+    return Inventory.objects.filter(pk=inventory_id).update(
+        quantity=Greatest(F('quantity') + delta, 0)
+    )
+
+
+def reserve_stock(warehouse, lines, order=None, ttl=None):
+    """
+    Reserve stock for all lines of an order, or none of them.
+    
+    Args:
+        warehouse: Warehouse to reserve from
+        lines: Iterable of (product_id, variant_id, quantity)
+        order: Optional order the reservations belong to
+        ttl: Seconds until unconfirmed reservations are released
+            (default: STOCK_RESERVATION_TTL, 0 for no expiry)
+    
+    Returns:
+        List of created StockReservation objects
+    
+    Raises:
+        InsufficientStock: If any line can't be covered; nothing is reserved
+    """
+    # Merge duplicate lines and use a fixed order so concurrent checkouts
+    # touch rows in the same sequence
+    quantities = defaultdict(int)
+    for product_id, variant_id, quantity in lines:
+        quantities[(product_id, variant_id)] += quantity
+    keys = sorted(quantities, key=lambda key: (key[0], key[1] or 0))
+    
+    ttl = settings.STOCK_RESERVATION_TTL if ttl is None else ttl
+    expires_at = timezone.now() + timedelta(seconds=ttl) if ttl else None
+    
+    inventory_ids = {
+        (product_id, variant_id): inventory_id
+        for inventory_id, product_id, variant_id in Inventory.objects.filter(
+            warehouse=warehouse,
+            product_id__in={product_id for product_id, _ in keys},
+        ).values_list('id', 'product_id', 'variant_id')
+    }
+    
+    reservations = []
+    with transaction.atomic():
+        for key in keys:
+            inventory_id = inventory_ids.get(key)
+            quantity = quantities[key]
+            if inventory_id is None or not reserve_inventory(inventory_id, quantity):
+                # Rolls back the lines reserved so far
+                raise InsufficientStock(key[0], key[1], quantity)
+            reservations.append(StockReservation(
+                inventory_id=inventory_id,
+                order=order,
+                quantity=quantity,
+                expires_at=expires_at,
+            ))
+        
+        return StockReservation.objects.bulk_create(reservations)
+
+
+def _settle(reservations, status, apply):
+    """
+    Move active reservations to a final status, applying the stock change once.
+    
+    Returns:
+        Number of reservations settled
+    """
+    settled = 0
+    with transaction.atomic():
+        for reservation in reservations:
+            # Claiming the reservation first makes settling idempotent
+            claimed = StockReservation.objects.filter(pk=reservation.pk, status='active').update(
+                status=status, updated_at=timezone.now()
+            )
+            if claimed:
+                apply(reservation.inventory_id, reservation.quantity)
+                settled += 1
+    return settled
+
+
+def release_reservations(reservations):
+    """
+    Release active reservations, making their stock available again.
+    """
+    return _settle(reservations, 'released', unreserve_inventory)
+
+
+def commit_reservations(reservations):
+    """
+    Commit active reservations once their stock has left the warehouse.
+    """
+    return _settle(reservations, 'committed', consume_inventory)
+
+
+def release_order_stock(order):
+    """
+    Release the stock reserved for a cancelled order.
+    """
+    return release_reservations(order.stock_reservations.filter(status='active'))
+
+
+def commit_order_stock(order):
+    """
+    Deduct the stock reserved for a shipped order.
+    """
+    return commit_reservations(order.stock_reservations.filter(status='active'))
+
+
+def release_expired_reservations(batch_size=500):
+    """
+    Release reservations of unpaid checkouts whose TTL has passed.
+    
+    Returns:
+        Number of reservations released
+    """
+    released = 0
+    while True:
+        batch = list(
+            StockReservation.objects.filter(status='active', expires_at__lte=timezone.now())
+            .exclude(order__is_paid=True)
+            .only('id', 'inventory_id', 'quantity')[:batch_size]
+        )
+        if not batch:
+            break
+        
+        released += release_reservations(batch)
+    
+    logger.info(f"Released {released} expired stock reservations")
+    return released
+
+
+def _transfer_inventory_id(transfer, item):
+    """
+    Get the source warehouse inventory row of a transfer item.
+    """
+    return Inventory.objects.filter(
+        warehouse_id=transfer.source_warehouse_id,
+        product_id=item.product_id,
+        variant_id=item.variant_id
+    ).values_list('id', flat=True).first()
+
+
+def _claim_transfer(transfer, from_status, **changes):
+    """
+    Move a transfer out of from_status with one conditional UPDATE.
+    
+    Only one of several concurrent callers can claim a transition, so
+    only that caller moves stock.
+    
+    Returns:
+        True if this call made the transition
+    """
+    changes['updated_at'] = timezone.now()
+    claimed = StockTransfer.objects.filter(pk=transfer.pk, status=from_status).update(**changes) == 1
+    if claimed:
+        for field, value in changes.items():
+            setattr(transfer, field, value)
+    return claimed
+
+
+def ship_transfer(transfer):
+    """
+    Mark a pending transfer as shipped and deduct its reserved stock.
+    
+    Returns:
+        True if the transfer was shipped by this call
+    """
+    with transaction.atomic():
+        if not _claim_transfer(transfer, 'pending', status='in_transit', shipped_date=timezone.now()):
+            return False
+        
+        for item in transfer.items.all():
+            inventory_id = _transfer_inventory_id(transfer, item)
+            if inventory_id:
+                consume_inventory(inventory_id, item.quantity)
+    return True
+
+
+def receive_transfer(transfer):
+    """
+    Mark an in-transit transfer as received and add its stock to the destination.
+    
+    Returns:
+        True if the transfer was received by this call
+    """
+    with transaction.atomic():
+        if not _claim_transfer(transfer, 'in_transit', status='completed', received_date=timezone.now()):
+            return False
+        
+        # Add quantity to destination warehouse, creating the record if needed
+        for item in transfer.items.all():
+            inventory, created = Inventory.objects.get_or_create(
+                warehouse_id=transfer.destination_warehouse_id,
+                product_id=item.product_id,
+                variant_id=item.variant_id,
+                defaults={'quantity': item.quantity}
+            )
+            if not created:
+                adjust_inventory(inventory.id, item.quantity)
+    return True
+
+
+def cancel_transfer(transfer):
+    """
+    Cancel a pending or in-transit transfer.
+    
+    Stock reserved by a pending transfer is released; an in-transit
+    transfer has already left the source warehouse.
+    
+    Returns:
+        True if the transfer was cancelled by this call
+    """
+    with transaction.atomic():
+        if _claim_transfer(transfer, 'pending', status='cancelled'):
+            for item in transfer.items.all():
+                inventory_id = _transfer_inventory_id(transfer, item)
+                if inventory_id:
+                    unreserve_inventory(inventory_id, item.quantity)
+            return True
+        
+        return _claim_transfer(transfer, 'in_transit', status='cancelled')
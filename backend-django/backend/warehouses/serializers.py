@@ -3,9 +3,11 @@ Warehouse serializers for the Fashion Hub project.
 """
 
 from rest_framework import serializers
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 
 from .models import Warehouse, Inventory, StockTransfer, StockTransferItem
+from .reservations import reserve_inventory
 
 
 class InventorySerializer(serializers.ModelSerializer):
@@ -182,7 +184,8 @@ class StockTransferCreateSerializer(serializers.ModelSerializer):
             validated_items.append({
                 'product': product,
                 'variant': variant,
-                'quantity': quantity
+                'quantity': quantity,
+                'inventory': inventory
             })
         
         attrs['validated_items'] = validated_items
@@ -199,37 +202,33 @@ class StockTransferCreateSerializer(serializers.ModelSerializer):
         import uuid
         reference_number = f"TRF-{uuid.uuid4().hex[:8].upper()}"
         
-        # Create stock transfer
-        stock_transfer = StockTransfer.objects.create(
-            reference_number=reference_number,
-            **validated_data
-        )
-        
-        # Create stock transfer items
-        for item in validated_items:
-            product = item['product']
-            variant = item['variant']
-            quantity = item['quantity']
-            
-            StockTransferItem.objects.create(
-                transfer=stock_transfer,
-                product=product,
-                variant=variant,
-                quantity=quantity,
-                product_name_en=product.name_en,
-                product_name_ar=product.name_ar,
-                variant_name_en=variant.name_en if variant else '',
-                variant_name_ar=variant.name_ar if variant else ''
+        with transaction.atomic():
+            # Create stock transfer
+            stock_transfer = StockTransfer.objects.create(
+                reference_number=reference_number,
+                **validated_data
             )
             
-            # Update source inventory
-            source_inventory = Inventory.objects.get(
-                warehouse=stock_transfer.source_warehouse,
-                product=product,
-                variant=variant
-            )
-            source_inventory.reserved_quantity += quantity
-            source_inventory.save()
+            # Create stock transfer items
+            for item in validated_items:
+                product = item['product']
+                variant = item['variant']
+                quantity = item['quantity']
+                
+                StockTransferItem.objects.create(
+                    transfer=stock_transfer,
+                    product=product,
+                    variant=variant,
+                    quantity=quantity,
+                    product_name_en=product.name_en,
+                    product_name_ar=product.name_ar,
+                    variant_name_en=variant.name_en if variant else '',
+                    variant_name_ar=variant.name_ar if variant else ''
+                )
+                
+                # Reserve source inventory, re-checking availability atomically
+                if not reserve_inventory(item['inventory'].id, quantity):
+                    raise serializers.ValidationError(_("Not enough stock available."))
         
         return stock_transfer
 
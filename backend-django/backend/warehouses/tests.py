@@ -0,0 +1,112 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from products.models import Category, Product
+from stores.models import Store
+from .models import Inventory, StockTransfer, StockTransferItem, Warehouse
+from .reservations import cancel_transfer, receive_transfer, reserve_inventory, ship_transfer
+
+
+class StockTransferMixin:
+    """
+    Builds a pending transfer of 3 units between two warehouses.
+    """
+    
+    def create_transfer(self):
+        store = Store.objects.create(name_en='Store', schema_name='store', slug='store')
+        category = Category.objects.create(name_en='Shirts', name_ar='Shirts', slug='shirts', store=store)
+        self.product = Product.objects.create(
+            category=category, name_en='P1', name_ar='P1', description_en='D1', description_ar='D1',
+            sku='SKU1', price=100, store=store
+        )
+        address = {'address_line1': 'Street', 'city': 'Cairo', 'state': 'Cairo', 'postal_code': '11511', 'country': 'EG'}
+        self.source = Warehouse.objects.create(store=store, name_en='Source', name_ar='Source', **address)
+        self.destination = Warehouse.objects.create(store=store, name_en='Destination', name_ar='Destination', **address)
+        self.inventory = Inventory.objects.create(warehouse=self.source, product=self.product, quantity=10)
+        reserve_inventory(self.inventory.id, 3)
+        
+        transfer = StockTransfer.objects.create(
+            reference_number='TR-1', source_warehouse=self.source, destination_warehouse=self.destination
+        )
+        StockTransferItem.objects.create(
+            transfer=transfer, product=self.product, quantity=3, product_name_en='P1', product_name_ar='P1'
+        )
+        return transfer
+
+
+class StockTransferTests(StockTransferMixin, TestCase):
+    """
+    Test cases for stock transfer transitions.
+    """
+    
+    def test_ship_twice_deducts_stock_once(self):
+        """
+        Test that a second ship of the same transfer is refused and moves no stock.
+        """
+        transfer = self.create_transfer()
+        stale = StockTransfer.objects.get(pk=transfer.pk)
+        
+        self.assertTrue(ship_transfer(transfer))
+        self.assertFalse(ship_transfer(stale))
+        
+        self.inventory.refresh_from_db()
+        self.assertEqual((self.inventory.quantity, self.inventory.reserved_quantity), (7, 0))
+    
+    def test_receive_twice_credits_destination_once(self):
+        """
+        Test that a second receive of the same transfer is refused.
+        """
+        transfer = self.create_transfer()
+        ship_transfer(transfer)
+        stale = StockTransfer.objects.get(pk=transfer.pk)
+        
+        self.assertTrue(receive_transfer(transfer))
+        self.assertFalse(receive_transfer(stale))
+        self.assertEqual(Inventory.objects.get(warehouse=self.destination).quantity, 3)
+    
+    def test_cancel_twice_releases_reservation_once(self):
+        """
+        Test that a second cancel of a pending transfer releases nothing more.
+        """
+        transfer = self.create_transfer()
+        reserve_inventory(self.inventory.id, 2)
+        stale = StockTransfer.objects.get(pk=transfer.pk)
+        
+        self.assertTrue(cancel_transfer(transfer))
+        self.assertFalse(cancel_transfer(stale))
+        
+        self.inventory.refresh_from_db()
+        self.assertEqual(self.inventory.reserved_quantity, 2)
+
+
+class StockTransferConcurrencyTests(StockTransferMixin, TransactionTestCase):
+    """
+    Test cases for concurrent stock transfer transitions.
+    """
+    
+    def test_concurrent_ships_deduct_stock_once(self):
+        """
+        Test that only one of several simultaneous ships moves stock.
+        """
+        transfer = self.create_transfer()
+        barrier = threading.Barrier(4)
+        results = []
+        
+        def ship():
+            try:
+                barrier.wait()
+                results.append(ship_transfer(StockTransfer.objects.get(pk=transfer.pk)))
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=ship) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.inventory.refresh_from_db()
+        self.assertEqual((self.inventory.quantity, self.inventory.reserved_quantity), (7, 0))
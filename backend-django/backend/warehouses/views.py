@@ -7,10 +7,10 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils.translation import gettext_lazy as _
-from django.utils import timezone
 
 from common.permissions import IsStoreOwnerOrManager, IsStoreStaff
 from .models import Warehouse, Inventory, StockTransfer, StockTransferItem
+from .reservations import adjust_inventory, cancel_transfer, receive_transfer, ship_transfer
 from .serializers import (
     WarehouseSerializer, InventorySerializer, StockTransferSerializer,
     StockTransferItemSerializer, StockTransferCreateSerializer,
@@ -125,9 +125,9 @@ class InventoryViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'detail': _('Quantity must be an integer.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update inventory
-        inventory.quantity = max(0, inventory.quantity + quantity)
-        inventory.save()
+        # Update inventory in the database so concurrent adjustments aren't lost
+        adjust_inventory(inventory.id, quantity)
+        inventory.refresh_from_db(fields=['quantity'])
         
         return Response({
             'detail': _('Stock adjusted.'),
@@ -183,26 +183,9 @@ class StockTransferViewSet(viewsets.ModelViewSet):
         """
         transfer = self.get_object()
         
-        if transfer.status != 'pending':
+        if not ship_transfer(transfer):
             return Response({'detail': _('Transfer must be pending to be shipped.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update transfer status
-        transfer.status = 'in_transit'
-        transfer.shipped_date = timezone.now()
-        transfer.save()
-        
-        # Update inventory
-        for item in transfer.items.all():
-            # Reduce quantity from source warehouse
-            source_inventory = Inventory.objects.get(
-                warehouse=transfer.source_warehouse,
-                product=item.product,
-                variant=item.variant
-            )
-            source_inventory.quantity -= item.quantity
-            source_inventory.reserved_quantity -= item.quantity
-            source_inventory.save()
-        
         return Response({'detail': _('Transfer marked as shipped.')}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
@@ -212,34 +195,9 @@ class StockTransferViewSet(viewsets.ModelViewSet):
         """
         transfer = self.get_object()
         
-        if transfer.status != 'in_transit':
+        if not receive_transfer(transfer):
             return Response({'detail': _('Transfer must be in transit to be received.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update transfer status
-        transfer.status = 'completed'
-        transfer.received_date = timezone.now()
-        transfer.save()
-        
-        # Update inventory
-        for item in transfer.items.all():
-            # Add quantity to destination warehouse
-            try:
-                dest_inventory = Inventory.objects.get(
-                    warehouse=transfer.destination_warehouse,
-                    product=item.product,
-                    variant=item.variant
-                )
-                dest_inventory.quantity += item.quantity
-                dest_inventory.save()
-            except Inventory.DoesNotExist:
-                # Create new inventory record if it doesn't exist
-                Inventory.objects.create(
-                    warehouse=transfer.destination_warehouse,
-                    product=item.product,
-                    variant=item.variant,
-                    quantity=item.quantity
-                )
-        
         return Response({'detail': _('Transfer marked as received.')}, status=status.HTTP_200_OK)
     
     @action(detail=True, methods=['post'])
@@ -249,25 +207,9 @@ class StockTransferViewSet(viewsets.ModelViewSet):
         """
         transfer = self.get_object()
         
-        if transfer.status not in ['pending', 'in_transit']:
+        if not cancel_transfer(transfer):
             return Response({'detail': _('Only pending or in-transit transfers can be cancelled.')}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Update transfer status
-        transfer.status = 'cancelled'
-        transfer.save()
-        
-        # Update inventory if transfer was pending
-        if transfer.status == 'pending':
-            for item in transfer.items.all():
-                # Release reserved quantity
-                source_inventory = Inventory.objects.get(
-                    warehouse=transfer.source_warehouse,
-                    product=item.product,
-                    variant=item.variant
-                )
-                source_inventory.reserved_quantity -= item.quantity
-                source_inventory.save()
-        
         return Response({'detail': _('Transfer cancelled.')}, status=status.HTTP_200_OK)
 
 